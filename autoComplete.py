@@ -7,15 +7,32 @@ Created on Tue Nov 19 14:33:49 2024
 @source: https://medium.com/@linuxadminhacks/creating-a-gui-autocomplete-app-with-tkinter-and-trie-tree-a066936aa17e
 """
 
+import atexit, bisect, json, sqlite3, threading, time, unicodedata
 from collections import defaultdict
-import os, sqlite3
 
 from setup import DB_FILE
+from dbConnection import library
+from dbMigration import SUGGESTION_COLUMNS
+import queryLayer
 
-# establishes connection to the database
-db_conn=sqlite3.connect(DB_FILE)
-# creates new cursor object to interact with the database
-cursor=db_conn.cursor()
+# file remembering how often and when each suggestion was searched
+USAGE_FILE = DB_FILE.parent/"suggestion_usage.json"
+
+# number of searched words remembered per input mode, the least recently searched are forgotten first
+USAGE_LIMIT = 500
+
+# seconds between a search and writing the usage file, so searches close together are written at once
+USAGE_SAVE_DELAY = 2.0
+
+# number of suggestions loaded at once, more are loaded while scrolling
+SUGGESTION_PAGE_SIZE = 20
+
+# seconds without typing before the suggestions are searched, and milliseconds between checks for the results in the interface
+SUGGESTION_DELAY = 0.1
+SUGGESTION_POLL_MS = 20
+
+# input modes holding names, which are also suggested with typos
+FUZZY_MODES = ["Scientific Name", "Taxon Group", "Free Text"]
 
 class TrieNode:
 	def __init__(self):
@@ -24,8 +41,10 @@ class TrieNode:
 
 
 class Trie:
-	def __init__(self):
+	def __init__(self, words=()):
 		self.root = TrieNode()
+		for word in words:
+			self.insert(word)
 
 	def insert(self, word):
 		node = self.root
@@ -36,62 +55,711 @@ class Trie:
 		except TypeError:
 			pass
 
-	def search(self, prefix):
+	def delete(self, word):
+		node = self.root
+		path = []
+		for char in word:
+			if char not in node.children:
+				return
+			path.append((node, char))
+			node = node.children[char]
+		node.is_word = False
+		# remove the nodes that don't lead to any word anymore
+		for parent, char in reversed(path):
+			child = parent.children[char]
+			if child.is_word or child.children:
+				break
+			del parent.children[char]
+
+	def search(self, prefix, limit=None, offset=0, exclude=()):
 		node = self.root
 		suggestions = []
 		for char in prefix:
 			if char not in node.children:
 				return suggestions
 			node = node.children[char]
-		self._find_suggestions(node, prefix, suggestions)
+		# walk the nodes in lexical order and stop as soon as the page is full
+		stack = [(node, prefix)]
+		while stack and (limit is None or len(suggestions) < limit):
+			node, word = stack.pop()
+			if node.is_word and word not in exclude:
+				if offset > 0:
+					offset -= 1
+				else:
+					suggestions.append(word)
+			for char, child in sorted(node.children.items(), reverse=True):
+				stack.append((child, word + char))
+		return suggestions
+
+
+# function for ignoring case and diacritics when comparing words, so "Müller" is found with "muller"
+def foldWord(word):
+	if word.isascii():
+		return word.lower()
+	return "".join(char for char in unicodedata.normalize("NFKD", word.casefold()) if not unicodedata.combining(char))
+
+
+# class for a compact index of words, searched by bisection instead of walking a node per character
+class SortedIndex:
+	"""
+	Keeps the words in one sorted list, so each word costs a single string instead of a node per character.
+	All words starting with a prefix follow each other in the list and are found with two bisections.
+	With a fold function the words are sorted and found by their folded form, which is kept in a second list.
+	"""
+	__slots__ = ("words", "keys", "fold")
+
+	def __init__(self, words=(), fold=None):
+		self.fold = fold
+		words = {word for word in words if isinstance(word, str)}
+		if fold is None:
+			self.words = sorted(words)
+			self.keys = self.words
+		else:
+			pairs = sorted((fold(word), word) for word in words)
+			self.keys = [key for key, _ in pairs]
+			self.words = [word for _, word in pairs]
+
+	def __len__(self):
+		return len(self.words)
+
+	def _locate(self, word):
+		# words with the same folded form are sorted among themselves
+		key = word if self.fold is None else self.fold(word)
+		position = bisect.bisect_left(self.keys, key)
+		while position < len(self.words) and self.keys[position] == key and self.words[position] < word:
+			position += 1
+		return key, position, position < len(self.words) and self.words[position] == word
+
+	def insert(self, word):
+		if not isinstance(word, str):
+			return
+		key, position, found = self._locate(word)
+		if not found:
+			self.words.insert(position, word)
+			if self.keys is not self.words:
+				self.keys.insert(position, key)
+
+	def delete(self, word):
+		key, position, found = self._locate(word)
+		if found:
+			del self.words[position]
+			if self.keys is not self.words:
+				del self.keys[position]
+
+	def range(self, prefix):
+		"""
+		Get the positions of the first word starting with prefix and of the first word after them.
+		"""
+		key = prefix if self.fold is None else self.fold(prefix)
+		start = bisect.bisect_left(self.keys, key)
+		# no word continues the prefix with a character above the highest code point
+		end = bisect.bisect_left(self.keys, key + "\U0010ffff", start)
+		return start, end
+
+	def search(self, prefix, limit=None, offset=0, exclude=()):
+		"""
+		Get the words starting with prefix in lexical order, leaving out the excluded words.
+		Only the words of the requested page are touched, however many words start with prefix.
+		"""
+		start, end = self.range(prefix)
+		if not exclude:
+			return self.words[start+offset:end if limit is None else min(end, start+offset+limit)]
+
+		# every excluded word in front of the page moves the page back by one
+		skipped = sorted(position for position in map(self.position, exclude) if position is not None and start <= position < end)
+		position = start + offset
+		for skipped_position in skipped:
+			if skipped_position > position:
+				break
+			position += 1
+
+		skipped = set(skipped)
+		suggestions = []
+		while position < end and (limit is None or len(suggestions) < limit):
+			if position not in skipped:
+				suggestions.append(self.words[position])
+			position += 1
 		return suggestions
 
-	def _find_suggestions(self, node, prefix, suggestions):
-		if node.is_word:
-			suggestions.append(prefix)
-		for char, child in node.children.items():
-			self._find_suggestions(child, prefix + char, suggestions)
+	def position(self, word):
+		_, position, found = self._locate(word)
+		return position if found else None
+
+
+def prefixDistance(query, word, max_distance):
+	"""
+	Get the smallest number of edits turning query into the beginning of word, a swap of two neighbouring characters is one edit.
+	Returns max_distance+1 as soon as the distance is known to be larger than max_distance.
+	"""
+	word = word[:len(query)+max_distance]
+	too_far = max_distance+1
+	before, row = None, [j if j <= max_distance else too_far for j in range(len(word)+1)]
+	for i in range(1, len(query)+1):
+		# cells further than max_distance from the diagonal can't be within max_distance, so only the band is computed
+		low, high = max(1, i-max_distance), min(len(word), i+max_distance)
+		current = [too_far]*(len(word)+1)
+		if i <= max_distance:
+			current[0] = i
+		for j in range(low, high+1):
+			distance = min(row[j]+1, current[j-1]+1, row[j-1]+(query[i-1] != word[j-1]))
+			if i > 1 and j > 1 and query[i-1] == word[j-2] and query[i-2] == word[j-1]:
+				distance = min(distance, before[j-2]+1)
+			current[j] = min(distance, too_far)
+		if min(current) > max_distance:
+			return too_far
+		before, row = row, current
+	return min(row)
+
+
+# class for finding words close to a misspelled prefix
+class FuzzyIndex:
+	"""
+	Keeps the folded words in one sorted list like SortedIndex and walks their distinct beginnings character by character,
+	as if the list was a trie. The distance to the query (the one of prefixDistance) is computed once per beginning, and a
+	beginning is left as soon as no continuation of it can be close enough. So only the beginnings near the query are
+	visited, however many words there are and however many of them share a beginning, e.g. all species of a genus.
+	"""
+
+	def __init__(self, words=()):
+		self._index = foldedIndex(words)
+
+	def __len__(self):
+		return len(self._index)
+
+	def insert(self, word):
+		self._index.insert(word)
+
+	def delete(self, word):
+		self._index.delete(word)
+
+	def search(self, query, limit=None, max_distance=None):
+		"""
+		Get the words whose beginning is at most max_distance edits away from query, closest first.
+		By default one typo is allowed from 4 characters on and two from 10 characters on.
+		Queries with at most four characters per allowed typo only get words starting with their first character,
+		as too many words are close to them otherwise.
+		"""
+		key = foldWord(query)
+		if max_distance is None:
+			max_distance = 0 if len(key) < 4 else 1 if len(key) < 10 else 2
+		if max_distance == 0 or key == "":
+			return []
+		keys = self._index.keys
+		too_far = max_distance+1
+		depth_limit = len(key)+max_distance
+
+		# rows of distances between the beginnings of the query and the beginning of the words walked so far
+		first_row = [i if i <= max_distance else too_far for i in range(len(key)+1)]
+		if len(key) <= 4*max_distance:
+			start, end = self._index.range(key[0])
+			stack = [(1, start, end, first_row, self._nextRow(key, first_row, None, key[0], "", 1, max_distance), too_far)]
+		else:
+			stack = [(0, 0, len(keys), None, first_row, too_far)]
+
+		# ranges of positions in the sorted list whose words are all within max_distance, with their distance
+		ranges = []
+		while stack:
+			depth, start, end, before, row, best = stack.pop()
+			closest = min(row)
+			if closest > max_distance and best > max_distance:
+				continue
+			if row[-1] < best:
+				best = row[-1]
+			if depth == depth_limit or closest >= best:
+				# no longer beginning of these words is closer
+				if best <= max_distance:
+					ranges.append((best, start, end))
+				continue
+
+			position = start
+			# words ending here are as close as their whole beginning
+			while position < end and len(keys[position]) == depth:
+				position += 1
+			if position > start and best <= max_distance:
+				ranges.append((best, start, position))
+
+			beginning = keys[position][:depth] if position < end else ""
+			while position < end:
+				char = keys[position][depth]
+				stop = bisect.bisect_left(keys, beginning+char+"\U0010ffff", position, end)
+				child_row = self._nextRow(key, row, before, char, beginning[-1:], depth+1, max_distance)
+				stack.append((depth+1, position, stop, row, child_row, best))
+				position = stop
+
+		ranges.sort()
+		matches = []
+		for distance, start, end in ranges:
+			if limit is not None and len(matches) >= limit and matches[-1][0] < distance:
+				break
+			matches.extend((distance, word) for word in self._index.words[start:end])
+		matches.sort()
+		return [word for _, word in matches[:limit]]
+
+	@staticmethod
+	def _nextRow(key, row, before, char, last_char, depth, max_distance):
+		# distances after adding char to the beginning, a swap of two neighbouring characters is one edit like in prefixDistance,
+		# written out without min() as it runs for every beginning that is walked
+		too_far = max_distance+1
+		current = [too_far]*(len(key)+1)
+		if depth <= max_distance:
+			current[0] = depth
+		# cells further than max_distance from the diagonal can't be within max_distance, so only the band is computed
+		for i in range(max(1, depth-max_distance), min(len(key), depth+max_distance)+1):
+			distance = row[i-1] if key[i-1] == char else row[i-1]+1
+			if row[i]+1 < distance:
+				distance = row[i]+1
+			if current[i-1]+1 < distance:
+				distance = current[i-1]+1
+			if i > 1 and before is not None and key[i-1] == last_char and key[i-2] == char and before[i-2]+1 < distance:
+				distance = before[i-2]+1
+			current[i] = distance if distance < too_far else too_far
+		return current
+
+
+# function for making an index that ignores case and diacritics, used for the suggestions of all input modes
+def foldedIndex(words=()):
+	return SortedIndex(words, fold=foldWord)
+
+
+# class for sharing one suggestion index per input mode across all windows
+class SuggestionService:
+	"""
+	Builds the index of an input mode once and keeps it up to date with the suggestion log,
+	which triggers fill on every edit of the core database, instead of rebuilding it.
+	The log is only read again after markStale, once per change of the database.
+	"""
+
+	def __init__(self,index_factory=foldedIndex,usage_file=USAGE_FILE):
+		self.index_factory=index_factory
+		self.usage_file=usage_file
+		# number of searches and time of the last search of words, per input mode
+		self._usage=self._loadUsage()
+		self._used={}
+		# pending write of the usage file and whether the usage changed since the last write
+		self._save_timer=None
+		self._usage_changed=False
+		self._indexes={}
+		self._fuzzy={}
+		# number of rows using each word, a word is only removed once no row uses it anymore
+		self._counts={}
+		self._last_change=0
+		# set when the database was changed, the changes are applied on the next use of the indexes
+		self._stale=False
+		self._lock=threading.RLock()
+		# counts every change of the indexes or the ranking, so results of an older version are not reused
+		self.version=0
+
+	def _build(self,mode: str):
+		try:
+			words=queryLayer.fetchAll(f"words:{mode}")
+		except sqlite3.OperationalError:
+			# the library is not built yet
+			words=[]
+		self._counts[mode]=dict(words)
+		self._indexes[mode]=self.index_factory(self._counts[mode])
+		if mode in FUZZY_MODES:
+			self._fuzzy[mode]=FuzzyIndex(self._counts[mode])
+
+	def _reset(self):
+		# the indexes are built again on their next use
+		self._indexes, self._fuzzy, self._counts = {}, {}, {}
+		self.version+=1
+
+	def _logRange(self):
+		try:
+			return queryLayer.fetchOne("suggestion_log_range")
+		except sqlite3.OperationalError:
+			# databases that could not be migrated have no suggestion log
+			return None
+
+	def markStale(self):
+		"""
+		Note that the core database was changed. The edits are applied to the indexes on their next use.
+		"""
+		with self._lock:
+			self._stale=True
+
+	def refresh(self):
+		"""
+		Apply the edits of the core database since the last refresh to the built indexes.
+		Without suggestion log the indexes are rebuilt on their next use.
+		"""
+		with self._lock:
+			self._stale=False
+			log_range=self._logRange()
+			if log_range is None:
+				self._reset()
+				return
+			first_change, last_change = log_range
+			if last_change<=self._last_change:
+				return
+			if self._indexes!={} and first_change>self._last_change+1:
+				# the log was cleaned up in between, so the changes are incomplete
+				self._reset()
+			else:
+				for _, mode, word, change in queryLayer.fetchAll("suggestion_changes", (self._last_change,)):
+					if mode not in self._indexes:
+						continue
+					counts=self._counts[mode]
+					count=counts.get(word,0)+change
+					if count>0 and word not in counts:
+						for index in [self._indexes[mode], self._fuzzy.get(mode)]:
+							if index is not None:
+								index.insert(word)
+					elif count<=0 and word in counts:
+						for index in [self._indexes[mode], self._fuzzy.get(mode)]:
+							if index is not None:
+								index.delete(word)
+					if count>0:
+						counts[word]=count
+					else:
+						counts.pop(word,None)
+			self._last_change=last_change
+			self.version+=1
+			self._cleanLog()
+
+	def _cleanLog(self):
+		# the applied changes are not needed anymore, the library may be read-only though
+		try:
+			db_conn=library.getConnection(readonly=False)
+			with db_conn:
+				db_conn.execute("DELETE FROM suggestion_log WHERE Id<=?",(self._last_change,))
+		except sqlite3.Error:
+			pass
+
+	def getIndex(self,mode: str):
+		"""
+		Get the up to date index of an input mode, building it on first use.
+		"""
+		with self._lock:
+			if self._indexes=={}:
+				# remember where the log stands before building, later edits are applied by refresh
+				self._last_change=(self._logRange() or (0, 0))[1]
+				self._stale=False
+			elif self._stale:
+				self.refresh()
+			if mode not in self._indexes:
+				self._build(mode)
+			return self._indexes[mode]
+
+	def _loadUsage(self):
+		try:
+			with open(self.usage_file,encoding="utf-8") as file:
+				usage=json.load(file)
+		except (OSError, ValueError):
+			return {}
+		for mode in usage:
+			self._limitUsage(usage[mode])
+		return usage
+
+	@staticmethod
+	def _limitUsage(usage: dict):
+		# forget the least recently searched words beyond the limit, returns the forgotten words
+		if len(usage)<=USAGE_LIMIT:
+			return []
+		forgotten=sorted(usage,key=lambda word: usage[word][1])[:len(usage)-USAGE_LIMIT]
+		for word in forgotten:
+			del usage[word]
+		return forgotten
+
+	def _scheduleSave(self):
+		# the file is written once for all searches within the delay, in a background thread
+		self._usage_changed=True
+		if self._save_timer is None:
+			self._save_timer=threading.Timer(USAGE_SAVE_DELAY,self.saveUsage)
+			self._save_timer.daemon=True
+			self._save_timer.start()
+
+	def saveUsage(self):
+		"""
+		Write the usage of the searched words to the usage file, if it changed since the last write.
+		"""
+		with self._lock:
+			self._save_timer=None
+			if not self._usage_changed:
+				return
+			self._usage_changed=False
+			data=json.dumps(self._usage,ensure_ascii=False)
+		try:
+			with open(self.usage_file,"w",encoding="utf-8") as file:
+				file.write(data)
+		except OSError:
+			pass
+
+	def _usedIndex(self,mode: str):
+		# the searched words of a mode get their own small index, so they are found by prefix as well
+		if mode not in self._used:
+			self._used[mode]=foldedIndex(self._usage.get(mode,{}))
+		return self._used[mode]
+
+	def recordSelection(self,mode: str,word: str):
+		"""
+		Remember that a word of the library was searched, so it is suggested first from now on. Other words are ignored.
+		Builds the index of the input mode if needed, so the interface calls it in the background.
+		"""
+		if not word or mode not in SUGGESTION_COLUMNS:
+			return
+		with self._lock:
+			index=self.getIndex(mode)
+			# searches ignore case, so a word typed in another case counts for the word in the library
+			if word not in self._counts[mode]:
+				word=next((match for match in index.search(word,SUGGESTION_PAGE_SIZE) if foldWord(match)==foldWord(word)),None)
+				if word is None:
+					return
+			usage=self._usage.setdefault(mode,{})
+			usage[word]=[usage.get(word,[0, 0])[0]+1, time.time()]
+			used=self._usedIndex(mode)
+			used.insert(word)
+			for forgotten in self._limitUsage(usage):
+				used.delete(forgotten)
+			self.version+=1
+			self._scheduleSave()
+
+	def search(self,mode: str,prefix: str,limit: int=SUGGESTION_PAGE_SIZE,offset: int=0):
+		"""
+		Get a page of the words of an input mode starting with prefix, ignoring case and diacritics. Words searched more often
+		and more recently come first, the others follow in lexical order. If no name starts with prefix, the names
+		closest to it are suggested instead. Returns a list of strings.
+		"""
+		with self._lock:
+			index=self.getIndex(mode)
+			usage=self._usage.get(mode,{})
+			# searched words that left the library are not suggested anymore
+			ranked=sorted(
+				(word for word in self._usedIndex(mode).search(prefix) if word in self._counts[mode]),
+				key=lambda word: (-usage[word][0], -usage[word][1], word)
+				)
+
+			words=ranked[offset:] if limit is None else ranked[offset:offset+limit]
+			remaining=None if limit is None else limit-len(words)
+			if remaining!=0:
+				words+=index.search(prefix,remaining,max(0,offset-len(ranked)),exclude=ranked)
+			if words==[] and offset==0 and mode in self._fuzzy:
+				words=self._fuzzy[mode].search(prefix,limit)
+			return words
+
+	def warmUp(self,modes: list=list(SUGGESTION_COLUMNS)):
+		"""
+		Build the indexes of all input modes in a background thread, so switching the mode never waits.
+		"""
+		def build():
+			for mode in modes:
+				self.getIndex(mode)
+
+		threading.Thread(target=build,name="suggestion_warm_up",daemon=True).start()
+
+
+# function for finding the change of a listbox between two lists of suggestions
+def listChange(old: list,new: list):
+	"""
+	Get the change turning the shown words old into new. Returns the number of leading words that stay and the words added after them.
+	"""
+	keep=0
+	for old_word, new_word in zip(old,new):
+		if old_word!=new_word:
+			break
+		keep+=1
+	return keep, new[keep:]
+
+
+# class for searching the suggestions of an input field in the background while typing
+class SuggestionWorker:
+	"""
+	Searches the suggestions of the latest typed prefix in a background thread, once no key was pressed for SUGGESTION_DELAY.
+	Results of a prefix that was changed in the meantime are dropped, and the interface only gets the change of its listbox.
+	Each input field has its own worker, all workers share the suggestion service.
+	"""
+
+	def __init__(self,service: SuggestionService,delay: float=SUGGESTION_DELAY):
+		self.service=service
+		self.delay=delay
+		self._condition=threading.Condition()
+		self._thread=None
+		self._closed=False
+		# number of the latest request, the request waiting to be searched and the result waiting to be shown
+		self._latest=0
+		self._pending=None
+		self._searching=False
+		self._result=None
+		# words shown in the listbox and the input mode and prefix they belong to
+		self._shown=[]
+		self._shown_for=None
+		# complete result of the last typed prefix, longer prefixes are narrowed down from it
+		self._last=None
+
+	def request(self,mode: str,prefix: str,more: bool=False):
+		"""
+		Ask for the suggestions of a prefix, or with more for the next page of the shown suggestions.
+		Returns the number of the request, None if no more suggestions are needed.
+		"""
+		with self._condition:
+			if more:
+				# the next page is only loaded once everything typed is shown and the last page was full
+				if (self._pending is not None or self._searching or self._result is not None or self._shown_for!=(mode, prefix)
+						or self._shown==[] or len(self._shown)%SUGGESTION_PAGE_SIZE!=0):
+					return None
+			self._latest+=1
+			self._pending=(self._latest, mode, prefix, more)
+			if self._thread is None:
+				self._thread=threading.Thread(target=self._run,name="suggestion_worker",daemon=True)
+				self._thread.start()
+			self._condition.notify_all()
+			return self._latest
+
+	def result(self,number: int):
+		"""
+		Get the change of the listbox for a request, to be called by the interface.
+		Returns (number of shown words that stay, words added after them), None while the request is searched
+		and False if a later request replaced it or the worker was closed.
+		"""
+		with self._condition:
+			if self._closed or number<self._latest:
+				return False
+			if self._result is None or self._result[0]!=number:
+				return None
+			_, mode, prefix, words, change = self._result
+			self._result=None
+			self._shown=words
+			self._shown_for=(mode, prefix)
+			return change
+
+	def close(self):
+		with self._condition:
+			self._closed=True
+			self._condition.notify_all()
+
+	def _run(self):
+		while True:
+			with self._condition:
+				while self._pending is None and not self._closed:
+					self._condition.wait()
+				if self._closed:
+					return
+				# wait until no key was pressed for the delay, every new key starts the delay again
+				while not self._pending[3]:
+					number=self._pending[0]
+					self._condition.wait(self.delay)
+					if self._closed:
+						return
+					if self._pending[0]==number:
+						break
+				number, mode, prefix, more = self._pending
+				self._pending=None
+				self._searching=True
+				shown=self._shown
+
+			words=[]
+			try:
+				words=shown+self.service.search(mode,prefix,offset=len(shown)) if more else self._search(mode,prefix)
+			except Exception:
+				# a failed search shows no suggestions, the worker keeps running for the next prefix
+				self._last=None
+			finally:
+				with self._condition:
+					self._searching=False
+					# a newer request makes this result useless
+					if number==self._latest:
+						self._result=(number, mode, prefix, words, listChange(self._shown,words))
+
+	def _search(self,mode: str,prefix: str):
+		if not prefix:
+			return []
+		key=foldWord(prefix)
+		# edits of the database are applied first, so a changed version tells that the last result is outdated
+		self.service.getIndex(mode)
+		version=self.service.version
+
+		# a complete result of a shorter prefix already contains all words of the longer one, in the same order
+		if self._last is not None:
+			last_mode, last_key, last_version, last_words = self._last
+			if last_mode==mode and last_version==version and key.startswith(last_key):
+				words=[word for word in last_words if foldWord(word).startswith(key)]
+				# without words left, the names close to the prefix are searched instead
+				if words!=[]:
+					self._last=(mode, key, version, words)
+					return words
+
+		words=self.service.search(mode,prefix)
+		# only a result shorter than a page holds all words, names close to the prefix don't start with it
+		complete=0<len(words)<SUGGESTION_PAGE_SIZE and all(foldWord(word).startswith(key) for word in words)
+		self._last=(mode, key, version, words) if complete else None
+		return words
+
+
+# class for connecting an entry field and its listbox of suggestions in a window
+class SuggestionList:
+	"""
+	Searches the suggestions of an entry field with its own SuggestionWorker and shows them in the listbox below it:
+	typing asks for the suggestions, scrolling to the end of the listbox loads the next page, and double click or tab
+	writes the selected suggestion into the entry field. mode is the input mode, or a function returning it for windows
+	in which the mode can be switched. Only the methods of the tkinter widgets are used, so this module doesn't need tkinter.
+	"""
+
+	def __init__(self,entry,listbox,mode,service: SuggestionService=None):
+		self.entry=entry
+		self.listbox=listbox
+		self._mode=mode if callable(mode) else lambda: mode
+		self.worker=SuggestionWorker(service if service is not None else suggestions)
+
+		# binds the release of a key in the entry field to update the autocomplete suggestions
+		entry.bind("<KeyRelease>",self.update)
+		# binds double click and tab while an entry in the listbox is selected to insert that entry into the input field
+		listbox.bind("<Double-1>",self.choose)
+		listbox.bind("<Tab>",self.choose)
+		# the listbox reports every change of the visible part, which is used to page in more suggestions
+		listbox.config(yscrollcommand=self.loadMore)
+		# the worker of a closed window is stopped
+		listbox.bind("<Destroy>",lambda event: self.worker.close())
+
+	# function for updating the autocomplete suggestions
+	def update(self,event=None):
+		self.show(self.worker.request(self._mode(),self.entry.get()))
+
+	# function for loading the next page of suggestions once the end of the listbox is visible
+	def loadMore(self,first,last):
+		if float(last)<1.0:
+			return
+		number=self.worker.request(self._mode(),self.entry.get(),more=True)
+		if number is not None:
+			self.show(number)
+
+	# function for showing the suggestions of a request once they are searched, the listbox only gets the change
+	def show(self,number: int):
+		change=self.worker.result(number)
+		if change is None:
+			self.listbox.after(SUGGESTION_POLL_MS,lambda: self.show(number))
+			return
+		# a later request replaced this one
+		if change is False:
+			return
+		keep, added = change
+		self.listbox.delete(keep,"end")
+		if added:
+			self.listbox.insert("end",*added)
 
+	# function for inserting the selected word into the entry field
+	def choose(self,event=None):
+		cursor=self.listbox.curselection()
+		if not cursor:
+			return
+		self.entry.delete(0,"end")
+		self.entry.insert(0,self.listbox.get(cursor[0]))
 
-def load_words():
 
-	try:
-		acc_numbers=cursor.execute("SELECT AccessionNumber FROM ids").fetchall()
-		acc_numbers=set([acc[0] for acc in acc_numbers])
-		
-		genome_ids=cursor.execute("SELECT IDX FROM ids").fetchall()
-		genome_ids=set([str(idx[0]) for idx in genome_ids])
-		
-		sci_names=cursor.execute("SELECT ScientificName FROM taxonomy").fetchall()
-		sci_names=set([name[0] for name in sci_names])
-		
-		taxon_groups=cursor.execute("SELECT Kingdom, Phylum, Class, taxOrder, Family, Genus FROM taxonomy").fetchall()
-		taxon_groups=set([group for group_tup in taxon_groups for group in group_tup])
+# shared suggestion service for all windows
+suggestions=SuggestionService()
 
-		return acc_numbers, genome_ids, sci_names, taxon_groups
-	except:
-		return "", "", "", ""
+# make sure searches of the last seconds are written when the program ends
+atexit.register(suggestions.saveUsage)
 
 
 def getSuggestions(selection):
-	acc_numbers, genome_ids, sci_names, taxon_groups = load_words()
-	trie = Trie()
-	
-	if selection=="Accession Number":
-		words=acc_numbers
-	elif selection=="Genome Index":
-		words=genome_ids
-	elif selection=="Scientific Name":
-		words=sci_names
-	elif selection=="Taxon Group":
-		words=taxon_groups
-	
-	for word in words:
-		trie.insert(word)
-	
-	return trie
+	"""
+	Get the shared suggestion index of an input mode.
+	"""
+	return suggestions.getIndex(selection)
 
 
 
 if __name__=='__main__':
-	print(getSuggestions("Accession Number"))
+	print(getSuggestions("Accession Number").search("GCA_0"))
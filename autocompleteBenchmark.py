@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Thu Oct 22 10:41:18 2026
+
+@author: Ronja Rösner
+
+Memory and latency benchmark of the autocomplete indexes as the suggestion service uses them:
+the folded SortedIndex against the previous Trie on made up accession numbers, and the folded index
+together with the FuzzyIndex of the name modes on made up scientific names. The FuzzyIndex is searched for misspelled
+names, which should take at most FUZZY_BUDGET seconds for 95 % of the searches. Run it with
+	python autocompleteBenchmark.py --sizes 10000 100000 1000000
+"""
+
+import argparse, gc, random, statistics, time, tracemalloc
+
+from autoComplete import Trie, FuzzyIndex, foldedIndex, SUGGESTION_PAGE_SIZE
+
+# number of searches timed per index
+SEARCHES = 2000
+
+# seconds 95 % of the searches for misspelled names may take, the suggestions are searched after a typing pause of 0.1 seconds
+FUZZY_BUDGET = 0.05
+
+# characters typos are made of
+TYPOS = "abcdeilnorstu"
+
+# syllables the made up names are put together from
+SYLLABLES = ["ca", "li", "dris", "al", "pi", "na", "ac", "ci", "ter", "gen", "ti", "lis", "pa", "rus", "mä", "jor", "lo", "bu",
+	"teo", "fa", "gus", "syl", "va", "can", "ni", "lu", "pus", "tor", "da", "mus", "cu", "lus", "ra", "nae", "phy", "ta", "ver"]
+
+
+# function for making up accession numbers like GCA_001455555.1
+def makeKeys(size: int,seed: int=0):
+	generator=random.Random(seed)
+	keys=set()
+	while len(keys)<size:
+		keys.add(f"{generator.choice(['GCA', 'GCF'])}_{generator.randrange(10**9):09d}.{generator.randint(1,3)}")
+	return list(keys)
+
+
+# function for making up scientific names like Calidris alpina
+def makeNames(size: int,seed: int=0):
+	generator=random.Random(seed)
+	names=set()
+	while len(names)<size:
+		genus="".join(generator.choice(SYLLABLES) for _ in range(generator.randint(2,4))).capitalize()
+		names.add(genus+" "+"".join(generator.choice(SYLLABLES) for _ in range(generator.randint(2,3))))
+	return list(names)
+
+
+# function for measuring the memory and time needed to build an index
+def measureBuild(index_factory,keys: list):
+	gc.collect()
+	tracemalloc.start()
+	# the keys are copied while tracing, so the strings an index keeps count towards its memory like they would in the program
+	keys=[key.encode().decode() for key in keys]
+	start=time.perf_counter()
+	index=index_factory(keys)
+	seconds=time.perf_counter()-start
+	del keys
+	size=tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	return index, size, seconds
+
+
+# function for misspelling a prefix of a key with as many typos as the FuzzyIndex allows for its length
+def misspell(key: str,generator):
+	prefix=list(key[:generator.randint(4,len(key))])
+	for _ in range(1 if len(prefix)<10 else 2):
+		position=generator.randrange(1,len(prefix))
+		prefix[position]=generator.choice(TYPOS.replace(prefix[position].lower(),""))
+	return "".join(prefix)
+
+
+# function for timing searches, the prefixes are cut from the keys at the lengths people type before picking,
+# without a shortest length they are misspelled
+def measureSearches(index,keys: list,shortest: int=None,seed: int=1):
+	generator=random.Random(seed)
+	samples=generator.sample(keys,min(SEARCHES,len(keys)))
+	if shortest is None:
+		prefixes=[misspell(key,generator) for key in samples]
+	else:
+		prefixes=[key[:generator.randint(shortest,len(key))] for key in samples]
+	times=[]
+	for prefix in prefixes:
+		start=time.perf_counter()
+		# the service only ever asks for one page of suggestions
+		index.search(prefix,SUGGESTION_PAGE_SIZE)
+		times.append(time.perf_counter()-start)
+	times.sort()
+	return statistics.median(times), times[int(len(times)*0.95)]
+
+
+def benchmark(sizes: list):
+	"""
+	Build and search the indexes for every number of keys. Returns a list of dictionaries with the results,
+	the FuzzyIndex is searched for misspelled names.
+	"""
+	results=[]
+	for size in sizes:
+		accessions=makeKeys(size)
+		names=makeNames(size)
+		for name, index_factory, keys, shortest in [
+			("Trie", Trie, accessions, 8), ("foldedIndex", foldedIndex, accessions, 8),
+			("foldedIndex", foldedIndex, names, 3), ("FuzzyIndex", FuzzyIndex, names, None)
+			]:
+			index, memory, build_seconds = measureBuild(index_factory,keys)
+			median, p95 = measureSearches(index,keys,shortest)
+			results.append({
+				"index": name, "words": "accessions" if keys is accessions else "names", "keys": size, "memory": memory,
+				"bytes_per_key": memory/size, "build": build_seconds, "median": median, "p95": p95
+				})
+			del index
+	return results
+
+
+if __name__=='__main__':
+	parser=argparse.ArgumentParser(description="Compare memory and latency of the autocomplete indexes.")
+	parser.add_argument("--sizes",nargs="+",type=int,default=[10000, 100000, 1000000],help="numbers of keys to test")
+	args=parser.parse_args()
+
+	print(f"{'index':<13}{'words':<12}{'keys':>10}{'memory MB':>12}{'bytes/key':>11}{'build s':>9}{'median µs':>11}{'p95 µs':>9}")
+	for result in benchmark(args.sizes):
+		print(f"{result['index']:<13}{result['words']:<12}{result['keys']:>10}{result['memory']/2**20:>12.1f}{result['bytes_per_key']:>11.0f}"
+			f"{result['build']:>9.2f}{result['median']*1e6:>11.1f}{result['p95']*1e6:>9.1f}")
+		if result["index"]=="FuzzyIndex":
+			print(f"{'':<13}misspelled names within the budget of {FUZZY_BUDGET*1e3:.0f} ms: {'yes' if result['p95']<=FUZZY_BUDGET else 'NO'}")
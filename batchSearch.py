@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 13:41:05 2026
+
+@author: Ronja Rösner
+
+This module runs CRYtabia searches without the graphical interface.
+Queries are read line by line from a file or stdin, results are written as TSV or JSONL while the search runs.
+Nothing in here may import tkinter or PIL, so it also runs on machines without a display.
+"""
+
+import json, queue, sys, threading
+from concurrent.futures import ThreadPoolExecutor
+
+from getInfo import SearchDatabase, SearchNCBI, SearchWikipedia, REMOTE_SOURCES, BULK_SELECTIONS, safeRemoteText
+from rateLimiter import requestPriority, BATCH
+
+# columns of the output for species lookups and taxon group lookups
+SPECIES_FIELDS = ["query", "selection", "found", "scientific_name", "authority", "vernacular_eng", "vernacular_ger", "accessions", "indices", "taxpath", "habitats"]
+TAXGROUP_FIELDS = ["query", "selection", "found", "rank", "species"]
+
+# sources that can be enabled for a batch search
+BATCH_SOURCES = ["table"] + list(REMOTE_SOURCES)
+
+# most queries looked up in the core library at once, fewer are taken if the input arrives slowly
+CHUNK_SIZE = 64
+
+# number of searched queries waiting for the results before them, reading pauses while the buffer is full
+REORDER_BUFFER = 256
+
+
+def readQueries(stream):
+	"""
+	Read one query per line from a stream, skipping empty lines and lines starting with #.
+	"""
+	for line in stream:
+		line=line.strip()
+		if line!="" and not line.startswith("#"):
+			yield line
+
+
+def readChunks(queries,chunk_size: int=CHUNK_SIZE):
+	"""
+	Read the queries in a background thread and yield them in chunks of the queries that arrived so far, at most chunk_size.
+	Input that arrives slowly, e.g. typed into stdin, is searched right away instead of waiting for a full chunk.
+	"""
+	arrived=queue.Queue(maxsize=4*chunk_size)
+	finished=object()
+
+	def read():
+		try:
+			for query in queries:
+				arrived.put(query)
+			arrived.put(finished)
+		except BaseException as error:
+			arrived.put(error)
+
+	threading.Thread(target=read,name="batch_reader",daemon=True).start()
+	chunk=[]
+	while True:
+		# only the first query of a chunk is waited for, the others are taken if they already arrived
+		try:
+			item=arrived.get(block=chunk==[])
+		except queue.Empty:
+			yield chunk
+			chunk=[]
+			continue
+		if item is finished or isinstance(item,BaseException):
+			break
+		chunk.append(item)
+		if len(chunk)>=chunk_size:
+			yield chunk
+			chunk=[]
+	if chunk!=[]:
+		yield chunk
+	if item is not finished:
+		raise item
+
+
+# function for getting the core library information for a chunk of queries
+def tableResults(queries: list,selection: str):
+	"""
+	Look up a chunk of queries in the core library. Returns a list of dictionaries in the order of the queries.
+	"""
+	if selection=="Taxon Group":
+		results=[]
+		for query in queries:
+			sci_names,rank=SearchDatabase(query,selection).getTaxgroupInfo()
+			results.append({"found": sci_names!=[], "rank": rank, "species": sci_names})
+		return results
+
+	if selection in BULK_SELECTIONS:
+		records=dict(SearchDatabase.lookup_many(queries,selection))
+	else:
+		records={query: SearchDatabase(query,selection).getSpeciesInfo() for query in queries}
+
+	results=[]
+	for query in queries:
+		record=records.get(query)
+		if record is None:
+			results.append({"found": False})
+		else:
+			results.append({
+				"found": True,
+				"scientific_name": record.sci_name,
+				"authority": record.authority,
+				"vernacular_eng": record.vernacular_eng,
+				"vernacular_ger": record.vernacular_ger,
+				"accessions": record.accessions,
+				"indices": record.indices,
+				"taxpath": record.taxpath,
+				"habitats": record.habitats
+				})
+	return results
+
+
+# function for loading the Wikipedia summaries of a chunk of queries with a few batched requests
+def prefetchSummaries(queries: list,selection: str):
+	"""
+	Load the Wikipedia summaries of a chunk of queries into the response cache, so the searches per query don't need a request.
+	"""
+	names={query: query for query in queries}
+	if selection in BULK_SELECTIONS:
+		names.update((query, record.sci_name) for query, record in SearchDatabase.lookup_many(queries,selection))
+	with requestPriority(BATCH):
+		SearchWikipedia.loadSummaries(set(names.values()))
+
+
+# function for writing a single result in the chosen format
+def writeResult(result: dict,fields: list,out_format: str,out_stream):
+	if out_format=="jsonl":
+		out_stream.write(json.dumps(result,ensure_ascii=False)+"\n")
+	else:
+		values=[]
+		for field in fields:
+			value=result.get(field,"")
+			if isinstance(value,list):
+				value=",".join(map(str,value))
+			# tabs and line breaks would break the table, so they are escaped
+			value=str(value).replace("\\","\\\\").replace("\t","\\t").replace("\n","\\n")
+			values.append(value)
+		out_stream.write("\t".join(values)+"\n")
+	out_stream.flush()
+
+
+def runBatch(queries,selection: str,sources: list,out_stream=sys.stdout,out_format: str="tsv",workers: int=4,chunk_size: int=CHUNK_SIZE):
+	"""
+	Search all queries in the enabled sources and write every result in input order as soon as it and the results before it are done.
+	The core library is searched in chunks, remote sources are queried by a pool of worker threads.
+	Returns the number of queries that were processed.
+	"""
+	remote_sources=[source for source in REMOTE_SOURCES if source in sources]
+	fields=(TAXGROUP_FIELDS if selection=="Taxon Group" else SPECIES_FIELDS)+remote_sources
+
+	if out_format=="tsv":
+		out_stream.write("\t".join(fields)+"\n")
+
+	# function for searching all enabled remote sources for one query, searches from the interface go first
+	def remoteResults(query: str):
+		with requestPriority(BATCH):
+			return {source: safeRemoteText(source,query,selection).strip() for source in remote_sources}
+
+	# searched queries in input order, the results are written once the first one in the buffer is done
+	ordered=queue.Queue(maxsize=REORDER_BUFFER)
+	finished=object()
+
+	# function for searching the queries chunk by chunk in a background thread, while the results are written
+	def search(executor):
+		try:
+			for chunk in readChunks(queries,chunk_size):
+				table=tableResults(chunk,selection) if "table" in sources else [{} for _ in chunk]
+				if "Wikipedia" in remote_sources:
+					prefetchSummaries(chunk,selection)
+				for query, table_result in zip(chunk,table):
+					remote=executor.submit(remoteResults,query) if remote_sources!=[] else None
+					ordered.put((query, table_result, remote))
+			ordered.put(finished)
+		except BaseException as error:
+			ordered.put(error)
+
+	count=0
+	with ThreadPoolExecutor(max_workers=max(1,workers),thread_name_prefix="batch_search") as executor:
+		threading.Thread(target=search,args=(executor,),name="batch_search",daemon=True).start()
+		while True:
+			item=ordered.get()
+			if item is finished:
+				break
+			if isinstance(item,BaseException):
+				raise item
+			query, table_result, remote = item
+			result={"query": query, "selection": selection}
+			result.update(table_result)
+			if remote is not None:
+				result.update(remote.result())
+			writeResult(result,fields,out_format,out_stream)
+			count+=1
+
+	return count
+
+
+def runNCBIReports(accessions: list,out_stream=sys.stdout):
+	"""
+	Fetch the NCBI dataset reports of many accession numbers in bulk and write them as JSONL while they arrive.
+	Accession numbers without a report are written last. Returns the number of reports that were found.
+	"""
+	misses=[]
+	count=0
+	with requestPriority(BATCH):
+		for accession, report in SearchNCBI.getDatasetReports(accessions,misses=misses):
+			writeResult({"accession": accession, "found": True, "report": report},[],"jsonl",out_stream)
+			count+=1
+	for accession in misses:
+		writeResult({"accession": accession, "found": False},[],"jsonl",out_stream)
+	return count
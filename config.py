@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:05:12 2026
+
+@author: Ronja Rösner
+
+This module holds the settings of CRYtabia. Every setting has a default below, which can be
+changed in data/config.json or with an environment variable named CRYTABIA_<SETTING>.
+"""
+
+import json, os
+
+from setup import DB_FILE
+
+# optional file with settings, e.g. {"HTTP_RETRIES": 5}
+CONFIG_FILE = DB_FILE.parent/"config.json"
+
+# default value of every setting
+DEFAULTS = {
+	# base addresses of the remote sources
+	"GBIF_API_URL": "https://api.gbif.org/v1/",
+	"GBIF_MAP_URL": "https://api.gbif.org/v2/map/occurrence/",
+	"NCBI_API_URL": "https://api.ncbi.nlm.nih.gov/datasets/v2/",
+	"WIKIPEDIA_API_URL": "https://{language}.wikipedia.org/w/api.php",
+	# sent with every request, Wikipedia refuses requests without a contact
+	"USER_AGENT": "CRYtabia (ronja.roesner@uni-oldenburg.de)",
+	# seconds to wait for a connection and for a response
+	"HTTP_CONNECT_TIMEOUT": 5.0,
+	"HTTP_READ_TIMEOUT": 20.0,
+	# number of retries after a failed request and the base delay between them in seconds
+	"HTTP_RETRIES": 3,
+	"HTTP_BACKOFF": 0.5,
+	"HTTP_MAX_BACKOFF": 30.0,
+	# number of open connections kept per host
+	"HTTP_CONNECTIONS_PER_HOST": 6,
+	# requests per second allowed by each source, NCBI allows more requests with an API key
+	"GBIF_RATE": 10.0,
+	"NCBI_RATE": 3.0,
+	"NCBI_RATE_WITH_KEY": 10.0,
+	"WIKIPEDIA_RATE": 10.0,
+	# key for the NCBI Datasets API, see https://support.nlm.nih.gov/knowledgebase/article/KA-05317/
+	"NCBI_API_KEY": "",
+	# serve all remote sources from the offline mirror and never go to the network
+	"OFFLINE_MODE": False
+}
+
+
+def loadSettings(config_file=CONFIG_FILE):
+	"""
+	Combine the defaults with the config file and the environment. Returns a dictionary of setting and value.
+	"""
+	settings=dict(DEFAULTS)
+
+	if os.path.exists(config_file):
+		with open(config_file,encoding="utf-8") as file:
+			settings.update(json.load(file))
+
+	for name, default in DEFAULTS.items():
+		value=os.environ.get(f"CRYTABIA_{name}")
+		if value is None:
+			continue
+		# environment variables are strings, so they are converted to the type of the default
+		if isinstance(default,bool):
+			settings[name]=value.lower() in ("1", "true", "yes", "on")
+		elif isinstance(default,(int,float)):
+			settings[name]=type(default)(value)
+		else:
+			settings[name]=value
+
+	return settings
+
+
+# settings used by all modules
+settings=loadSettings()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:02:37 2026
+
+@author: Ronja Rösner
+
+This module keeps track of whether the remote sources (GBIF, NCBI, Wikipedia) can be reached.
+The sources are probed in the background and the results are cached, so checking a source never blocks
+for longer than a single probe. Every source has a circuit breaker, so a dead endpoint fails fast.
+"""
+
+import threading, time
+import requests
+
+from config import settings
+from httpClient import client
+from rateLimiter import requestPriority, BATCH
+
+# endpoints used for checking if a source can be reached
+SOURCE_ENDPOINTS = {
+	"GBIF": settings["GBIF_API_URL"],
+	"NCBI": settings["NCBI_API_URL"],
+	"Wikipedia": settings["WIKIPEDIA_API_URL"].format(language="en")
+}
+
+# seconds a probe result stays valid
+PROBE_TTL = 60
+# seconds a single probe may take
+PROBE_TIMEOUT = 5
+# number of failed requests in a row after which a source is skipped
+FAILURE_THRESHOLD = 3
+# seconds a source is skipped after it failed too often
+COOLDOWN = 30
+
+
+# class holding the known state of a single source
+class SourceHealth:
+
+	def __init__(self):
+		self.online=None
+		self.checked_at=0.0
+		self.failures=0
+		self.open_until=0.0
+		self.probing=False
+
+
+# class for probing the remote sources in the background
+class ConnectivityMonitor:
+
+	def __init__(self,endpoints: dict=SOURCE_ENDPOINTS,ttl: float=PROBE_TTL):
+		self.endpoints=endpoints
+		self.ttl=ttl
+		self._health={source: SourceHealth() for source in endpoints}
+		self._lock=threading.Lock()
+		self._thread=None
+
+	def start(self):
+		"""
+		Start probing all sources in a background thread, once every ttl seconds.
+		"""
+		with self._lock:
+			if self._thread is not None:
+				return
+			self._thread=threading.Thread(target=self._run,name="connectivity_monitor",daemon=True)
+		self._thread.start()
+
+	def _run(self):
+		while True:
+			for source in self.endpoints:
+				self.probe(source)
+			time.sleep(self.ttl)
+
+	def probe(self,source: str):
+		"""
+		Check if a source can be reached right now. Returns a boolean.
+		"""
+		health=self._health[source]
+		try:
+			# a probe is not retried, the next probe follows anyway
+			with requestPriority(BATCH):
+				client.head(self.endpoints[source],timeout=PROBE_TIMEOUT,retries=0)
+			online=True
+		except requests.RequestException:
+			online=False
+
+		with self._lock:
+			health.online=online
+			health.checked_at=time.monotonic()
+			health.probing=False
+			if online and health.open_until<=time.monotonic():
+				health.failures=0
+		return online
+
+	def _probeInBackground(self,source: str):
+		with self._lock:
+			health=self._health[source]
+			if health.probing:
+				return
+			health.probing=True
+		threading.Thread(target=self.probe,args=(source,),daemon=True).start()
+
+	def isAvailable(self,source: str):
+		"""
+		Check if a source should be searched. Returns a boolean.
+		Outdated results are refreshed in the background, only the very first check of a source waits for a probe.
+		"""
+		health=self._health[source]
+		now=time.monotonic()
+
+		# skip the source while its circuit breaker is open
+		if health.open_until>now:
+			return False
+		if health.open_until>0:
+			# the cooldown is over, let the next request through to test the source again
+			with self._lock:
+				health.open_until=0.0
+				health.failures=FAILURE_THRESHOLD-1
+			return True
+		if health.online is None:
+			return self.probe(source)
+		if now-health.checked_at>self.ttl:
+			self._probeInBackground(source)
+		return health.online
+
+	def isOnline(self):
+		"""
+		Check if any of the sources can be reached. Returns a boolean.
+		"""
+		return any(self.isAvailable(source) for source in self.endpoints)
+
+	def recordSuccess(self,source: str):
+		"""
+		Note a successful request to a source, which closes its circuit breaker.
+		"""
+		with self._lock:
+			health=self._health[source]
+			health.online=True
+			health.checked_at=time.monotonic()
+			health.failures=0
+			health.open_until=0.0
+
+	def recordFailure(self,source: str):
+		"""
+		Note a failed request to a source. After FAILURE_THRESHOLD failures in a row the source is skipped for COOLDOWN seconds.
+		"""
+		with self._lock:
+			health=self._health[source]
+			health.failures+=1
+			if health.failures>=FAILURE_THRESHOLD:
+				health.online=False
+				health.checked_at=time.monotonic()
+				health.open_until=time.monotonic()+COOLDOWN
+
+	def retryIn(self,source: str):
+		"""
+		Get the number of seconds until a skipped source is tried again. Returns 0 if it is not skipped.
+		"""
+		return max(0,round(self._health[source].open_until-time.monotonic()))
+
+
+# shared monitor for all remote sources
+monitor=ConnectivityMonitor()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 10:12:40 2026
+
+@author: Ronja Rösner
+
+This module manages the connections to the core database (genome_master_library.db).
+All modules get their connections from the shared manager instead of opening their own.
+"""
+
+import atexit, itertools, os, sqlite3, threading, time
+from pathlib import Path
+
+from setup import DB_FILE
+
+# time in milliseconds a connection waits for a lock before giving up
+BUSY_TIMEOUT=5000
+
+# number of compiled statements kept per connection, enough for all statements of the query layer
+STATEMENT_CACHE_SIZE=256
+
+# counter for giving every in-memory copy of the database a unique name
+SNAPSHOT_COUNTER=itertools.count()
+
+# seconds between checks whether the database file changed, lookups in between use the in-memory copy without checking
+SNAPSHOT_CHECK_INTERVAL=1.0
+
+# class for handing out one pooled connection per thread and mode
+class ConnectionManager:
+
+	def __init__(self,db_file):
+		self.db_file=Path(db_file)
+
+		# every thread keeps its own connections, the registry is used for closing all of them at once
+		self._local=threading.local()
+		self._registry=[]
+		self._lock=threading.Lock()
+		self._wal_checked=False
+		# increased on every close, so threads notice that their connection is gone
+		self._generation=0
+
+		# state of the optional in-memory copy of the database
+		self._snapshot=False
+		self._snapshot_name=None
+		self._snapshot_keeper=None
+		self._snapshot_watcher=None
+		self._snapshot_state=None
+		# time of the last check for changes, None makes the next lookup check
+		self._snapshot_checked=None
+
+	def _connect(self,readonly: bool):
+		"""
+		Open a new connection to the database file. Read-only connections use the sqlite URI mode.
+		"""
+		if readonly:
+			db_conn=sqlite3.connect(f"{self.db_file.resolve().as_uri()}?mode=ro",uri=True,check_same_thread=False,cached_statements=STATEMENT_CACHE_SIZE)
+		else:
+			db_conn=sqlite3.connect(self.db_file,check_same_thread=False,cached_statements=STATEMENT_CACHE_SIZE)
+		db_conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT}")
+
+		return db_conn
+
+	def _enableWAL(self):
+		"""
+		Switch the database to write-ahead logging once, so edits in GeDaMa don't block running searches.
+		"""
+		with self._lock:
+			if self._wal_checked:
+				return
+			self._wal_checked=True
+		try:
+			db_conn=self._connect(readonly=False)
+			db_conn.execute("PRAGMA journal_mode=WAL")
+			db_conn.close()
+		except sqlite3.Error:
+			# the database folder may not be writable, lookups still work in rollback mode
+			pass
+
+	def enableSnapshot(self):
+		"""
+		Serve all read-only lookups from an in-memory copy of the database.
+		The copy is reloaded whenever the database file changes, e.g. through edits in GeDaMa.
+		"""
+		self._enableWAL()
+		with self._lock:
+			self._snapshot=True
+		self._refreshSnapshot()
+
+	def _fileState(self):
+		"""
+		Get the values used for detecting changes of the database file. Returns a tuple.
+		"""
+		# data_version changes with every commit of another connection, the file stats catch a replaced file
+		data_version=self._snapshot_watcher.execute("PRAGMA data_version").fetchone()[0]
+		file_stat=os.stat(self.db_file)
+		return data_version, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns
+
+	def _refreshSnapshot(self):
+		"""
+		Copy the database into a new in-memory database if it changed since the last copy.
+		The file is checked at most every SNAPSHOT_CHECK_INTERVAL seconds.
+		"""
+		checked=self._snapshot_checked
+		if checked is not None and time.monotonic()-checked<SNAPSHOT_CHECK_INTERVAL:
+			return
+		with self._lock:
+			if self._snapshot_watcher is None:
+				self._snapshot_watcher=self._connect(readonly=True)
+			state=self._fileState()
+			self._snapshot_checked=time.monotonic()
+			if state==self._snapshot_state:
+				return
+
+			# every copy gets its own name, threads still reading the old copy switch on their next lookup
+			name=f"file:crytabia_snapshot_{id(self)}_{next(SNAPSHOT_COUNTER)}?mode=memory&cache=shared"
+			keeper=sqlite3.connect(name,uri=True,check_same_thread=False)
+			self._snapshot_watcher.backup(keeper)
+
+			if self._snapshot_keeper is not None:
+				self._snapshot_keeper.close()
+			self._snapshot_keeper=keeper
+			self._snapshot_name=name
+			self._snapshot_state=state
+
+	def _connectSnapshot(self):
+		"""
+		Open a new read-only connection to the current in-memory copy.
+		"""
+		db_conn=sqlite3.connect(self._snapshot_name,uri=True,check_same_thread=False,cached_statements=STATEMENT_CACHE_SIZE)
+		db_conn.execute("PRAGMA query_only=1")
+		return db_conn
+
+	def getConnection(self,readonly: bool=True):
+		"""
+		Get the connection of the current thread. Returns a sqlite3 connection.
+		"""
+		self._enableWAL()
+
+		if readonly and self._snapshot:
+			self._refreshSnapshot()
+			attribute="snapshot"
+			expected=(self._generation,self._snapshot_name)
+			connect=self._connectSnapshot
+		else:
+			if not readonly:
+				# changes written by this program are copied on the next lookup, without waiting for the next check
+				self._snapshot_checked=None
+			attribute="readonly" if readonly else "readwrite"
+			expected=self._generation
+			connect=lambda: self._connect(readonly)
+
+		generation,db_conn=getattr(self._local,attribute,(None,None))
+		if db_conn is None or generation!=expected:
+			outdated=db_conn
+			db_conn=connect()
+			with self._lock:
+				setattr(self._local,attribute,(expected,db_conn))
+				self._registry.append(db_conn)
+				# close the connection to an outdated in-memory copy, so its memory is freed
+				if outdated is not None and outdated in self._registry:
+					self._registry.remove(outdated)
+					outdated.close()
+
+		return db_conn
+
+	def cursor(self,readonly: bool=True):
+		"""
+		Get a new cursor on the connection of the current thread.
+		"""
+		return self.getConnection(readonly).cursor()
+
+	def closeAll(self):
+		"""
+		Close every connection opened by this manager, regardless of the thread it belongs to.
+		"""
+		with self._lock:
+			registry=self._registry
+			self._registry=[]
+			self._generation+=1
+
+			# the in-memory copy is dropped as well, it is made again on the next lookup
+			for db_conn in (self._snapshot_keeper,self._snapshot_watcher):
+				if db_conn is not None:
+					registry.append(db_conn)
+			self._snapshot_keeper=None
+			self._snapshot_watcher=None
+			self._snapshot_state=None
+			self._snapshot_checked=None
+
+		for db_conn in registry:
+			try:
+				db_conn.close()
+			except sqlite3.Error:
+				pass
+
+
+# shared manager for the core database
+library=ConnectionManager(DB_FILE)
+
+# make sure all connections are closed when the program ends
+atexit.register(library.closeAll)
+
+
+if __name__=='__main__':
+	print(library.cursor().execute("SELECT COUNT(*) FROM ids").fetchone())
+	library.closeAll()
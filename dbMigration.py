@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 11:03:18 2026
+
+@author: Ronja Rösner
+
+This module brings the schema of the core database up to date.
+Every migration step is run once and recorded in PRAGMA user_version.
+"""
+
+import sqlite3
+
+from setup import DB_FILE
+from dbConnection import BUSY_TIMEOUT
+
+# declared column types for the tables of the core database, columns not listed here keep their type
+COLUMN_TYPES = {
+	"taxonomy": {
+		"IDX": "INTEGER PRIMARY KEY",
+		"Kingdom": "TEXT",
+		"Phylum": "TEXT",
+		"Class": "TEXT",
+		"taxOrder": "TEXT",
+		"Family": "TEXT",
+		"Genus": "TEXT",
+		"Species": "TEXT",
+		"Subspecies": "TEXT",
+		"ScientificName": "TEXT",
+		"Authority": "TEXT",
+		"Vernacular_Eng": "TEXT",
+		"Vernacular_Ger": "TEXT"
+	},
+	"traits": {
+		"IDX": "INTEGER PRIMARY KEY",
+		"isMarine": "INTEGER",
+		"isBrackish": "INTEGER",
+		"isFresh": "INTEGER",
+		"isTerrestrial": "INTEGER",
+		"isAllWater": "INTEGER",
+		"isMarineFresh": "INTEGER",
+		"isExtinct": "INTEGER"
+	},
+	"ids": {
+		"IDX": "INTEGER PRIMARY KEY",
+		"AccessionNumber": "TEXT",
+		"usageKey": "INTEGER",
+		"IRMNG_ID": "INTEGER",
+		"AphiaID": "INTEGER",
+		"PESI_GUID": "TEXT"
+	}
+}
+
+# indexes for all columns that are used for looking up entries
+INDEXES = {
+	"ids": ["AccessionNumber"],
+	"taxonomy": ["ScientificName", "Kingdom", "Phylum", "Class", "taxOrder", "Family", "Genus"]
+}
+
+
+# function for getting the names and declared types of all columns in a table
+def tableColumns(cursor,table: str):
+	"""
+	Get the columns of a table. Returns a list of (name, declared type) tuples, empty if the table does not exist.
+	"""
+	return [(row[1], row[2]) for row in cursor.execute(f'PRAGMA table_info("{table}")')]
+
+
+def typedSchema(cursor):
+	"""
+	Rebuild the tables with an integer primary key and typed columns, then create the lookup indexes.
+	"""
+	for table, types in COLUMN_TYPES.items():
+		columns=tableColumns(cursor,table)
+		if columns==[]:
+			continue
+
+		column_names=", ".join(f'"{name}"' for name, _ in columns)
+		column_defs=", ".join(f'"{name}" {types.get(name, decl or "BLOB")}' for name, decl in columns)
+
+		# copy the rows into a new table, the column affinity converts the stored values
+		cursor.execute(f'ALTER TABLE "{table}" RENAME TO "{table}_untyped"')
+		cursor.execute(f'CREATE TABLE "{table}" ({column_defs})')
+		cursor.execute(f'INSERT INTO "{table}" ({column_names}) SELECT {column_names} FROM "{table}_untyped" ORDER BY IDX')
+		cursor.execute(f'DROP TABLE "{table}_untyped"')
+
+	for table, columns in INDEXES.items():
+		for col in columns:
+			cursor.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_{col}" ON "{table}" ("{col}")')
+
+
+# columns of the taxonomy table covered by the full-text index
+FULL_TEXT_COLUMNS = ["ScientificName", "Authority", "Vernacular_Eng", "Vernacular_Ger", "Kingdom", "Phylum", "Class", "taxOrder", "Family", "Genus"]
+
+
+def fullTextIndex(cursor):
+	"""
+	Create the FTS5 index over names, vernaculars, authorities and ranks, kept in sync with the taxonomy table by triggers.
+	"""
+	columns=", ".join(FULL_TEXT_COLUMNS)
+	new_values=", ".join(f"new.{col}" for col in FULL_TEXT_COLUMNS)
+	old_values=", ".join(f"old.{col}" for col in FULL_TEXT_COLUMNS)
+
+	# the index only stores the tokens, the text itself is read from the taxonomy table
+	cursor.execute(f"""CREATE VIRTUAL TABLE IF NOT EXISTS taxonomy_fts USING fts5(
+		{columns}, content='taxonomy', content_rowid='IDX', tokenize='unicode61 remove_diacritics 2'
+		)""")
+	cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS taxonomy_fts_insert AFTER INSERT ON taxonomy BEGIN
+		INSERT INTO taxonomy_fts(rowid, {columns}) VALUES (new.IDX, {new_values});
+		END""")
+	cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS taxonomy_fts_delete AFTER DELETE ON taxonomy BEGIN
+		INSERT INTO taxonomy_fts(taxonomy_fts, rowid, {columns}) VALUES ('delete', old.IDX, {old_values});
+		END""")
+	cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS taxonomy_fts_update AFTER UPDATE ON taxonomy BEGIN
+		INSERT INTO taxonomy_fts(taxonomy_fts, rowid, {columns}) VALUES ('delete', old.IDX, {old_values});
+		INSERT INTO taxonomy_fts(rowid, {columns}) VALUES (new.IDX, {new_values});
+		END""")
+	# fill the index with the rows that are already in the table
+	cursor.execute("INSERT INTO taxonomy_fts(taxonomy_fts) VALUES ('rebuild')")
+
+
+# rank columns of the taxonomy table, from the highest to the lowest rank
+RANK_COLUMNS = ["Kingdom", "Phylum", "Class", "taxOrder", "Family", "Genus"]
+
+
+def closureStatements(row: str,change: str):
+	"""
+	Get the statements adding (change "+") or removing (change "-") a taxonomy row in the closure table.
+	The row is referenced as new or old inside of triggers.
+	"""
+	statements=[]
+	for depth, rank in enumerate(RANK_COLUMNS):
+		name=f"{row}.{rank}"
+		parent=f"{row}.{RANK_COLUMNS[depth-1]}" if depth>0 else "NULL"
+		condition=f"{name} IS NOT NULL AND {name}!=''"
+		if change=="+":
+			statements.append(f"INSERT OR IGNORE INTO taxon_closure (Name, Rank, IDX) SELECT {name}, '{rank}', {row}.IDX WHERE {condition};")
+			statements.append(f"""INSERT INTO taxon_nodes (Name, Rank, Depth, Parent, Descendants) SELECT {name}, '{rank}', {depth}, {parent}, 1 WHERE {condition}
+				ON CONFLICT (Name, Rank) DO UPDATE SET Descendants=Descendants+1;""")
+		else:
+			statements.append(f"DELETE FROM taxon_closure WHERE Name={name} AND Rank='{rank}' AND IDX={row}.IDX;")
+			statements.append(f"UPDATE taxon_nodes SET Descendants=Descendants-1 WHERE Name={name} AND Rank='{rank}';")
+	if change=="-":
+		statements.append("DELETE FROM taxon_nodes WHERE Descendants<=0;")
+	return "\n".join(statements)
+
+
+def taxonClosure(cursor):
+	"""
+	Create the closure table mapping every taxon to its member indices, with the number of descendants per taxon.
+	Triggers keep both tables up to date when rows of the taxonomy table are edited.
+	"""
+	cursor.execute("""CREATE TABLE IF NOT EXISTS taxon_closure (
+		Name TEXT NOT NULL, Rank TEXT NOT NULL, IDX INTEGER NOT NULL, PRIMARY KEY (Name, Rank, IDX)
+		) WITHOUT ROWID""")
+	cursor.execute("CREATE INDEX IF NOT EXISTS idx_taxon_closure_IDX ON taxon_closure (IDX)")
+	cursor.execute("""CREATE TABLE IF NOT EXISTS taxon_nodes (
+		Name TEXT NOT NULL, Rank TEXT NOT NULL, Depth INTEGER NOT NULL, Parent TEXT, Descendants INTEGER NOT NULL, PRIMARY KEY (Name, Rank)
+		) WITHOUT ROWID""")
+
+	cursor.execute(f"CREATE TRIGGER IF NOT EXISTS taxon_closure_insert AFTER INSERT ON taxonomy BEGIN\n{closureStatements('new','+')}\nEND")
+	cursor.execute(f"CREATE TRIGGER IF NOT EXISTS taxon_closure_delete AFTER DELETE ON taxonomy BEGIN\n{closureStatements('old','-')}\nEND")
+	cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS taxon_closure_update AFTER UPDATE OF IDX, {', '.join(RANK_COLUMNS)} ON taxonomy BEGIN
+		{closureStatements('old','-')}
+		{closureStatements('new','+')}
+		END""")
+
+	# fill both tables with the rows that are already in the taxonomy table
+	for depth, rank in enumerate(RANK_COLUMNS):
+		parent=RANK_COLUMNS[depth-1] if depth>0 else "NULL"
+		cursor.execute(f"INSERT OR IGNORE INTO taxon_closure (Name, Rank, IDX) SELECT {rank}, '{rank}', IDX FROM taxonomy WHERE {rank} IS NOT NULL AND {rank}!=''")
+		cursor.execute(f"""INSERT OR IGNORE INTO taxon_nodes (Name, Rank, Depth, Parent, Descendants)
+			SELECT {rank}, '{rank}', {depth}, MIN({parent}), COUNT(*) FROM taxonomy WHERE {rank} IS NOT NULL AND {rank}!='' GROUP BY {rank}""")
+
+
+def statisticsTables(cursor):
+	"""
+	Create the summary tables for the library statistics and the triggers marking them as outdated after edits.
+	The tables are filled by libraryStats.refreshStatistics.
+	"""
+	cursor.execute("""CREATE TABLE IF NOT EXISTS stats_ranks (
+		Name TEXT NOT NULL, Rank TEXT NOT NULL, Depth INTEGER NOT NULL, Species INTEGER NOT NULL, Entries INTEGER NOT NULL, WithAccession INTEGER NOT NULL,
+		PRIMARY KEY (Rank, Name)
+		) WITHOUT ROWID""")
+	cursor.execute("""CREATE TABLE IF NOT EXISTS stats_habitats (
+		Habitat TEXT NOT NULL, Flag INTEGER, Species INTEGER NOT NULL
+		)""")
+	cursor.execute("""CREATE TABLE IF NOT EXISTS stats_state (
+		Id INTEGER PRIMARY KEY CHECK (Id=1), Stale INTEGER NOT NULL
+		)""")
+	cursor.execute("INSERT OR IGNORE INTO stats_state (Id, Stale) VALUES (1, 1)")
+
+	for table in ["taxonomy", "traits", "ids"]:
+		for event in ["INSERT", "UPDATE", "DELETE"]:
+			statisticsTrigger(cursor,table,event)
+
+
+# columns of the tables the statistics are calculated from, if not all of them, edits of other columns leave the statistics as they are
+STATISTICS_COLUMNS = {
+	"ids": ["IDX", "AccessionNumber"]
+}
+
+
+# function for creating the trigger marking the statistics as outdated after an edit of a table
+def statisticsTrigger(cursor,table: str,event: str):
+	columns=STATISTICS_COLUMNS.get(table)
+	if event=="UPDATE" and columns is not None:
+		event=f"UPDATE OF {', '.join(columns)}"
+	cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS stats_{table}_{event.split()[0].lower()} AFTER {event} ON {table} BEGIN
+		UPDATE stats_state SET Stale=1 WHERE Stale=0;
+		END""")
+
+
+def gbifMatches(cursor):
+	"""
+	Create the table holding the GBIF backbone match of every scientific name, filled by gbifKeys.resolveUsageKeys.
+	"""
+	cursor.execute("""CREATE TABLE IF NOT EXISTS gbif_matches (
+		ScientificName TEXT PRIMARY KEY, usageKey INTEGER, AcceptedUsageKey INTEGER, AcceptedName TEXT,
+		MatchType TEXT, Confidence INTEGER, Status TEXT, Backbone TEXT NOT NULL, ResolvedAt REAL NOT NULL
+		) WITHOUT ROWID""")
+
+
+# columns feeding the autocomplete suggestions of each input mode
+SUGGESTION_COLUMNS = {
+	"Accession Number": [("ids", "AccessionNumber")],
+	"Genome Index": [("ids", "IDX")],
+	"Scientific Name": [("taxonomy", "ScientificName")],
+	"Taxon Group": [("taxonomy", rank) for rank in RANK_COLUMNS],
+	"Free Text": [("taxonomy", "ScientificName"), ("taxonomy", "Vernacular_Eng"), ("taxonomy", "Vernacular_Ger")]
+}
+
+
+# function for writing the log statements of a row to the suggestion log
+def suggestionLogStatements(table: str,row: str,change: int):
+	statements=[]
+	for mode, columns in SUGGESTION_COLUMNS.items():
+		for column_table, column in columns:
+			if column_table==table:
+				statements.append(f"""INSERT INTO suggestion_log (Mode, Word, Change) SELECT '{mode}', CAST({row}.{column} AS TEXT), {change}
+					WHERE {row}.{column} IS NOT NULL AND {row}.{column}!='';""")
+	return "\n".join(statements)
+
+
+def suggestionLog(cursor):
+	"""
+	Create the log of added and removed autocomplete words, written by triggers on every edit of the tables.
+	The suggestion service applies the log to its indexes instead of rebuilding them.
+	"""
+	cursor.execute("""CREATE TABLE IF NOT EXISTS suggestion_log (
+		Id INTEGER PRIMARY KEY AUTOINCREMENT, Mode TEXT NOT NULL, Word TEXT NOT NULL, Change INTEGER NOT NULL
+		)""")
+
+	for table in ["taxonomy", "ids"]:
+		columns=sorted({column for columns in SUGGESTION_COLUMNS.values() for column_table, column in columns if column_table==table})
+		cursor.execute(f"CREATE TRIGGER IF NOT EXISTS suggestion_{table}_insert AFTER INSERT ON {table} BEGIN\n{suggestionLogStatements(table,'new',1)}\nEND")
+		cursor.execute(f"CREATE TRIGGER IF NOT EXISTS suggestion_{table}_delete AFTER DELETE ON {table} BEGIN\n{suggestionLogStatements(table,'old',-1)}\nEND")
+		cursor.execute(f"""CREATE TRIGGER IF NOT EXISTS suggestion_{table}_update AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN
+			{suggestionLogStatements(table,'old',-1)}
+			{suggestionLogStatements(table,'new',1)}
+			END""")
+
+
+# text columns looked up without regard to case
+NOCASE_INDEXES = {
+	"ids": ["AccessionNumber"],
+	"taxonomy": ["ScientificName"],
+	"taxon_closure": ["Name", "Rank"],
+	"taxon_nodes": ["Name"]
+}
+
+
+def caseInsensitiveIndexes(cursor):
+	"""
+	Create indexes comparing names without regard to case, so lookups with COLLATE NOCASE don't scan the tables.
+	"""
+	for table, columns in NOCASE_INDEXES.items():
+		column_defs=", ".join(f'"{col}" COLLATE NOCASE' for col in columns)
+		cursor.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_{columns[0]}_nocase" ON "{table}" ({column_defs})')
+
+
+def statisticsTotals(cursor):
+	"""
+	Create the summary table for the totals of the library statistics and stop marking the statistics as outdated
+	when only the usageKeys of the ids table change, as the GBIF key resolution writes them in the background.
+	"""
+	cursor.execute("""CREATE TABLE IF NOT EXISTS stats_totals (
+		Id INTEGER PRIMARY KEY CHECK (Id=1), Entries INTEGER NOT NULL, Species INTEGER NOT NULL, Accessions INTEGER NOT NULL
+		)""")
+	cursor.execute("DROP TRIGGER IF EXISTS stats_ids_update")
+	statisticsTrigger(cursor,"ids","UPDATE")
+	# the totals are calculated with the next refresh
+	cursor.execute("UPDATE stats_state SET Stale=1 WHERE Id=1")
+
+
+# list of all migration steps, the position in the list is the schema version after the step
+MIGRATIONS = [
+	typedSchema,
+	fullTextIndex,
+	taxonClosure,
+	statisticsTables,
+	gbifMatches,
+	suggestionLog,
+	caseInsensitiveIndexes,
+	statisticsTotals
+]
+
+
+def migrateDatabase(db_file=DB_FILE):
+	"""
+	Run all migration steps the database has not seen yet. Returns the schema version of the database.
+	"""
+	db_conn=sqlite3.connect(db_file,isolation_level=None)
+	db_conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT}")
+	cursor=db_conn.cursor()
+
+	try:
+		version=cursor.execute("PRAGMA user_version").fetchone()[0]
+		for step_version, step in enumerate(MIGRATIONS, start=1):
+			if step_version<=version:
+				continue
+
+			# run every step in its own transaction, so a failed step leaves the database untouched
+			cursor.execute("BEGIN IMMEDIATE")
+			try:
+				step(cursor)
+				cursor.execute(f"PRAGMA user_version={step_version}")
+				cursor.execute("COMMIT")
+			except sqlite3.Error as error:
+				cursor.execute("ROLLBACK")
+				print(f"Database migration to version {step_version} failed: {error}")
+				break
+			version=step_version
+	finally:
+		db_conn.close()
+
+	return version
+
+
+if __name__=='__main__':
+	print(migrateDatabase())
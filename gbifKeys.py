@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 14:12:36 2026
+
+@author: Ronja Rösner
+
+This module matches the scientific names of the core library against the GBIF backbone ahead of time.
+The matches are stored in the gbif_matches table and their usageKeys in the ids table, so searches
+and occurrence maps don't need a name-matching request to GBIF.
+"""
+
+import json, sqlite3, threading, time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import settings
+from httpClient import client
+from responseCache import cache
+from dbConnection import library
+from rateLimiter import requestPriority, BATCH
+import queryLayer
+
+# number of names matched at the same time
+MATCH_WORKERS = 4
+
+
+def matchName(sci_name: str):
+	"""
+	Match a scientific name against the GBIF backbone, using the response cache. Returns the match as a dictionary.
+	"""
+	# function for loading the match from GBIF, used as loader of the response cache
+	def load(entry):
+		response=client.get(settings["GBIF_API_URL"]+"species/match",params={"name": sci_name})
+		response.raise_for_status()
+		return response.json(), None, None
+
+	return cache.fetch("GBIF",sci_name,load)
+
+
+# function for writing matches to the core database in one transaction
+def storeMatches(matches: list):
+	db_conn=library.getConnection(readonly=False)
+	now=time.time()
+	with db_conn:
+		for sci_name, backbone in matches:
+			# synonyms point to their accepted name, accepted names to themselves
+			accepted_key=backbone.get("acceptedUsageKey",backbone.get("usageKey"))
+			accepted_name=backbone.get("species") if backbone.get("synonym") else backbone.get("canonicalName")
+			db_conn.execute(
+				"""INSERT OR REPLACE INTO gbif_matches
+				(ScientificName, usageKey, AcceptedUsageKey, AcceptedName, MatchType, Confidence, Status, Backbone, ResolvedAt)
+				VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+				(sci_name, backbone.get("usageKey"), accepted_key, accepted_name, backbone.get("matchType"),
+					backbone.get("confidence"), backbone.get("status"), json.dumps(backbone,ensure_ascii=False), now)
+				)
+			if backbone.get("usageKey") is None:
+				continue
+			# the curated keys of the library are only replaced by exact species matches, fuzzy or higher rank matches
+			# only fill in missing keys and are otherwise just kept in gbif_matches
+			exact=backbone.get("matchType")=="EXACT" and backbone.get("rank")=="SPECIES"
+			db_conn.execute(
+				"""UPDATE ids SET usageKey=? WHERE IDX IN (SELECT IDX FROM taxonomy WHERE ScientificName=?)
+				AND usageKey IS NOT ? AND (? OR usageKey IS NULL)""",
+				(backbone["usageKey"], sci_name, backbone["usageKey"], exact)
+				)
+
+
+def resolveUsageKeys(resolve_all: bool=False,workers: int=MATCH_WORKERS,progress=None):
+	"""
+	Match the scientific names of the core library against the GBIF backbone and store the results.
+	Only names without a stored match are matched, unless resolve_all is set. Names that fail are left for the next run.
+	progress is called with (number done, number of names) after every name, if it is given. Returns the number of stored matches.
+	All matches are written in one transaction at the end, so the database (and an in-memory snapshot of it) only changes once.
+	"""
+	statement="all_names" if resolve_all else "unmatched_names"
+	names=[row[0] for row in queryLayer.fetchAll(statement)]
+
+	# function for matching a name without letting a failure stop the others, searches from the interface go first
+	def tryMatch(sci_name):
+		try:
+			with requestPriority(BATCH):
+				return sci_name, matchName(sci_name)
+		except Exception:
+			return sci_name, None
+
+	matches=[]
+	with ThreadPoolExecutor(max_workers=max(1,workers),thread_name_prefix="gbif_match") as executor:
+		for done, (sci_name, backbone) in enumerate(executor.map(tryMatch,names),start=1):
+			if backbone is not None:
+				matches.append((sci_name, backbone))
+			if progress is not None:
+				progress(done,len(names))
+	if matches!=[]:
+		storeMatches(matches)
+
+	return len(matches)
+
+
+def startResolution(workers: int=MATCH_WORKERS):
+	"""
+	Match all names without a stored match in a background thread. Returns the thread, or None if every name has a match.
+	"""
+	if queryLayer.fetchOne("unmatched_name_exists") is None:
+		return None
+
+	def run():
+		try:
+			resolveUsageKeys(workers=workers)
+		except sqlite3.OperationalError:
+			# the library may be read-only, names are matched on request then
+			pass
+
+	thread=threading.Thread(target=run,name="gbif_resolution",daemon=True)
+	thread.start()
+	return thread
+
+
+if __name__=='__main__':
+	print(resolveUsageKeys(progress=lambda done, total: print(f"{done}/{total}",end="\r")))
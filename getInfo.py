@@ -13,156 +13,360 @@ This module extracts data from multiple sources:
 """
 
 # import libraries
-import os, requests, sqlite3
-from setup import DB_FILE
+import base64, codecs, io, json, os, re, requests, time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from dataclasses import dataclass
+from dbConnection import library
+from config import settings
+from httpClient import client, requestDeadline
+from connectivity import monitor
+from responseCache import cache, mirror, OfflineError, NOT_MODIFIED
+from gbifKeys import matchName
+import queryLayer
+from queryLayer import BULK_SELECTIONS
+
+# names of the habitat columns in the traits table, in the order they are queried
+HABITAT_NAMES = ["marine", "brackish", "freshwater", "terrestrial"]
+
+# number of identifiers resolved with one query by SearchDatabase.lookup_many
+CHUNK_SIZE = 500
+
+# number of species shown per page of full-text results
+FREE_TEXT_PAGE_SIZE = 25
+
+# number of accession numbers sent with one bulk request to NCBI, and number of reports per page of the answer
+NCBI_CHUNK_SIZE = 1000
+NCBI_PAGE_SIZE = 1000
+
+# number of Wikipedia pages asked for in one request, the API returns at most 20 introductions at once
+WIKIPEDIA_BATCH_SIZE = 20
+
+# languages of the Wikipedia summaries, the vernaculars of the library are english and german
+WIKIPEDIA_LANGUAGES = ["en", "de"]
+
+# number of reports per page when reading the reports of a taxon, small pages keep memory use flat for large clades
+NCBI_TAXON_PAGE_SIZE = 100
+# number of bytes read from the network at once while the reports of a page are parsed
+NCBI_STREAM_CHUNK = 64*1024
+
+
+# decoder for reading one json value at a time
+json_decoder=json.JSONDecoder()
+
+
+def iterJsonItems(chunks, field: str, payload: dict):
+	"""
+	Read a json object from text chunks while they arrive and yield the items of the list in one of its fields one by one.
+	The other fields of the object are stored in payload. Only the text of the value being read is kept.
+	"""
+	chunks=iter(chunks)
+	buffer=""
+	position=0
+
+	# function for reading more text, dropping the text that was read already
+	def readMore():
+		nonlocal buffer, position
+		chunk=next(chunks,None)
+		if chunk is None:
+			raise ValueError("Incomplete json answer")
+		buffer=buffer[position:]+chunk
+		position=0
+
+	# function for getting the next character that is not whitespace, without reading past it
+	def nextChar():
+		nonlocal position
+		while True:
+			while position<len(buffer) and buffer[position].isspace():
+				position+=1
+			if position<len(buffer):
+				return buffer[position]
+			readMore()
+
+	# function for reading the next value, which is only complete if some text follows it
+	def nextValue():
+		nonlocal position
+		nextChar()
+		while True:
+			try:
+				value,end=json_decoder.raw_decode(buffer,position)
+				if end<len(buffer):
+					position=end
+					return value
+			except json.JSONDecodeError:
+				pass
+			readMore()
+
+	if nextChar()!="{":
+		raise ValueError("Json answer is not an object")
+	position+=1
+	while True:
+		char=nextChar()
+		if char=="}":
+			return
+		if char==",":
+			position+=1
+			continue
+		key=nextValue()
+		if nextChar()!=":":
+			raise ValueError("Json answer is not an object")
+		position+=1
+		if key==field and nextChar()=="[":
+			position+=1
+			while True:
+				char=nextChar()
+				if char=="]":
+					position+=1
+					break
+				if char==",":
+					position+=1
+					continue
+				yield nextValue()
+		else:
+			payload[key]=nextValue()
+
+
+def freeTextQuery(text: str):
+	"""
+	Turn user input into an FTS5 query, matching every word as a prefix. Returns an empty string if there are no words.
+	"""
+	words=re.findall(r"\w+", text)
+	return " ".join('"'+word.replace('"','""')+'"*' for word in words)
+
+# record holding everything the core library knows about a species
+@dataclass(slots=True, frozen=True)
+class SpeciesRecord:
+	sci_name: str
+	authority: str
+	vernacular_eng: str
+	vernacular_ger: str
+	accessions: list
+	taxpath: str
+	habitats: str
+	indices: list
+
+
+def makeRecord(row):
+	"""
+	Convert a result row of a species statement from the query layer into a SpeciesRecord.
+	"""
+	sci_name, authority, vernacular_eng, vernacular_ger = row[0:4]
+	# convert the taxonomic path into a string
+	taxpath=" > ".join(rank for rank in row[4:10] if rank is not None)
+	# convert the habitat flags into a string
+	habitats=", ".join(name for name, flag in zip(HABITAT_NAMES, row[10:14]) if flag == 1)
+
+	return SpeciesRecord(
+		sci_name, authority, vernacular_eng, vernacular_ger,
+		json.loads(row[15]), taxpath, habitats, json.loads(row[14])
+		)
 
 # class for searching the core database
 class SearchDatabase:
 
 	def __init__(self,query: str,selection: str):
-		# establishes connection to the database
-		db_conn=sqlite3.connect(DB_FILE)
-		# creates new cursor object to interact with the database
-		self.cursor=db_conn.cursor()
+		# gets a cursor on the shared read-only connection of this thread
+		self.cursor=library.cursor()
 
-		self.user_query=query.capitalize() if selection!="Accession Number" else query
+		# the lookups ignore case, so the query is used as it was typed
+		self.user_query=query
 		self.selection=selection
-		
-		self.selection_map = {
-			"Accession Number": ("ids", ["AccessionNumber"]),
-			"Genome Index": ("ids", ["IDX"]),
-			"Scientific Name": ("taxonomy", ["ScientificName"]),
-			"Taxon Group": ("taxonomy", ["Kingdom", "Phylum", "Class", "taxOrder", "Genus"])
-		}
+
+	# function for getting the spelling of the query used in the database
+	def getSpelling(self):
+		"""
+		Get the user query as it is spelled in the database. Returns a string, or None if the query is not available in the database.
+		"""
+		if self.selection not in queryLayer.SELECTION_COLUMNS or self.selection=="Genome Index":
+			return None
+		row=queryLayer.fetchOne(f"spelling:{self.selection}", (self.user_query,), self.cursor)
+		return row[0] if row is not None else None
 
 	# function for checking whether the query is available in the database or not
 	def inDatabase(self):
 		"""
 		Check if the user query is available in the database. Returns a boolean.
 		"""
-		if self.selection in self.selection_map:
-			# get the reference table and columns for the user selection
-			table, columns = self.selection_map[self.selection]
-			# create a string containing all relevant column names for the SQL query
-			all_columns = " OR ".join(f"{col}=?" for col in columns)
-			# set the SQL query
-			db_query = f"SELECT * FROM {table} WHERE {all_columns}"
-			# execute the SQL query with the user query as input
-			self.cursor.execute(db_query, (self.user_query,) * len(columns))
-
-		if self.cursor.fetchone():
-			return True
-		else:
+		if self.selection not in queryLayer.SELECTION_COLUMNS:
 			return False
+		return queryLayer.fetchOne(f"exists:{self.selection}", (self.user_query,), self.cursor) is not None
 
 	def getIDX(self):
 		"""
 		Get the indices for the user query in the database. Returns a list of integers.
 		"""
-		if self.inDatabase():
-			table, columns = self.selection_map[self.selection]
-			all_columns = " OR ".join(f"{col}=?" for col in columns)
-			db_query = f"SELECT IDX FROM {table} WHERE {all_columns}"
-			self.cursor.execute(db_query, (self.user_query,) * len(columns))
+		if self.selection not in queryLayer.SELECTION_COLUMNS:
+			return None
 
-			# get the indices from the database and convert them into a simple list
-			idx_list=self.cursor.fetchall()
-			idx_list=[idx[0] for idx in idx_list]
+		# get the indices from the database and convert them into a simple list
+		idx_list=[idx[0] for idx in queryLayer.fetchAll(f"indices:{self.selection}", (self.user_query,), self.cursor)]
 
-			return idx_list
-		else:
-			return None
+		return idx_list if idx_list!=[] else None
 
 	def getSpeciesInfo(self):
 		"""
-		Get Information on the selected species from the database.
+		Get Information on the selected species from the database with a single query.
 
 		Returns:
-		- a tuple of strings containing general information (ScientificName, Authority, Vernacular_Eng, Vernacular_Ger)
-		- a list of strings containing all available accession numbers
-		- a string containing the taxonomic path
-		- a string containing information on the habitats
-		- a list of integers containing the indices
-		"""
-
-		idx_list=self.getIDX()
-
-		# database accession for getting basic species information
-		db_query_a = f"SELECT ScientificName, Authority, Vernacular_Eng, Vernacular_Ger FROM taxonomy WHERE IDX=?"
-		self.cursor.execute(db_query_a, (idx_list[0],))
-		general_info=self.cursor.fetchone()
-
-		# database accession for getting the accession numbers
-		idx_str = " OR ".join(f"IDX={idx}" for idx in idx_list)
-		db_query_b = f"SELECT AccessionNumber FROM ids WHERE {idx_str}"
-		self.cursor.execute(db_query_b)
-		info_b=self.cursor.fetchall()
-		acc_list=[acc[0] for acc in info_b]
-
-		# database accession for getting the taxonomic path
-		db_query_c = f"SELECT Kingdom, Phylum, Class, 'Order', Family, Genus FROM taxonomy WHERE IDX=?"
-		self.cursor.execute(db_query_c, (idx_list[0],))
-		info_c=self.cursor.fetchone()
-		# convert the taxonomic path into a string
-		taxpath_str=" > ".join(info_c)
-
-		# database accession for getting the habitat information
-		db_query_d="SELECT isMarine, isBrackish, isFresh, isTerrestrial FROM traits WHERE IDX = ?"
-		self.cursor.execute(db_query_d, (idx_list[0],))
-		habitat_boolean=self.cursor.fetchone()
-		habitat_names = ["marine", "brackish", "freshwater", "terrestrial"]
-		habitat_list = [habitat_names[i] for i in range(len(habitat_boolean)) if habitat_boolean[i] == 1]
-		if habitat_list!=[]:
-			habitat_str=', '.join(map(str,habitat_list))
+		- a SpeciesRecord containing general information, accession numbers, taxonomic path, habitats and indices
+		- None if the query is not available in the database
+		"""
+		if self.selection=="Free Text":
+			# resolve the best full-text match
+			params=(freeTextQuery(self.user_query),)
+			if params[0]=="":
+				return None
+		elif self.selection in queryLayer.SELECTION_COLUMNS:
+			params=(self.user_query,)
 		else:
-			habitat_str=""
+			return None
+
+		row=queryLayer.fetchOne(f"species:{self.selection}", params, self.cursor)
+		if row is None:
+			return None
+		return makeRecord(row)
+
+	@staticmethod
+	def lookup_many(identifiers, selection: str, chunk_size: int=CHUNK_SIZE, misses: list=None):
+		"""
+		Resolve many identifiers of the same kind with one query per chunk.
+		Yields (identifier, SpeciesRecord) tuples in input order. Identifiers that are not in the database
+		are skipped and appended to the misses list, if one is given.
+		"""
+		if selection not in BULK_SELECTIONS:
+			raise ValueError(f"Bulk lookups are not available for {selection.lower()}")
+		cursor=library.cursor()
+
+		# function for turning an identifier into the value stored in the database
+		def normalize(identifier):
+			identifier=str(identifier).strip()
+			if selection=="Genome Index":
+				return int(identifier) if identifier.isdigit() else identifier
+			return identifier
+
+		# names are matched without regard to case, so they are paired with the results in lower case
+		def caseKey(key):
+			return key.lower() if isinstance(key,str) else key
+
+		def resolveChunk(chunk):
+			# empty identifiers would match the entries without accession number, they are misses
+			keys=list(dict.fromkeys(key for _, key in chunk if key!=""))
+			records={}
+			for size, padded in queryLayer.chunkBucket(keys):
+				for row in queryLayer.fetchAll(f"bulk_species:{selection}:{size}", padded, cursor):
+					records[caseKey(row[0])]=makeRecord(row[1:])
+
+			for identifier, key in chunk:
+				if caseKey(key) in records:
+					yield identifier, records[caseKey(key)]
+				elif misses is not None:
+					misses.append(identifier)
+
+		chunk=[]
+		for identifier in identifiers:
+			chunk.append((identifier, normalize(identifier)))
+			if len(chunk)>=chunk_size:
+				yield from resolveChunk(chunk)
+				chunk=[]
+		if chunk!=[]:
+			yield from resolveChunk(chunk)
+
+	def getFreeTextResults(self, page: int=0, page_size: int=FREE_TEXT_PAGE_SIZE):
+		"""
+		Search names, vernaculars, authorities and ranks with the full-text index.
+
+		Returns:
+		- a list of (ScientificName, Vernacular_Eng, Vernacular_Ger) tuples for one page, best matches first
+		- the total number of matching species
+		- a boolean, True if more pages follow this one
+		"""
+		fts_query=freeTextQuery(self.user_query)
+		if fts_query=="":
+			return [], 0, False
 
-		return general_info, acc_list, taxpath_str, habitat_str, idx_list
+		results=[row[:3] for row in queryLayer.fetchAll("free_text", (fts_query, page_size, page*page_size), self.cursor)]
+		total=queryLayer.fetchOne("free_text_count", (fts_query,), self.cursor)[0]
+
+		return results, total, page*page_size+len(results)<total
 
 	def getTaxgroupInfo(self):
 		"""
-		Get all species belonging to the selected taxon group from the database.
+		Get all species belonging to the selected taxon group from the closure table.
 
 		Returns:
 		- a list of strings containing all scientific names
-		- a string containing the name of the taxon group
+		- a string containing the name of the rank of the taxon group
 		"""
+		results=queryLayer.fetchAll("taxgroup_members", (self.user_query, self.user_query), self.cursor)
 
-		if self.inDatabase():
-			table, columns = self.selection_map[self.selection]
-			all_columns = " OR ".join(f"{col}=?" for col in columns)
-			db_query = f"SELECT ScientificName, {', '.join(columns)} FROM {table} WHERE {all_columns}"
-			self.cursor.execute(db_query, (self.user_query,) * len(columns))
+		if results==[]:
+			return [], ""
+		sci_names=[name for name, _ in results]
+		return sci_names, results[0][1]
 
-			results=self.cursor.fetchall()
-			sci_names=[name[0] for name in results]
+	def getTaxgroupCount(self):
+		"""
+		Get the number of entries belonging to the selected taxon group without listing them. Returns an integer.
+		"""
+		row=queryLayer.fetchOne("taxgroup_count", (self.user_query,), self.cursor)
+		return row[0] if row else 0
 
-			matched_column = ""
-			for col in columns:
-				if any(result[columns.index(col) + 1] == self.user_query for result in results):
-					matched_column = col
-					break
+	def getAccessions(self):
+		"""
+		Get all accession numbers of the selected species or taxon group. Returns a list of strings.
+		"""
+		if self.selection=="Taxon Group":
+			return [row[0] for row in queryLayer.fetchAll("taxgroup_accessions", (self.user_query, self.user_query), self.cursor)]
 
-			return sci_names, matched_column
-		else:
-			return [], ""
+		record=self.getSpeciesInfo()
+		return record.accessions if record is not None else []
+
+	@staticmethod
+	def getAllAccessions():
+		"""
+		Get every accession number in the core library. Returns a list of strings.
+		"""
+		return [row[0] for row in queryLayer.fetchAll("all_accessions")]
+
+
+def canonicalQuery(query: str,selection: str):
+	"""
+	Spell the query the way the library does, so remote sources and the response cache see one spelling however it was typed.
+	Queries missing from the library get the usual spelling of their selection (capitalised names, upper case accession numbers).
+	Returns a string.
+	"""
+	query=str(query).strip()
+	spelling=SearchDatabase(query,selection).getSpelling()
+	if spelling is not None:
+		return str(spelling)
+	if selection in ("Scientific Name", "Taxon Group"):
+		return query.capitalize()
+	if selection=="Accession Number":
+		return query.upper()
+	return query
 
 
 # class for searching the GBIF (Global Biodiversity Information Facility, https://gbif.org) Database
 class SearchGBIF:
 	def __init__(self,query: str,selection: str):
-		from pygbif import species as sp
-		
-		library=SearchDatabase(query,selection)
-		if library.inDatabase():
-			self.sciName=library.getSpeciesInfo()[0][0]
+		query=canonicalQuery(query,selection)
+		record=SearchDatabase(query,selection).getSpeciesInfo()
+		if record is not None:
+			self.sciName=record.sci_name
 		else:
 			self.sciName=query
 		
-		self.backbone=sp.name_backbone(self.sciName)
+		# use the match stored by gbifKeys, the backbone is only asked for names without one
+		stored_backbone,self.usageKey=queryLayer.fetchOne("gbif_key", (self.sciName,))
+		self._backbone=json.loads(stored_backbone) if stored_backbone is not None else None
 		#self.lookup=sp.name_lookup(sciName,limit=1)
 		#self.lookup_results=self.lookup['results'][0]
 
+	@property
+	def backbone(self):
+		if self._backbone is None:
+			self._backbone=matchName(self.sciName)
+		return self._backbone
+
 	# function for retrieving the taxonomic path from GBIF
 	def getTaxpath(self):
 		lkingdom,lphylum,lclass,lorder,lfamily,lgenus="","","","","",""
@@ -204,51 +408,229 @@ class SearchGBIF:
 			]
 		return ''.join(out_list)
 
+	@staticmethod
+	def mapKey(taxkey: int,source="density",bin="hex",style="purpleYellow-noborder.poly",year=None):
+		"""
+		Get the key an occurrence map is cached under.
+		"""
+		return f"map/{taxkey}/{source}/{bin}/{style}/{year}"
+
+	@staticmethod
+	def loadMapTile(taxkey: int,source="density",bin="hex",style="purpleYellow-noborder.poly",year=None):
+		"""
+		Get the occurrence map of a usageKey through the response cache. Returns the png as base64 string.
+		"""
+		# function for loading the png, the cache only stores text so it is encoded
+		def load(entry):
+			map_params={"taxonKey": taxkey, "style": style, "bin": bin, "hexPerTile": 200, "srs": "EPSG:3857"}
+			if year is not None:
+				map_params["year"]=year
+			# the whole world fits into the single tile at zoom level 0
+			response=client.get(settings["GBIF_MAP_URL"]+source+"/0/0/0@1x.png",params=map_params)
+			response.raise_for_status()
+			return base64.b64encode(response.content).decode("ascii"), None, None
+
+		return cache.fetch("GBIF",SearchGBIF.mapKey(taxkey,source,bin,style,year),load)
+
 	# function for generating a map png from the GBIF database
 	def makeMap(self,source="density",bin="hex",style="purpleYellow-noborder.poly",year=None):
-		from pygbif import maps
-		if 'usageKey' in self.backbone:
-			taxkey=self.backbone['usageKey']
-			outmap=maps.map(taxonKey=taxkey,source=source,style=style,bin=bin,year=year, hexPerTile="200",format="@1x.png",srs="EPSG:3857",x=0,y=0)
-			map_path=outmap.path
-			return map_path
-		else:
-			return ""
+		"""
+		Get the occurrence map of the taxon. Returns the png as an in-memory file, or None if there is no map.
+		"""
+		try:
+			# the stored usageKey saves the name-matching request
+			if self.usageKey is None and 'usageKey' in self.backbone:
+				self.usageKey=self.backbone['usageKey']
+			if self.usageKey is None:
+				return None
+			map_png=self.loadMapTile(self.usageKey,source,bin,style,year)
+		except OfflineError:
+			# neither GBIF nor the offline mirror know this map
+			return None
+		
+		# the map is kept in memory, so redrawing it leaves no files behind
+		return io.BytesIO(base64.b64decode(map_png))
 
 # class for getting information from the NCBI database
 class SearchNCBI:
 	
 	def __init__(self,user_input,selection):
-		self.API_URL = "https://api.ncbi.nlm.nih.gov/datasets/v2/"
+		self.API_URL = settings["NCBI_API_URL"]
 		self.url_seg_accession = "genome/accession/"
 		self.url_seg_taxon = "genome/taxon/"
 
 		self.selection=selection
 
-		self.library=SearchDatabase(user_input,selection)
+		user_input=canonicalQuery(user_input,selection)
+		self.record=SearchDatabase(user_input,selection).getSpeciesInfo()
 		# set the input to the first available accession number if the taxon is in the database
-		if self.library.inDatabase():
-			self.input=self.library.getSpeciesInfo()[1][0]
+		if self.record is not None:
+			self.input=self.record.accessions[0]
 		# set the input to the query if the taxon is not in the database
 		else:
 			self.input=user_input
 	
 	def getGenomeData(self):
-		if self.library.inDatabase():
-			dataset_response = requests.get(self.API_URL+self.url_seg_accession+self.input+"/dataset_report")
+		if self.record is not None:
+			url_path=self.url_seg_accession+self.input+"/dataset_report"
+			params={}
 		else:
-			dataset_response = requests.get(self.API_URL+self.url_seg_taxon+self.input+"/dataset_report")
+			# only the first report of a taxon is shown, so no more are requested however large the taxon is
+			url_path=self.url_seg_taxon+self.input+"/dataset_report"
+			params={"page_size": 1}
+		
+		# function for loading the report, asking the server whether an expired cached report is still valid
+		def load(entry):
+			headers={}
+			if entry is not None and entry.etag:
+				headers["If-None-Match"]=entry.etag
+			if entry is not None and entry.last_modified:
+				headers["If-Modified-Since"]=entry.last_modified
+			
+			dataset_response = client.get(self.API_URL+url_path,params=params,headers=headers)
+			if dataset_response.status_code==304:
+				return NOT_MODIFIED
+			# error answers are never cached, unknown accessions and taxa are reported by ncbiText
+			dataset_response.raise_for_status()
+			return dataset_response.json(), dataset_response.headers.get("ETag"), dataset_response.headers.get("Last-Modified")
 		
-		dataset_json = dataset_response.json()
+		cache_key=url_path if params=={} else f"{url_path}?page_size={params['page_size']}"
+		dataset_json = cache.fetch("NCBI",cache_key,load)
 		return dataset_json
 	
+	@staticmethod
+	def iterTaxonReports(taxon: str, limit: int=None, page_size: int=NCBI_TAXON_PAGE_SIZE, info: dict=None):
+		"""
+		Get the dataset reports of the assemblies of a taxon one by one, stopping after limit reports if it is given.
+		The pages are read through the response cache, following next_page_token, and every report is yielded as soon as
+		it was read from the network. No more pages are requested once the caller stops.
+		The other fields of the pages, like total_count, are stored in info, if it is given.
+		"""
+		if limit is not None:
+			page_size=min(page_size,limit)
+		info=info if info is not None else {}
+		url_path="genome/taxon/"+taxon+"/dataset_report"
+		page_token=None
+		count=0
+		
+		while True:
+			params={"page_size": page_size}
+			if page_token is not None:
+				params["page_token"]=page_token
+			
+			# function for reading the reports of a page while it arrives, used as loader of the response cache
+			def load(payload,params=params):
+				response=client.get(settings["NCBI_API_URL"]+url_path,params=params,stream=True)
+				try:
+					response.raise_for_status()
+					decoder=codecs.getincrementaldecoder("utf-8")()
+					yield from iterJsonItems((decoder.decode(chunk) for chunk in response.iter_content(NCBI_STREAM_CHUNK)),"reports",payload)
+				finally:
+					response.close()
+			
+			cache_key=url_path+"?"+"&".join(f"{name}={value}" for name, value in params.items())
+			page=cache.fetchStream("NCBI",cache_key,load,"reports")
+			while True:
+				try:
+					report=next(page)
+				except StopIteration as done:
+					info.update(done.value)
+					break
+				yield report
+				count+=1
+				if limit is not None and count>=limit:
+					page.close()
+					return
+			
+			page_token=info.pop("next_page_token",None)
+			if not page_token:
+				break
+	
+	@staticmethod
+	def getTaxonSummary(taxon: str, progress=None, page_size: int=NCBI_TAXON_PAGE_SIZE):
+		"""
+		Count the assemblies of a taxon while its reports are read.
+		progress is called with the running summary after every report, if it is given.
+		
+		Returns a dictionary containing:
+		- total: number of assemblies according to NCBI
+		- assemblies: number of assemblies read
+		- organisms: number of different organisms
+		- levels: number of assemblies per assembly level
+		- sources: number of assemblies per source database
+		"""
+		summary={"taxon": taxon, "total": 0, "assemblies": 0, "organisms": 0, "levels": {}, "sources": {}}
+		tax_ids=set()
+		info={}
+		
+		for report in SearchNCBI.iterTaxonReports(taxon,page_size=page_size,info=info):
+			summary["assemblies"]+=1
+			level=report.get("assembly_info",{}).get("assembly_level","unknown")
+			summary["levels"][level]=summary["levels"].get(level,0)+1
+			source=report.get("source_database","unknown")
+			summary["sources"][source]=summary["sources"].get(source,0)+1
+			tax_ids.add(report.get("organism",{}).get("tax_id"))
+			summary["organisms"]=len(tax_ids-{None})
+			# the total is only known once the first page was read
+			summary["total"]=info.get("total_count",max(summary["total"],summary["assemblies"]))
+			if progress is not None:
+				progress(summary)
+		summary["total"]=info.get("total_count",summary["assemblies"])
+		
+		return summary
+	
+	@staticmethod
+	def getDatasetReports(accessions, chunk_size: int=NCBI_CHUNK_SIZE, page_size: int=NCBI_PAGE_SIZE, misses: list=None):
+		"""
+		Get the dataset reports of many accession numbers with one request per chunk and page.
+		Yields (accession number, report) tuples as the pages arrive. Every report is also stored in the response cache,
+		so later single lookups don't need a request. Accession numbers without a report are appended to the misses list, if one is given.
+		"""
+		accessions=list(dict.fromkeys(accessions))
+		url=settings["NCBI_API_URL"]+"genome/dataset_report"
+		
+		for start in range(0,len(accessions),chunk_size):
+			chunk=accessions[start:start+chunk_size]
+			missing=set(chunk)
+			page_token=None
+			
+			while True:
+				body={"accessions": chunk, "page_size": page_size}
+				if page_token is not None:
+					body["page_token"]=page_token
+				try:
+					response=client.post(url,json=body)
+					response.raise_for_status()
+				except requests.RequestException:
+					monitor.recordFailure("NCBI")
+					raise
+				monitor.recordSuccess("NCBI")
+				
+				dataset_json=response.json()
+				for report in dataset_json.get("reports",[]):
+					accession=report.get("accession")
+					if accession not in missing:
+						continue
+					missing.discard(accession)
+					# stored like the answer to a single accession, see getGenomeData
+					cache.put("NCBI",f"genome/accession/{accession}/dataset_report",{"reports": [report], "total_count": 1})
+					yield accession, report
+				
+				page_token=dataset_json.get("next_page_token")
+				if not page_token:
+					break
+			
+			if misses is not None:
+				misses.extend(accession for accession in chunk if accession in missing)
+	
 	def getDatasetAttributes(self):
 		dataset_json=self.getGenomeData()
+		self.total_count=dataset_json.get("total_count",0)
 		
 		try:
 			dataset_organism_info = dataset_json['reports'][0]['organism']
 			dataset_biosample_attr = dataset_json['reports'][0]['assembly_info']['biosample']['attributes']
-		except KeyError:
+		except (KeyError, IndexError):
 			dataset_organism_info = None
 			dataset_biosample_attr = None
 		return dataset_organism_info,dataset_biosample_attr
@@ -257,147 +639,347 @@ class SearchNCBI:
 class SearchWikipedia:
 	
 	def __init__(self,query: str,selection: str):
-		import wikipediaapi as wiki
-		self.wiki_en=wiki.Wikipedia('CRYtabia (ronja.roesner@uni-oldenburg.de','en')
-		
-		library=SearchDatabase(query,selection)
-		if library.inDatabase():
-			self.sciName=library.getSpeciesInfo()[0][0]
+		query=canonicalQuery(query,selection)
+		record=SearchDatabase(query,selection).getSpeciesInfo()
+		if record is not None:
+			self.sciName=record.sci_name
 		else:
 			self.sciName=query
 
 		
 	
+	@staticmethod
+	def summaryKey(title: str, language: str="en"):
+		"""
+		Get the key a summary is cached under, english summaries use the plain title.
+		"""
+		return title if language=="en" else f"{language}:{title}"
+	
+	@staticmethod
+	def requestSummaries(titles: list, language: str="en"):
+		"""
+		Ask the MediaWiki API for the introductions of up to WIKIPEDIA_BATCH_SIZE pages with a single request, following redirects.
+		Returns a dictionary of requested title and introduction, None for pages that don't exist.
+		"""
+		params={
+			"action": "query", "prop": "extracts", "exintro": 1, "explaintext": 1, "exlimit": "max",
+			"redirects": 1, "titles": "|".join(titles), "format": "json", "formatversion": 2
+			}
+		normalized, redirects, pages = {}, {}, {}
+		
+		while True:
+			response=client.get(settings["WIKIPEDIA_API_URL"].format(language=language),params=params)
+			response.raise_for_status()
+			answer=response.json()
+			query=answer.get("query",{})
+			normalized.update((item["from"], item["to"]) for item in query.get("normalized",[]))
+			redirects.update((item["from"], item["to"]) for item in query.get("redirects",[]))
+			for page in query.get("pages",[]):
+				# long answers are split, later parts only add the missing introductions
+				if "extract" in page or page["title"] not in pages:
+					pages[page["title"]]=page
+			if "continue" not in answer:
+				break
+			params.update(answer["continue"])
+		
+		summaries={}
+		for title in titles:
+			target=normalized.get(title,title)
+			page=pages.get(redirects.get(target,target),{"missing": True})
+			summaries[title]=None if page.get("missing") or page.get("invalid") else page.get("extract","").strip()
+		return summaries
+	
+	@staticmethod
+	def loadSummaries(titles, language: str="en", batch_size: int=WIKIPEDIA_BATCH_SIZE):
+		"""
+		Get the introductions of many Wikipedia pages through the response cache, asking for the missing ones in batches.
+		Returns a dictionary of title and introduction (None for pages that don't exist). Titles that are neither
+		cached nor could be loaded are left out.
+		"""
+		keys={SearchWikipedia.summaryKey(title,language): title for title in titles}
+		
+		# function for loading the missing summaries in batches, used as loader of the response cache
+		def load(missing_keys):
+			loaded={}
+			for start in range(0,len(missing_keys),batch_size):
+				batch=[keys[key] for key in missing_keys[start:start+batch_size]]
+				for title, summary in SearchWikipedia.requestSummaries(batch,language).items():
+					loaded[SearchWikipedia.summaryKey(title,language)]=summary
+			return loaded
+		
+		return {keys[key]: summary for key, summary in cache.fetchMany("Wikipedia",list(keys),load).items()}
+	
+	@staticmethod
+	def loadMultilingualSummaries(titles, languages: list=WIKIPEDIA_LANGUAGES):
+		"""
+		Get the introductions of many Wikipedia pages in several languages, all languages at the same time.
+		Returns a dictionary of language and a dictionary of title and introduction, like loadSummaries.
+		"""
+		titles=list(titles)
+		with ThreadPoolExecutor(max_workers=len(languages),thread_name_prefix="wikipedia") as executor:
+			futures={language: executor.submit(SearchWikipedia.loadSummaries,titles,language) for language in languages}
+			return {language: future.result() for language, future in futures.items()}
+	
+	@staticmethod
+	def loadSummary(title: str, language: str="en"):
+		"""
+		Get the introduction of a Wikipedia page through the response cache. Returns a string, or None if the page does not exist.
+		Raises OfflineError if Wikipedia can't be reached and the page is not cached.
+		"""
+		summaries=SearchWikipedia.loadSummaries([title],language)
+		if title not in summaries:
+			raise OfflineError("Wikipedia")
+		return summaries[title]
+	
 	def getSummary(self):
 		wiki_query=f"{self.sciName}"
-		wiki_page=self.wiki_en.page(wiki_query)
 		
-		if wiki_page.exists():
-			summary=wiki_page.summary
-		else:
+		summary=self.loadSummary(wiki_query)
+		if summary is None:
 			summary="Wikpedia page does not exist."
 		
 		return summary
 
 
-# function for preparing the search results for the text field
-def getText(selection,query,gbif_state,ncbi_state,wiki_state,table_state):
-	sciName=""
-	sciNames=[]
-	# create an object for the table search class
-	search_table=SearchDatabase(query.get(),selection.get())
+# function for changing the output sentence on vernaculars depending on which are available
+def vernacularText(engName,gerName):
+	if engName==None and gerName==None:
+		text_out="There are no vernaculars available."
+	elif engName==None and gerName!=None:
+		text_out=f"There is no english vernacular available, but the german vernacular is {gerName}."
+	elif engName!=None and gerName==None:
+		text_out=f"The english vernacular is {engName}. There is no german vernacular available."
+	else:
+		text_out=f"The english vernacular is {engName}, the german vernacular is {gerName}."
 	
-	# function for changing the output sentence on vernaculars depending on which are available
-	def vernacular_text(engName,gerName):
-		if engName==None and gerName==None:
-			text_out="There are no vernaculars available."
-		elif engName==None and gerName!=None:
-			text_out=f"There is no english vernacular available, but the german vernacular is {gerName}."
-		elif engName!=None and gerName==None:
-			text_out=f"The english vernacular is {engName}. There is no german vernacular available."
-		else:
-			text_out=f"The english vernacular is {engName}, the german vernacular is {gerName}."
+	return text_out
+
+
+# function for preparing the search results from the GBIF backbone
+def gbifText(query: str,selection: str):
+	gbif_search=SearchGBIF(query,selection)
+	gbif_results=gbif_search.getTaxpath()
+	return f"\n--- Information from GBIF backbone ---\n{gbif_results}\n"
+
+
+# function for preparing the organism and biosample report from NCBI
+def ncbiText(query: str,selection: str):
+	ncbi_search=SearchNCBI(query,selection)
+	try:
+		organism_info,biosample_attributes=ncbi_search.getDatasetAttributes()
+		ncbi_text=[]
 		
-		return text_out
-	
-	# if GBIF search is enabled and an internet connection is available, output search results
-	if gbif_state==1 and internetConnection()==True:
-		gbif_search=SearchGBIF((query.get()),selection.get())
-		gbif_results=gbif_search.getTaxpath()
-		gbif_out=f"\n--- Information from GBIF backbone ---\n{gbif_results}\n"
-	elif gbif_state==1 and internetConnection()==False:
-		gbif_out="\n!! No internet connection available, GBIF search impossible. !!\n"
-	elif gbif_state==0:
-		gbif_out=""
+		ncbi_text.append("--- NCBI Organism Report ---\n")
+		if ncbi_search.record is None and ncbi_search.total_count>1:
+			ncbi_text.append(f"Showing the first of {ncbi_search.total_count} assemblies available for {query}.\n")
+		for key, item in organism_info.items():
+			ncbi_text.append(f"{key.capitalize()}: {item}\n")
+		
+		ncbi_text.append("\n--- Available information on NCBI for this biosample ---\n")
+		for list_obj in biosample_attributes:
+			for key, item in list_obj.items():
+				if key=="name":
+					ncbi_text.append(f"{item.capitalize()}: ")
+				elif key=="value":
+					ncbi_text.append(f"{item}\n")
+		
+		return f"\n{''.join(ncbi_text)}\n"
+	except AttributeError:
+		return f"\nNo NCBI information found for biosample {query}\n"
+	except requests.HTTPError as error:
+		# NCBI answers unknown accessions and taxa with a client error
+		if error.response is not None and error.response.status_code<500 and error.response.status_code!=429:
+			return f"\nNo NCBI information found for biosample {query}\n"
+		raise
+
+
+# function for preparing the summary of the Wikipedia page
+def wikiText(query: str,selection: str):
+	wiki_search=SearchWikipedia(query,selection)
+	wiki_summary=wiki_search.getSummary()
+	return f"\n--- Information from Wikipedia page ---\n{wiki_summary}\n"
+
+
+# functions for preparing the output of each remote source
+REMOTE_SOURCES = {
+	"GBIF": gbifText,
+	"NCBI": ncbiText,
+	"Wikipedia": wikiText
+}
+
+
+def remoteText(source: str,query: str,selection: str):
+	"""
+	Get the output text of a remote source, served from the response cache if possible.
+	Returns an error message if the source can't be reached and nothing is cached.
+	"""
+	try:
+		return REMOTE_SOURCES[source](query,selection)
+	except OfflineError:
+		# the source can't be reached and there is no cached response either
+		if settings["OFFLINE_MODE"]:
+			return f"\n!! Offline mode: {query} is not in the offline mirror of {source}, run --sync first. !!\n"
+		elif monitor.retryIn(source)>0:
+			return f"\n!! {source} could not be reached repeatedly, {source} search skipped for {monitor.retryIn(source)} seconds. !!\n"
+		else:
+			return f"\n!! No internet connection available, {source} search impossible. !!\n"
+
+
+# seconds each remote source may take before its search is given up
+SOURCE_TIMEOUTS = {
+	"GBIF": 15,
+	"NCBI": 20,
+	"Wikipedia": 15
+}
+
+
+def safeRemoteText(source: str,query: str,selection: str,timeout: float=None):
+	"""
+	Get the output text of a remote source like remoteText, but turn any error into an error message.
+	With a timeout, the requests of the search are given up once it has passed, so the search never outlives it.
+	"""
+	try:
+		with requestDeadline(timeout or SOURCE_TIMEOUTS[source]):
+			return remoteText(source,query,selection)
+	except requests.Timeout:
+		return f"\n!! {source} did not answer within {timeout or SOURCE_TIMEOUTS[source]} seconds, search cancelled. !!\n"
+	except Exception as error:
+		return f"\n!! {source} search failed: {error} !!\n"
+
+# seconds waited for a source after its timeout, its requests have been given up by then
+COLLECT_GRACE = 1
+
+# shared thread pool for querying the remote sources at the same time
+source_pool=ThreadPoolExecutor(max_workers=2*len(REMOTE_SOURCES),thread_name_prefix="remote_source")
+
+
+def startRemoteTexts(sources: list,query: str,selection: str,timeouts: dict=SOURCE_TIMEOUTS):
+	"""
+	Start searching several remote sources at the same time.
+	Returns a function that waits for the results and returns a dictionary of source and output text.
+	A source that fails or runs out of time only gets an error message, it does not hold up the others.
+	The timeout of a source is the deadline of its requests, so its thread is free again when the timeout has passed.
+	"""
+	start=time.monotonic()
+	futures={source: source_pool.submit(safeRemoteText,source,query,selection,timeouts[source]) for source in sources}
+
+	def collect():
+		results={}
+		for source, future in futures.items():
+			# all sources started at the same time, so each one only gets what is left of its timeout,
+			# plus a moment for turning a timed out request into its message
+			remaining=max(0,timeouts[source]+COLLECT_GRACE-(time.monotonic()-start))
+			try:
+				results[source]=future.result(timeout=remaining)
+			except TimeoutError:
+				future.cancel()
+				results[source]=f"\n!! {source} did not answer within {timeouts[source]} seconds, search cancelled. !!\n"
+		return results
+
+	return collect
+
+
+# thread pool preparing the output of the interface, so the interface keeps responding while the sources are searched
+text_pool=ThreadPoolExecutor(max_workers=2,thread_name_prefix="search_text")
+
+
+# function for preparing the information from the core library
+def tableText(query: str,selection: str,page: int=0):
+	"""
+	Prepare the information from the core library. Returns the text and whether more pages of free text results follow.
+	"""
+	search_table=SearchDatabase(query,selection)
 	
-	# if NCBI search is enabled and an internet connection is available, output search results
-	if ncbi_state==1 and internetConnection()==True:
-		ncbi_search=SearchNCBI((query.get()),selection.get())
-		try:
-			organism_info,biosample_attributes=ncbi_search.getDatasetAttributes()
-			ncbi_text=[]
+	if selection=="Free Text":
+		results,total,has_more=search_table.getFreeTextResults(page)
+		if total>0 and results==[]:
+			return f"\nAll {total} species in table matching {query} were shown, confirm again to start over.\n", False
+		elif total>0:
+			first=page*FREE_TEXT_PAGE_SIZE
+			table_list=[f"\n{total} species in table matching {query}, showing {first+1}-{first+len(results)}:\n"]
+			for sci_name,eng_name,ger_name in results:
+				vernaculars=", ".join(name for name in (eng_name,ger_name) if name)
+				table_list.append(f"{sci_name} ({vernaculars})\n" if vernaculars else f"{sci_name}\n")
+			if has_more:
+				table_list.append("Confirm again to show the next page.\n")
+			return ''.join(table_list), has_more
+		else:
+			return f"\nNo information on free text {query} available from reference table.\n", False
+	elif selection!="Taxon Group":
+		# get all information for this species
+		record=search_table.getSpeciesInfo()
+		# run if species is available in reference table
+		if record is not None:
+			accList=record.accessions
+			indexList=record.indices
 			
-			ncbi_text.append("--- NCBI Organism Report ---\n")
-			for key, item in organism_info.items():
-				ncbi_text.append(f"{key.capitalize()}: {item}\n")
+			# combine available accession numbers into string
+			if selection=="Accession Number":
+				acc_text=""
+			elif selection=="Genome Index":
+				acc_text=f"Accession Number for this index is {accList[0]}\n\n"
+			elif selection!="Accession Number" and len(accList)==1:
+				acc_text=f"One available Accession Number, {accList[0]} with Index {indexList[0]}\n\n"
+			elif selection!="Accession Number" and len(accList)>1:
+				acc_text=f"Available Accession Number are {', '.join(accList)}\nAvailable Indices are {indexList}\n"
 			
-			ncbi_text.append("\n--- Available information on NCBI for this biosample ---\n")
-			for list_obj in biosample_attributes:
-				for key, item in list_obj.items():
-					if key=="name":
-						ncbi_text.append(f"{item.capitalize()}: ")
-					elif key=="value":
-						ncbi_text.append(f"{item}\n")
+			# get vernacular name string
+			vern_text=vernacularText(record.vernacular_eng, record.vernacular_ger)
 			
-			ncbi_out=f"\n{''.join(ncbi_text)}\n"
-		except AttributeError:
-			ncbi_out=f"\nNo NCBI information found for biosample {query.get()}\n"
-	elif ncbi_state==1 and internetConnection()==False:
-		ncbi_out="\n!! No internet connection available, NCBI search impossible. !!\n"
-	elif ncbi_state==0:
-		ncbi_out=""
-	
-	# if Wikipedia search is enabled and an internet connection is available, output page summary
-	if wiki_state==1 and internetConnection()==True:
-		wiki_search=SearchWikipedia(query.get(),selection.get())
-		wiki_summary=wiki_search.getSummary()
-		wiki_out=f"\n--- Information from Wikipedia page ---\n{wiki_summary}\n"
-	elif wiki_state==1 and internetConnection()==False:
-		wiki_out="\n!! No internet connection available, Wikipedia search impossible. !!\n"
-	elif wiki_state==0:
-		wiki_out=""
-	
-	# if table search is enabled, output information from library
-	if table_state==1:
-		if selection.get()!="Taxon Group":
-			# run if species is available in reference table
-			if search_table.inDatabase():
-				# get all information for this species
-				info_tuple,accList,taxPath,habitats,indexList=search_table.getSpeciesInfo()
-				
-				# combine available accession numbers into string
-				if selection.get()=="Accession Number":
-					acc_text=""
-				elif selection.get()=="Genome Index":
-					acc_text=f"Accession Number for this index is {accList[0]}\n\n"
-				elif selection.get()!="Accession Number" and len(accList)==1:
-					acc_text=f"One available Accession Number, {accList[0]} with Index {indexList[0]}\n\n"
-				elif selection.get()!="Accession Number" and len(accList)>1:
-					acc_text=f"Available Accession Number are {', '.join(accList)}\nAvailable Indices are {indexList}\n"
-				
-				# get vernacular name string
-				vern_text=vernacular_text(info_tuple[2], info_tuple[3])
-				
-				table_list=[
-					"\n--- Information from the core library ---\n",
-					f"\nSpecies {info_tuple[0]} {info_tuple[1]} found.\n",
-					vern_text+"\n",
-					f"\nThe Species is known to live in {habitats} habitats.\n\n",
-					f"{acc_text}"
-					"Taxonomic Path as kingdom > phylum > class > order > family > genus:\n",
-					f"{taxPath}\n",
-					]
-				table_out=''.join(table_list)
-			else:
-				table_out=f"\nNo information on {selection.get().lower()} {query.get()} available from reference table.\n"
-		elif selection.get()=="Taxon Group":
+			table_list=[
+				"\n--- Information from the core library ---\n",
+				f"\nSpecies {record.sci_name} {record.authority} found.\n",
+				vern_text+"\n",
+				f"\nThe Species is known to live in {record.habitats} habitats.\n\n",
+				f"{acc_text}"
+				"Taxonomic Path as kingdom > phylum > class > order > family > genus:\n",
+				f"{record.taxpath}\n",
+				]
+			return ''.join(table_list), False
+		else:
+			return f"\nNo information on {selection.lower()} {query} available from reference table.\n", False
+	else:
+		# get the number of species belonging to the taxon from the closure table, the members are only listed for known taxa
+		speciescount=search_table.getTaxgroupCount()
+		
+		if speciescount>0:
 			# get scientific names and name of taxon group
 			sciNames,col_title=search_table.getTaxgroupInfo()
-			# get the number of species belonging to the taxon
-			speciescount=len(sciNames)
-			
-			if speciescount>0:
-				table_out=f"\n{speciescount} species found in table belonging to {col_title.lower()} {query.get().capitalize()}:\n{', '.join(sciNames)}\n"
-			else:
-				table_out=f"\nNo information on taxon group {query.get()} available from reference table.\n"
-			
-	else:
-		table_out=""
+			return f"\n{speciescount} species found in table belonging to {col_title.lower()} {query.capitalize()}:\n{', '.join(sciNames)}\n", False
+		else:
+			return f"\nNo information on taxon group {query} available from reference table.\n", False
+
+
+# function for preparing the search results for the text field
+def getText(selection: str,query: str,gbif_state,ncbi_state,wiki_state,table_state,page: int=0):
+	"""
+	Prepare the output for the text field. Waits for the remote sources, so the interface runs it in text_pool.
+	Returns the list of text parts and whether more pages of free text results follow.
+	"""
+	
+	# set text for when no input was given
+	none_text=[
+		"\nPlease enter something.\n"
+		"\n-------------------------------------------------------------"+"\n"
+		]
+	
+	# check if an input was given before searching any source
+	if str(query)=="":
+		return none_text, False
+	
+	# start the searches of all enabled remote sources, then search the library while they run
+	states={"GBIF": gbif_state, "NCBI": ncbi_state, "Wikipedia": wiki_state}
+	collectRemoteTexts=startRemoteTexts([source for source, state in states.items() if state==1],query,selection)
 	
+	table_out,has_more=tableText(query,selection,page) if table_state==1 else ("", False)
+	
+	remote_out={source: "" for source in states}
+	remote_out.update(collectRemoteTexts())
+	gbif_out,ncbi_out,wiki_out=remote_out["GBIF"],remote_out["NCBI"],remote_out["Wikipedia"]
 	
 	# set main output text
 	main_text=[
-		f"\n=== Info for {selection.get().lower()} {query.get()} ===\n",
+		f"\n=== Info for {selection.lower()} {query} ===\n",
 		f"{table_out}",
 		f"{gbif_out}",
 		f"{wiki_out}",
@@ -405,28 +987,20 @@ def getText(selection,query,gbif_state,ncbi_state,wiki_state,table_state):
 		"\n-------------------------------------------------------------"+"\n"
 		]
 	
-	# set text for when no input was given
-	none_text=[
-		"\nPlease enter something.\n"
-		"\n-------------------------------------------------------------"+"\n"
-		]
-	
-	# check if an input was given and modifify text field accordingly
-	if str(query.get())=="":
-		return none_text
-	else:
-		return main_text
+	return main_text, has_more
 
 
 def getSciName(query,selection):
-	search_table=SearchDatabase(query.get().capitalize(),selection.get())
-	if search_table.inDatabase():
+	user_query=canonicalQuery(query.get(),selection.get())
+	search_table=SearchDatabase(user_query,selection.get())
+	record=search_table.getSpeciesInfo()
+	if record is not None:
 		if selection.get()!="Taxon Group":
-			out_str=str(search_table.getSpeciesInfo()[0][0])
+			out_str=str(record.sci_name)
 		else:
-			out_str=str(query.get())
-	elif not search_table.inDatabase() and selection.get()=="Scientific Name" or selection.get()=="Taxon Group":
-		out_str=query.get()
+			out_str=user_query
+	elif selection.get()=="Scientific Name" or selection.get()=="Taxon Group":
+		out_str=user_query
 	else:
 		out_str=""
 	
@@ -434,12 +1008,16 @@ def getSciName(query,selection):
 
 
 # function for checking if the user is connected to the internet
-def internetConnection():
-	try:
-		requests.get("https://api.gbif.org/", timeout=5)
-		return True
-	except requests.ConnectionError:
-		return False
+def internetConnection(source: str=None):
+	"""
+	Check if a remote source (or any source, if none is given) can be reached. Uses the cached state of the connectivity monitor.
+	In offline mode the offline mirror stands in for the sources.
+	"""
+	if settings["OFFLINE_MODE"]:
+		return any(mirror.hasEntries(name) for name in ([source] if source is not None else REMOTE_SOURCES))
+	if source is None:
+		return monitor.isOnline()
+	return monitor.isAvailable(source)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Oct 19 09:31:48 2026
+
+@author: Ronja Rösner
+
+This module provides the HTTP client shared by all remote sources (GBIF, NCBI, Wikipedia).
+Connections are kept open and reused, so only the first request to a host pays for the handshake.
+Rate limited (429) and failed (5xx) requests are retried with a randomized, growing delay.
+Every try waits for its turn in the rate limiter of its host.
+"""
+
+import atexit, random, threading, time
+import requests
+from contextlib import contextmanager
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlparse
+
+from config import settings
+from rateLimiter import limiter
+
+# status codes that are worth another try
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# time by which the requests of each thread have to be done
+_deadlines=threading.local()
+
+
+@contextmanager
+def requestDeadline(seconds: float):
+	"""
+	Give up the requests of the current thread that are not done within some seconds, retries included, while the context is active.
+	"""
+	previous=getattr(_deadlines,"deadline",None)
+	deadline=time.monotonic()+seconds
+	_deadlines.deadline=deadline if previous is None else min(previous,deadline)
+	try:
+		yield
+	finally:
+		_deadlines.deadline=previous
+
+
+# class for sending requests over a shared pool of keep-alive connections
+class HttpClient:
+
+	def __init__(self,retries: int=settings["HTTP_RETRIES"],backoff: float=settings["HTTP_BACKOFF"],
+			max_backoff: float=settings["HTTP_MAX_BACKOFF"],connections_per_host: int=settings["HTTP_CONNECTIONS_PER_HOST"]):
+		self.retries=retries
+		self.backoff=backoff
+		self.max_backoff=max_backoff
+		self.timeout=(settings["HTTP_CONNECT_TIMEOUT"], settings["HTTP_READ_TIMEOUT"])
+
+		# a blocking pool never opens more than connections_per_host connections to one host
+		adapter=HTTPAdapter(pool_connections=16,pool_maxsize=connections_per_host,pool_block=True,max_retries=0)
+		self.session=requests.Session()
+		self.session.mount("https://",adapter)
+		self.session.mount("http://",adapter)
+		self.session.headers["User-Agent"]=settings["USER_AGENT"]
+
+		# headers only sent to some hosts, like API keys
+		self.host_headers={}
+		if settings["NCBI_API_KEY"]:
+			self.host_headers[urlparse(settings["NCBI_API_URL"]).netloc]={"api-key": settings["NCBI_API_KEY"]}
+
+	def delay(self,attempt: int,response=None):
+		"""
+		Get the seconds to wait before the next try. A Retry-After header of the server is honored,
+		otherwise a random delay up to an exponentially growing limit is chosen, so waiting clients don't retry all at once.
+		"""
+		if response is not None:
+			retry_after=response.headers.get("Retry-After","")
+			if retry_after.isdigit():
+				return min(float(retry_after),self.max_backoff)
+		return random.uniform(0,min(self.max_backoff,self.backoff*2**attempt))
+
+	def request(self,method: str,url: str,retries: int=None,**kwargs):
+		"""
+		Send a request, retrying connection errors and responses with a status in RETRY_STATUSES.
+		Inside requestDeadline the timeouts are shortened to the time left and no retry is started after the deadline.
+		Returns the response, which may still have an error status after the last try.
+		"""
+		retries=self.retries if retries is None else retries
+		timeout=kwargs.pop("timeout",self.timeout)
+		timeout=timeout if isinstance(timeout,tuple) else (timeout, timeout)
+		deadline=getattr(_deadlines,"deadline",None)
+		host_headers=self.host_headers.get(urlparse(url).netloc)
+		if host_headers is not None:
+			kwargs["headers"]={**host_headers, **(kwargs.get("headers") or {})}
+
+		# function for checking whether a retry after some seconds still ends before the deadline
+		def inTime(wait: float):
+			return deadline is None or time.monotonic()+wait<deadline
+
+		attempt=0
+		while True:
+			limiter.acquire(url)
+			if deadline is not None:
+				remaining=deadline-time.monotonic()
+				if remaining<=0:
+					raise requests.Timeout(f"{urlparse(url).netloc} did not answer in time")
+				kwargs["timeout"]=tuple(remaining if part is None else min(part,remaining) for part in timeout)
+			else:
+				kwargs["timeout"]=timeout
+			try:
+				response=self.session.request(method,url,**kwargs)
+			except (requests.ConnectionError, requests.Timeout):
+				wait=self.delay(attempt)
+				if attempt>=retries or not inTime(wait):
+					raise
+				time.sleep(wait)
+			else:
+				if response.status_code not in RETRY_STATUSES or attempt>=retries:
+					return response
+				wait=self.delay(attempt,response)
+				if not inTime(wait):
+					return response
+				response.close()
+				# if the host is over its limit, all other requests to it wait as well
+				if response.status_code!=429 or not limiter.pause(url,wait):
+					time.sleep(wait)
+			attempt+=1
+
+	def get(self,url: str,**kwargs):
+		return self.request("GET",url,**kwargs)
+
+	def post(self,url: str,**kwargs):
+		return self.request("POST",url,**kwargs)
+
+	def head(self,url: str,**kwargs):
+		return self.request("HEAD",url,**kwargs)
+
+	def close(self):
+		self.session.close()
+
+
+# shared client for all remote sources
+client=HttpClient()
+atexit.register(client.close)
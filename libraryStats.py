@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 16:20:47 2026
+
+@author: Ronja Rösner
+
+This module provides statistics on the core library: species per taxon and rank,
+habitat distributions and accession coverage. The numbers come from summary tables,
+which are only recalculated after the library was changed.
+"""
+
+import sqlite3
+
+from dbConnection import library
+from dbMigration import RANK_COLUMNS
+
+# names of the habitat columns in the traits table
+HABITAT_COLUMNS = {
+	"isMarine": "marine",
+	"isBrackish": "brackish",
+	"isFresh": "freshwater",
+	"isTerrestrial": "terrestrial",
+	"isAllWater": "all water",
+	"isMarineFresh": "marine and freshwater",
+	"isExtinct": "extinct"
+}
+
+# readable names of the rank columns
+RANK_NAMES = {
+	"Kingdom": "Kingdom",
+	"Phylum": "Phylum",
+	"Class": "Class",
+	"taxOrder": "Order",
+	"Family": "Family",
+	"Genus": "Genus"
+}
+
+
+def refreshStatistics(force: bool=False):
+	"""
+	Recalculate the summary tables if the library changed since the last calculation. Returns True if they were recalculated.
+	"""
+	db_conn=library.getConnection(readonly=False)
+	cursor=db_conn.cursor()
+
+	stale=cursor.execute("SELECT Stale FROM stats_state WHERE Id=1").fetchone()
+	if not force and stale is not None and stale[0]==0:
+		return False
+
+	rank_depth=" ".join(f"WHEN '{rank}' THEN {depth}" for depth, rank in enumerate(RANK_COLUMNS))
+	habitat_counts=" UNION ALL ".join(
+		f"SELECT '{column}', {column}, COUNT(DISTINCT t.ScientificName) FROM traits tr JOIN taxonomy t ON t.IDX=tr.IDX GROUP BY {column}"
+		for column in HABITAT_COLUMNS
+		)
+
+	try:
+		with db_conn:
+			cursor.execute("DELETE FROM stats_ranks")
+			cursor.execute(f"""INSERT INTO stats_ranks (Name, Rank, Depth, Species, Entries, WithAccession)
+				SELECT c.Name, c.Rank, CASE c.Rank {rank_depth} END, COUNT(DISTINCT t.ScientificName), COUNT(*),
+					COUNT(DISTINCT CASE WHEN i.AccessionNumber IS NOT NULL AND i.AccessionNumber!='' THEN t.ScientificName END)
+				FROM taxon_closure c JOIN taxonomy t ON t.IDX=c.IDX LEFT JOIN ids i ON i.IDX=c.IDX
+				GROUP BY c.Rank, c.Name""")
+			cursor.execute("""INSERT OR REPLACE INTO stats_totals (Id, Entries, Species, Accessions)
+				SELECT 1, COUNT(*), COUNT(DISTINCT ScientificName),
+					(SELECT COUNT(AccessionNumber) FROM ids WHERE AccessionNumber!='') FROM taxonomy""")
+			cursor.execute("DELETE FROM stats_habitats")
+			cursor.execute(f"INSERT INTO stats_habitats (Habitat, Flag, Species) {habitat_counts}")
+			cursor.execute("UPDATE stats_state SET Stale=0 WHERE Id=1")
+	except sqlite3.OperationalError:
+		# the library may be read-only, the last calculation is used then
+		return False
+
+	return True
+
+
+def getStatistics():
+	"""
+	Get the library statistics, recalculating them first if the library changed.
+
+	Returns a dictionary containing:
+	- totals: number of entries, species and accession numbers
+	- ranks: per rank a list of (taxon, species, entries, species with accession number) tuples
+	- habitats: per habitat a dictionary of flag value and number of species
+	"""
+	refreshStatistics()
+	cursor=library.cursor()
+
+	entries, species, accessions = cursor.execute("SELECT Entries, Species, Accessions FROM stats_totals WHERE Id=1").fetchone() or (0, 0, 0)
+
+	ranks={rank: [] for rank in RANK_COLUMNS}
+	for name, rank, species_count, entry_count, with_accession in cursor.execute(
+		"SELECT Name, Rank, Species, Entries, WithAccession FROM stats_ranks ORDER BY Depth, Species DESC, Name"
+		):
+		ranks.setdefault(rank,[]).append((name, species_count, entry_count, with_accession))
+
+	habitats={column: {} for column in HABITAT_COLUMNS}
+	for habitat, flag, species_count in cursor.execute("SELECT Habitat, Flag, Species FROM stats_habitats ORDER BY Habitat, Flag"):
+		habitats.setdefault(habitat,{})[flag]=species_count
+
+	return {
+		"totals": {"entries": entries, "species": species, "accessions": accessions},
+		"ranks": ranks,
+		"habitats": habitats
+	}
+
+
+# function for preparing the statistics for the text field
+def getStatisticsText(listed_ranks: tuple=("Kingdom", "Phylum", "Class", "taxOrder")):
+	"""
+	Prepare the library statistics as text. Taxa are listed for the given ranks, the other ranks are only counted.
+	"""
+	statistics=getStatistics()
+	totals=statistics["totals"]
+
+	text_list=[
+		"\n=== Library statistics ===\n",
+		f"\n{totals['entries']} entries for {totals['species']} species with {totals['accessions']} accession numbers.\n",
+		"\n--- Taxa per rank ---\n"
+		]
+	for rank, taxa in statistics["ranks"].items():
+		text_list.append(f"{RANK_NAMES.get(rank,rank)}: {len(taxa)} taxa\n")
+
+	for rank in listed_ranks:
+		text_list.append(f"\n--- Species per {RANK_NAMES.get(rank,rank).lower()} (accession coverage) ---\n")
+		for name, species_count, entry_count, with_accession in statistics["ranks"].get(rank,[]):
+			coverage=round(100*with_accession/species_count) if species_count>0 else 0
+			text_list.append(f"{name}: {species_count} species in {entry_count} entries ({coverage}% with accession number)\n")
+
+	text_list.append("\n--- Species per habitat ---\n")
+	for column, flags in statistics["habitats"].items():
+		# a flag of 1 marks species known to live in the habitat
+		text_list.append(f"{HABITAT_COLUMNS[column].capitalize()}: {flags.get(1,0)} species\n")
+
+	text_list.append("\n-------------------------------------------------------------\n")
+	return text_list
+
+
+if __name__=='__main__':
+	print(''.join(getStatisticsText()))
@@ -6,35 +6,195 @@ Created on Sun Sep 29 18:20:52 2024
 @author: Ronja Rösner
 
 Main script for CRYtabia.
+Run without arguments to open the interface, or with --batch to search a list of queries without it.
+With --ncbi-reports the NCBI dataset reports of the library are fetched in bulk,
+with --resolve-gbif the names of the library are matched against the GBIF backbone
+and with --sync the offline mirror is filled, which --offline serves from.
 """
 
-import sqlite3
-# import custom functions for constructing interface
-from mainInterface import MainInterface
+import argparse, sys
 
 # import the program name and version from the setup file
 from setup import NAME, VERSION, DB_FILE
 
 # import function for creating an empty database if nessecary
 from GeDaMa.src.createDatabase import createNewDatabase
+# import function for bringing the database schema up to date
+from dbMigration import migrateDatabase
+
+# import the shared connection manager for the core database
+from dbConnection import library
 
 # turn the imported program info into strings
 program_name=str(NAME[0])
 program_version=str(VERSION[0])
 
+# function for reading the command line arguments
+def parseArguments(argv=None):
+	parser=argparse.ArgumentParser(prog=program_name,description="Get taxonomic and general information on specific taxa.")
+	parser.add_argument("--version",action="version",version=f"{program_name} {program_version}")
+	parser.add_argument("--snapshot",action="store_true",help="load the core library into memory and run all lookups on that copy")
+	parser.add_argument("--batch",nargs="?",const="-",metavar="FILE",help="search all queries in FILE (one per line, - for stdin) without opening the interface")
+	parser.add_argument("--selection",default="Scientific Name",choices=["Accession Number", "Genome Index", "Scientific Name", "Taxon Group", "Free Text"],help="what the batch queries are (default: Scientific Name)")
+	parser.add_argument("--sources",default="table",help="comma separated list of sources for the batch search, out of table, GBIF, NCBI and Wikipedia (default: table)")
+	parser.add_argument("--format",default="tsv",choices=["tsv","jsonl"],help="output format of the batch search (default: tsv)")
+	parser.add_argument("--output",default="-",metavar="FILE",help="file for the batch results (default: stdout)")
+	parser.add_argument("--workers",type=int,default=4,help="number of parallel requests to remote sources (default: 4)")
+	parser.add_argument("--metrics",action="store_true",help="show the request queues of the remote sources on stderr once the program is done")
+	parser.add_argument("--offline",action="store_true",help="serve GBIF, NCBI and Wikipedia from the offline mirror and never go to the network")
+	parser.add_argument("--sync",nargs="?",const="missing",choices=["missing","all"],help="copy the remote data of the whole library into the offline mirror (default: only entries that are not mirrored yet)")
+	parser.add_argument("--ncbi-summary",metavar="TAXON",help="count the NCBI assemblies of TAXON per assembly level and source while their reports are read, and write the summary as JSON")
+	parser.add_argument("--resolve-gbif",nargs="?",const="missing",choices=["missing","all"],help="match the scientific names of the library against the GBIF backbone and store the usageKeys (default: only names without a stored match)")
+	parser.add_argument("--ncbi-reports",nargs="?",const="",metavar="TAXON",help="fetch the NCBI dataset reports of all accession numbers in TAXON (default: the whole library) and write them as JSONL")
+	return parser.parse_args(argv)
+
+# function for searching a list of queries without the interface
+def batch(args):
+	from batchSearch import runBatch, readQueries, BATCH_SOURCES
+
+	# match the source names case-insensitively
+	source_names={source.lower(): source for source in BATCH_SOURCES}
+	sources=[]
+	for source in args.sources.split(","):
+		if source.strip().lower() not in source_names:
+			sys.exit(f"Unknown source {source}, choose from {', '.join(BATCH_SOURCES)}")
+		sources.append(source_names[source.strip().lower()])
+
+	in_stream=sys.stdin if args.batch=="-" else open(args.batch,encoding="utf-8")
+	out_stream=sys.stdout if args.output=="-" else open(args.output,"w",encoding="utf-8")
+	try:
+		runBatch(readQueries(in_stream),args.selection,sources,out_stream,args.format,args.workers)
+	finally:
+		if in_stream is not sys.stdin:
+			in_stream.close()
+		if out_stream is not sys.stdout:
+			out_stream.close()
+
+# function for fetching the NCBI dataset reports of the library in bulk
+def ncbiReports(args):
+	from batchSearch import runNCBIReports
+	from getInfo import SearchDatabase
+
+	if args.ncbi_reports=="":
+		accessions=SearchDatabase.getAllAccessions()
+	else:
+		accessions=SearchDatabase(args.ncbi_reports,"Taxon Group").getAccessions()
+		if accessions==[]:
+			sys.exit(f"No accession numbers found for taxon group {args.ncbi_reports}")
+
+	out_stream=sys.stdout if args.output=="-" else open(args.output,"w",encoding="utf-8")
+	try:
+		count=runNCBIReports(accessions,out_stream)
+	finally:
+		if out_stream is not sys.stdout:
+			out_stream.close()
+	print(f"Fetched {count} of {len(accessions)} dataset reports from NCBI.",file=sys.stderr)
+
+# function for summarizing the NCBI assemblies of a taxon
+def ncbiSummary(args):
+	import json
+	from getInfo import SearchNCBI
+
+	# function for showing the running summary on stderr
+	def progress(summary):
+		levels=", ".join(f"{count} {level}" for level, count in summary["levels"].items())
+		print(f"\r{summary['assemblies']} of {summary['total']} assemblies read ({levels})",end="",file=sys.stderr)
+
+	summary=SearchNCBI.getTaxonSummary(args.ncbi_summary,progress)
+	print(file=sys.stderr)
+	out_stream=sys.stdout if args.output=="-" else open(args.output,"w",encoding="utf-8")
+	try:
+		out_stream.write(json.dumps(summary,ensure_ascii=False)+"\n")
+	finally:
+		if out_stream is not sys.stdout:
+			out_stream.close()
+
+# function for storing the GBIF backbone matches of the library
+def resolveGBIF(args):
+	from gbifKeys import resolveUsageKeys
+
+	# function for showing the progress on stderr, so it does not mix with other output
+	def progress(done,total):
+		print(f"\rMatched {done} of {total} names",end="" if done<total else "\n",file=sys.stderr)
+
+	stored=resolveUsageKeys(resolve_all=args.resolve_gbif=="all",workers=args.workers,progress=progress)
+	print(f"Stored {stored} GBIF backbone matches.",file=sys.stderr)
+
+# function for filling the offline mirror
+def sync(args):
+	from mirrorSync import syncMirror
+
+	# function for showing the progress on stderr, so it does not mix with other output
+	def progress(part,done,total):
+		print(f"\r{part}: {done} of {total} entries",end="" if done<total else "\n",file=sys.stderr)
+
+	stored=syncMirror(resync=args.sync=="all",workers=args.workers,progress=progress)
+	for part, count in stored.items():
+		print(f"{part}: {count} entries mirrored.",file=sys.stderr)
+
+# function for showing the request queue of every remote host
+def showMetrics():
+	from rateLimiter import limiter
+
+	for host, metrics in limiter.getMetrics().items():
+		sent=", ".join(f"{count} {lane}" for lane, count in metrics["sent"].items())
+		print(f"{host}: {metrics['rate']:g} requests/s, sent {sent}, at most {metrics['max_queued']} queued, {metrics['waited']:.1f} s waited",file=sys.stderr)
+
 # function for constructing the application
-def main():
+def main(argv=None):
+	args=parseArguments(argv)
+	if args.offline:
+		if args.sync is not None:
+			sys.exit("The offline mirror can't be synced in offline mode")
+		from config import settings
+		settings["OFFLINE_MODE"]=True
+
 	createNewDatabase(DB_FILE)
-	
-	main_window=MainInterface(
-		program_name,
-		program_version
-		)
-	
-	main_window.focus_set()
-	main_window.mainloop()
+	migrateDatabase(DB_FILE)
+	if args.snapshot:
+		library.enableSnapshot()
+
+	if args.sync is not None:
+		sync(args)
+	elif args.resolve_gbif is not None:
+		resolveGBIF(args)
+	elif args.ncbi_reports is not None:
+		ncbiReports(args)
+	elif args.ncbi_summary is not None:
+		ncbiSummary(args)
+	elif args.batch is not None:
+		batch(args)
+	else:
+		# import custom functions for constructing interface only when it is needed
+		from mainInterface import MainInterface
+		from connectivity import monitor
+		from gbifKeys import startResolution
+		from autoComplete import suggestions
+		from config import settings
+
+		# build the autocomplete indexes in the background, so switching the input mode never waits
+		suggestions.warmUp()
+
+		if not settings["OFFLINE_MODE"]:
+			# check the remote sources in the background, so the interface never waits for it
+			monitor.start()
+			# match new names against the GBIF backbone in the background
+			startResolution()
+
+		main_window=MainInterface(
+			program_name,
+			program_version
+			)
+
+		main_window.focus_set()
+		main_window.mainloop()
+
+	if args.metrics:
+		showMetrics()
+
+	# close all database connections once the program is done
+	library.closeAll()
 
 
 if __name__ == "__main__":
 	main()
-
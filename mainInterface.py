@@ -14,12 +14,16 @@ from tkinter import ttk
 import os
 
 import getInfo
+from libraryStats import getStatisticsText
 from mapInterface import MapInterface
-from autoComplete import getSuggestions
+from autoComplete import suggestions, SuggestionList
 from setup import DB_FILE
 from GeDaMa.src.mainInterface import DatabaseMakerInterface
 from GeDaMa.src.createDatabase import count_entries
 
+# milliseconds between checks whether the output of a search is ready
+TEXT_POLL_MS = 50
+
 class MainInterface(tk.Tk):
 	
 	def resizeWindow(self, x: int, y: int, min: bool=True, max: bool=True):
@@ -82,30 +86,8 @@ class WindowContent(tk.Frame):
 			
 			self.input_frame.columnconfigure(1, weight=1)
 			
-			# function for updating the autocomplete suggestions
-			def _updateSuggestions(event, trie, entry, autocomplete_field):
-				prefix = entry.get()
-				if not prefix:
-					autocomplete_field.delete(0, tk.END)
-					return
-				suggestions = trie.search(prefix)
-				autocomplete_field.delete(0, tk.END)
-				for suggestion in suggestions:
-					autocomplete_field.insert(tk.END, suggestion)
-			
-			# function for inserting the selected word into the entry field
-			def _clickEntry(event,entry,autocomplete_field):
-				cursor=autocomplete_field.curselection()
-				
-				selection=autocomplete_field.get(cursor)
-				entry.delete(0,tk.END)
-				entry.insert(0,selection)
-			
-			# binds the release of a key in the entry field to update the autocomplete suggestions
-			text_input.bind("<KeyRelease>", lambda event: _updateSuggestions(event, self.trie, text_input, autocomplete_field))
-			# binds double click and tab while an entry in the listbox is selected to insert that entry into the input field
-			autocomplete_field.bind('<Double-1>',lambda event: _clickEntry(event, text_input, autocomplete_field))
-			autocomplete_field.bind('<Tab>',lambda event: _clickEntry(event, text_input, autocomplete_field))
+			# the suggestions are searched in the background, so typing never waits for them, the index is shared by all windows
+			SuggestionList(text_input,autocomplete_field,lambda: self.suggestion_mode)
 			
 			return text_input
 		
@@ -129,14 +111,43 @@ class WindowContent(tk.Frame):
 				self.input_frame.config(text="Input Genome Index (0-412)")
 				self.text_field.config(width=250,height=40)
 			
+			# remembers the last free text search, so confirming it again shows the next page of results
+			self.free_text_search=("",0)
+			
 			def _confirm():
 				gbif_state=gbif_onoff.get()
 				ncbi_state=ncbi_onoff.get()
 				wiki_state=wiki_onoff.get()
 				table_state=table_onoff.get()
-				text=getInfo.getText(selector, user_input, gbif_state, ncbi_state, wiki_state, table_state)
 				
-				self.output_frame.config(text=f"Information for {selector.get()} {user_input.get()}")
+				# searched words are suggested first from now on, they are recorded in the background
+				getInfo.text_pool.submit(suggestions.recordSelection, selector.get(), user_input.get())
+				
+				page=0
+				if selector.get()=="Free Text":
+					last_query,last_page=self.free_text_search
+					page=last_page+1 if last_query==user_input.get() else 0
+					self.free_text_search=(user_input.get(),page)
+				
+				# the sources are searched in the background, the text is shown once it is ready
+				query, selection = user_input.get(), selector.get()
+				future=getInfo.text_pool.submit(getInfo.getText, selection, query, gbif_state, ncbi_state, wiki_state, table_state, page)
+				_showText(future, query, selection, page)
+			
+			# function for showing the output of a search once it is ready, checked from the interface thread
+			def _showText(future, query, selection, page):
+				if not future.done():
+					self.after(TEXT_POLL_MS, lambda: _showText(future, query, selection, page))
+					return
+				try:
+					text,has_more=future.result()
+				except Exception as error:
+					text,has_more=[f"\n!! Search for {query} failed: {error} !!\n"],False
+				# start over with the first page once all results were shown
+				if not has_more:
+					self.free_text_search=(query,-1)
+				
+				self.output_frame.config(text=f"Information for {selection} {query}")
 				self.text_field.config(state="normal")
 				self.text_field.insert(1.0,''.join(text))
 				self.text_field.config(state="disabled")
@@ -160,8 +171,8 @@ class WindowContent(tk.Frame):
 			
 			# function for when selection changes
 			def clicked(event):
-				# get an object containing all words from the input table
-				self.trie=getSuggestions(selector.get())
+				# the index of every input mode is built once and shared with the other windows
+				self.suggestion_mode=selector.get()
 				if selector.get()=="Genome Index":
 
 					self.input_frame.config(text=f"Input Genome Index (0-{count_entries(DB_FILE)-1})")
@@ -176,7 +187,7 @@ class WindowContent(tk.Frame):
 			self.input_frame.config(font="Arial 14")
 			clicked(event=None)
 			
-			options_list=["Accession Number", "Genome Index", "Scientific Name", "Taxon Group"]
+			options_list=["Accession Number", "Genome Index", "Scientific Name", "Taxon Group", "Free Text"]
 			options_menu=tk.OptionMenu(self.inputselect_frame, selector, *(options_list), command=clicked)
 			options_menu.pack(side='top',expand=0,fill='x',padx=10,pady=5)
 			
@@ -191,6 +202,7 @@ class WindowContent(tk.Frame):
 			self.inputselect_frame.bind_all("<Command-Key-2>", lambda event: select_option(selector, "Genome Index"))
 			self.inputselect_frame.bind_all("<Command-Key-3>", lambda event: select_option(selector, "Scientific Name"))
 			self.inputselect_frame.bind_all("<Command-Key-4>", lambda event: select_option(selector, "Taxon Group"))
+			self.inputselect_frame.bind_all("<Command-Key-5>", lambda event: select_option(selector, "Free Text"))
 			
 			return selector
 		
@@ -218,7 +230,7 @@ class WindowContent(tk.Frame):
 					self.map_window_open=False
 				
 				# only execute if an internet connection is available
-				if getInfo.internetConnection():
+				if getInfo.internetConnection("GBIF"):
 					# only execute if the map window is not open already
 					if not self.map_window_open:
 						# only execute if something was inputted
@@ -242,7 +254,8 @@ class WindowContent(tk.Frame):
 				def onDatabaseClose():
 					self.database_window.destroy()
 					self.database_window_open=False
-					self.trie = getSuggestions(selection.get())
+					# the edits of the database are applied to the suggestions on their next search instead of rebuilding them
+					suggestions.markStale()
 				
 				if not self.database_window_open:
 					self.database_window=DatabaseMakerInterface(DB_FILE, "Database Configuration")
@@ -251,10 +264,28 @@ class WindowContent(tk.Frame):
 				else:
 					self.database_window.focus_set()
 
+			# the statistics may have to be recalculated first, so they are prepared in the background like the search output
+			def _showStatistics(future=None):
+				if future is None:
+					future=getInfo.text_pool.submit(getStatisticsText)
+				if not future.done():
+					self.after(TEXT_POLL_MS, lambda: _showStatistics(future))
+					return
+				try:
+					text=future.result()
+				except Exception as error:
+					text=[f"\n!! Library statistics failed: {error} !!\n"]
+				
+				self.output_frame.config(text="Library Statistics")
+				self.text_field.config(state="normal")
+				self.text_field.insert(1.0,''.join(text))
+				self.text_field.config(state="disabled")
+
 			ttk.Separator(self.inputselect_frame,orient='horizontal')
 			
 			ttk.Button(self.inputselect_frame,text="Map Editor*",command=lambda: _editMap(user_input, selection))
 			ttk.Button(self.inputselect_frame,text="Configure Database*",command=lambda: _makeDatabase())
+			ttk.Button(self.inputselect_frame,text="Library Statistics",command=lambda: _showStatistics())
 			ttk.Button(self.inputselect_frame,text="Save Output to File",command=lambda: _saveOutput())
 			
 			for widget in self.inputselect_frame.winfo_children():
@@ -265,6 +296,7 @@ class WindowContent(tk.Frame):
 			self.inputselect_frame.bind_all("<Control-Key-m>", lambda event: _editMap(user_input, selection))
 			self.inputselect_frame.bind_all("<Control-Key-d>", lambda event: _makeDatabase())
 			self.inputselect_frame.bind_all("<Control-Key-s>", lambda event: _saveOutput())
+			self.inputselect_frame.bind_all("<Control-Key-i>", lambda event: _showStatistics())
 		
 		#function for the checkbuttons in the Options column
 		def chooseOptions():
@@ -13,10 +13,10 @@ from tkinter import ttk
 from PIL import Image, ImageTk
 from datetime import datetime
 from tkinter.filedialog import asksaveasfilename
-from autoComplete import getSuggestions
+from autoComplete import suggestions, SuggestionList
 import os
 
-from getInfo import SearchGBIF,internetConnection
+from getInfo import SearchGBIF,internetConnection,text_pool
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
@@ -64,11 +64,11 @@ class WindowContent(tk.Frame):
 	
 	
 	def generateMap(self):
-		if internetConnection():
+		if internetConnection("GBIF"):
 			search_map=SearchGBIF(self.name_input.get(),self.selection)
-			self.map_path=search_map.makeMap(style=self.style_selector.get(),bin=self.aggregation_selector.get(),year=self.year_input)
+			map_file=search_map.makeMap(style=self.style_selector.get(),bin=self.aggregation_selector.get(),year=self.year_input)
 			
-			if self.map_path!="":
+			if map_file is not None:
 				# set parameteres of text and map fields, set name of map label
 				self.map_frame.config(text=f"Occurrence Map for {self.name_input.get()}:")
 				
@@ -76,7 +76,7 @@ class WindowContent(tk.Frame):
 					self.map_render.destroy()
 				
 				# save png of occurrence map to variable
-				occurrence_map=Image.open(self.map_path)
+				occurrence_map=Image.open(map_file)
 				# save png of world map to variable
 				world_map=Image.open(SCRIPT_DIR+"/images/world_map_512.png")
 				# overlay the world map with the occurrence map
@@ -103,6 +103,8 @@ class WindowContent(tk.Frame):
 			else:
 				self.year_input=self.year_selection.get()
 			
+			# searched names are suggested first from now on, they are recorded in the background
+			text_pool.submit(suggestions.recordSelection, "Scientific Name", self.name_input.get())
 			self.generateMap()
 		
 		def saveImage():
@@ -123,32 +125,8 @@ class WindowContent(tk.Frame):
 		# listbox field for autocomplete
 		autocomplete_field=tk.Listbox(self.option_frame,width=25,height=5,border=0)
 		
-		# get an object containing all words from the input table
-		self.trie=getSuggestions("Scientific Name")
-		# function for updating the autocomplete suggestions
-		def _updateSuggestions(event, trie, entry, autocomplete_field):
-			prefix = entry.get()
-			if not prefix:
-				autocomplete_field.delete(0, tk.END)
-				return
-			suggestions = trie.search(prefix)
-			autocomplete_field.delete(0, tk.END)
-			for suggestion in suggestions:
-				autocomplete_field.insert(tk.END, suggestion)
-		
-		# function for inserting the selected word into the entry field
-		def _clickEntry(event,entry,autocomplete_field):
-			cursor=autocomplete_field.curselection()
-			
-			selection=autocomplete_field.get(cursor)
-			entry.delete(0,tk.END)
-			entry.insert(0,selection)
-		
-		# binds the release of a key in the entry field to update the autocomplete suggestions
-		self.name_input.bind("<KeyRelease>", lambda event: _updateSuggestions(event, self.trie, self.name_input, autocomplete_field))
-		# binds double click and tab while an entry in the listbox is selected to insert that entry into the input field
-		autocomplete_field.bind('<Double-1>',lambda event: _clickEntry(event, self.name_input, autocomplete_field))
-		autocomplete_field.bind('<Tab>',lambda event: _clickEntry(event, self.name_input, autocomplete_field))
+		# the suggestions are searched in the background, so typing never waits for them, the index is shared by all windows
+		SuggestionList(self.name_input,autocomplete_field,"Scientific Name")
 
 		ttk.Separator(self.option_frame,orient='horizontal')
 		
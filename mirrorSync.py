@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 10:07:44 2026
+
+@author: Ronja Rösner
+
+This module fills the offline mirror (data/mirror.db) with the remote data of the whole core library:
+GBIF backbone matches, GBIF occurrence maps, NCBI dataset reports and Wikipedia summaries.
+Every response is stored as soon as it arrives and entries that are already mirrored are skipped,
+so an interrupted sync continues where it stopped. With OFFLINE_MODE the mirror stands in for the sources.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from responseCache import mirror
+from getInfo import SearchDatabase, SearchGBIF, SearchNCBI, SearchWikipedia, WIKIPEDIA_BATCH_SIZE, WIKIPEDIA_LANGUAGES
+from gbifKeys import matchName
+from rateLimiter import requestPriority, BATCH
+import queryLayer
+
+# parts of the remote data that can be mirrored
+MIRROR_SOURCES = ["GBIF", "Maps", "NCBI", "Wikipedia"]
+
+# number of requests running at the same time
+SYNC_WORKERS = 4
+
+
+# function for mirroring a list of keys of one source, loading the missing ones in parallel
+def syncItems(source: str,keys: list,load,resync: bool,workers: int,progress=None,label: str=None):
+	"""
+	Store the payload of every key in the mirror. Keys that fail are left for the next sync.
+	Returns the number of stored entries.
+	"""
+	label=label or source
+	if not resync:
+		keys=[key for key in keys if mirror.get(source,key,allow_stale=True) is None]
+
+	# function for loading a key without letting a failure stop the others, searches from the interface go first
+	def tryLoad(key):
+		try:
+			with requestPriority(BATCH):
+				return key, load(key), True
+		except Exception:
+			return key, None, False
+
+	stored=0
+	with ThreadPoolExecutor(max_workers=max(1,workers),thread_name_prefix="mirror_sync") as executor:
+		for done, (key, payload, loaded) in enumerate(executor.map(tryLoad,keys),start=1):
+			if loaded:
+				mirror.put(source,key,payload)
+				stored+=1
+			if progress is not None:
+				progress(label,done,len(keys))
+	return stored
+
+
+# function for getting the usageKeys of all names in the library, matching names without one
+def libraryUsageKeys(names: list):
+	usage_keys=set()
+	for name in names:
+		stored_backbone, usage_key = queryLayer.fetchOne("gbif_key", (name,))
+		if usage_key is None:
+			try:
+				with requestPriority(BATCH):
+					usage_key=matchName(name).get("usageKey")
+			except Exception:
+				continue
+		if usage_key is not None:
+			usage_keys.add(usage_key)
+	return sorted(usage_keys)
+
+
+def syncNCBI(accessions: list,resync: bool,progress=None):
+	"""
+	Store the dataset reports of all accession numbers with bulk requests. Returns the number of stored entries.
+	"""
+	key=lambda accession: f"genome/accession/{accession}/dataset_report"
+	if not resync:
+		accessions=[accession for accession in accessions if mirror.get("NCBI",key(accession),allow_stale=True) is None]
+
+	misses=[]
+	stored=0
+	with requestPriority(BATCH):
+		for accession, report in SearchNCBI.getDatasetReports(accessions,misses=misses):
+			mirror.put("NCBI",key(accession),{"reports": [report], "total_count": 1})
+			stored+=1
+			if progress is not None:
+				progress("NCBI",stored,len(accessions))
+	# accession numbers without report are stored too, so they are not asked for again
+	for accession in misses:
+		mirror.put("NCBI",key(accession),{"reports": [], "total_count": 0})
+	return stored
+
+
+def syncWikipedia(names: list,resync: bool,progress=None,chunk_size: int=5*WIKIPEDIA_BATCH_SIZE):
+	"""
+	Store the english and german summaries of all names, asking for many pages per request and for both languages at the same time.
+	Returns the number of stored entries.
+	"""
+	if not resync:
+		names=[name for name in names if any(
+			mirror.get("Wikipedia",SearchWikipedia.summaryKey(name,language),allow_stale=True) is None for language in WIKIPEDIA_LANGUAGES
+			)]
+
+	stored=0
+	for start in range(0,len(names),chunk_size):
+		with requestPriority(BATCH):
+			summaries=SearchWikipedia.loadMultilingualSummaries(names[start:start+chunk_size])
+		for language, language_summaries in summaries.items():
+			for name, summary in language_summaries.items():
+				mirror.put("Wikipedia",SearchWikipedia.summaryKey(name,language),summary)
+				stored+=1
+		if progress is not None:
+			progress("Wikipedia",min(start+chunk_size,len(names)),len(names))
+	return stored
+
+
+def syncMirror(sources: list=MIRROR_SOURCES,resync: bool=False,workers: int=SYNC_WORKERS,progress=None):
+	"""
+	Mirror the remote data of the whole library. Only missing entries are loaded, unless resync is set.
+	progress is called with (part, number done, number of entries), if it is given.
+	Returns a dictionary of source and number of stored entries.
+	"""
+	names=[row[0] for row in queryLayer.fetchAll("all_names")]
+	stored={}
+
+	if "GBIF" in sources:
+		stored["GBIF"]=syncItems("GBIF",names,matchName,resync,workers,progress)
+	if "Maps" in sources:
+		# only the default map is mirrored
+		map_keys={SearchGBIF.mapKey(usage_key): usage_key for usage_key in libraryUsageKeys(names)}
+		stored["Maps"]=syncItems("GBIF",list(map_keys),lambda key: SearchGBIF.loadMapTile(map_keys[key]),resync,workers,progress,"Maps")
+	if "NCBI" in sources:
+		stored["NCBI"]=syncNCBI(SearchDatabase.getAllAccessions(),resync,progress)
+	if "Wikipedia" in sources:
+		stored["Wikipedia"]=syncWikipedia(names,resync,progress)
+
+	return stored
+
+
+if __name__=='__main__':
+	print(syncMirror(progress=lambda part, done, total: print(f"{part}: {done}/{total}",end="\r")))
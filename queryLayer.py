@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:14:02 2026
+
+@author: Ronja Rösner
+
+This module holds all SQL statements used for searching the core database.
+Every statement has a fixed name and text, so sqlite can reuse the compiled statement
+from its statement cache. The time spent in each statement is counted.
+"""
+
+import threading, time
+
+from dbConnection import library
+from dbMigration import SUGGESTION_COLUMNS
+
+# reference table and column for each way of searching the library
+SELECTION_COLUMNS = {
+	"Accession Number": ("ids", "AccessionNumber"),
+	"Genome Index": ("ids", "IDX"),
+	"Scientific Name": ("taxonomy", "ScientificName"),
+	"Taxon Group": ("taxon_closure", "Name")
+}
+
+# function for comparing a column with a parameter, text is compared without regard to case
+def matchColumn(column: str):
+	return column if column=="IDX" else f"{column} COLLATE NOCASE"
+
+
+# selections that can be resolved in bulk
+BULK_SELECTIONS = {selection: SELECTION_COLUMNS[selection] for selection in ["Accession Number", "Genome Index", "Scientific Name"]}
+
+# sizes of the IN (...) lists, shorter lists are padded with NULL so only these statement texts exist
+CHUNK_BUCKETS = [1, 8, 64, 512]
+
+# columns selected for every species record, in the order getInfo.makeRecord expects them
+RECORD_COLUMNS = """t.ScientificName, t.Authority, t.Vernacular_Eng, t.Vernacular_Ger,
+		t.Kingdom, t.Phylum, t.Class, t.taxOrder, t.Family, t.Genus,
+		tr.isMarine, tr.isBrackish, tr.isFresh, tr.isTerrestrial"""
+
+# query for resolving all information on a species at once, {matched} selects the indices of the species
+SPECIES_QUERY = f"""
+	WITH matched AS ({{matched}})
+	SELECT {RECORD_COLUMNS},
+		(SELECT json_group_array(IDX) FROM (SELECT IDX FROM matched ORDER BY IDX)),
+		(SELECT json_group_array(AccessionNumber) FROM (SELECT AccessionNumber FROM ids WHERE IDX IN matched ORDER BY IDX))
+	FROM taxonomy t LEFT JOIN traits tr ON tr.IDX=t.IDX
+	WHERE t.IDX=(SELECT MIN(IDX) FROM matched)
+"""
+
+# query for resolving a whole list of identifiers at once, the first column contains the matched identifier
+BULK_SPECIES_QUERY = f"""
+	WITH matched AS (
+		SELECT m.query, m.IDX, i.AccessionNumber
+		FROM (SELECT {{column}} AS query, IDX FROM {{table}} WHERE {{match}} IN ({{placeholders}})) m
+		LEFT JOIN ids i ON i.IDX=m.IDX
+		ORDER BY m.query, m.IDX
+	),
+	grouped AS (
+		SELECT query, MIN(IDX) AS IDX, json_group_array(IDX) AS indices,
+			json_group_array(AccessionNumber) FILTER (WHERE AccessionNumber IS NOT NULL) AS accessions
+		FROM matched GROUP BY query
+	)
+	SELECT g.query, {RECORD_COLUMNS}, g.indices, g.accessions
+	FROM grouped g JOIN taxonomy t ON t.IDX=g.IDX LEFT JOIN traits tr ON tr.IDX=t.IDX
+"""
+
+# ranking of full-text matches, weighting the columns of taxonomy_fts (names and vernaculars count most)
+FREE_TEXT_RANK = "bm25(taxonomy_fts, 10.0, 1.0, 8.0, 8.0, 2.0, 2.0, 2.0, 2.0, 2.0, 3.0)"
+
+# query for the ranked species matching a full-text search
+FREE_TEXT_QUERY = f"""
+	WITH ranked AS MATERIALIZED (
+		SELECT t.ScientificName, t.Vernacular_Eng, t.Vernacular_Ger, {FREE_TEXT_RANK} AS score
+		FROM taxonomy_fts JOIN taxonomy t ON t.IDX=taxonomy_fts.rowid
+		WHERE taxonomy_fts MATCH ?
+	)
+	SELECT ScientificName, Vernacular_Eng, Vernacular_Ger, MIN(score) AS best_score FROM ranked
+	GROUP BY ScientificName ORDER BY best_score, ScientificName LIMIT ? OFFSET ?
+"""
+
+
+# function for building the fixed set of named statements
+def buildStatements():
+	statements={}
+
+	for selection, (table, column) in SELECTION_COLUMNS.items():
+		statements[f"exists:{selection}"]=f"SELECT 1 FROM {table} WHERE {matchColumn(column)}=? LIMIT 1"
+		statements[f"indices:{selection}"]=f"SELECT DISTINCT IDX FROM {table} WHERE {matchColumn(column)}=? ORDER BY IDX"
+		statements[f"species:{selection}"]=SPECIES_QUERY.format(matched=f"SELECT IDX FROM {table} WHERE {matchColumn(column)}=?")
+		# spelling of the query in the library, an exactly matching spelling is preferred
+		statements[f"spelling:{selection}"]=f"SELECT {column} FROM {table} WHERE {matchColumn(column)}=?1 ORDER BY {column}!=?1 LIMIT 1"
+
+	for selection, (table, column) in BULK_SELECTIONS.items():
+		for size in CHUNK_BUCKETS:
+			statements[f"bulk_species:{selection}:{size}"]=BULK_SPECIES_QUERY.format(
+				table=table, column=column, match=matchColumn(column), placeholders=", ".join("?"*size)
+				)
+
+	statements["species:Free Text"]=SPECIES_QUERY.format(matched=f"""SELECT IDX FROM taxonomy WHERE ScientificName=(
+		SELECT t.ScientificName FROM taxonomy_fts JOIN taxonomy t ON t.IDX=taxonomy_fts.rowid
+		WHERE taxonomy_fts MATCH ? ORDER BY {FREE_TEXT_RANK} LIMIT 1)""")
+	statements["free_text"]=FREE_TEXT_QUERY
+	statements["free_text_count"]="""SELECT COUNT(DISTINCT t.ScientificName)
+		FROM taxonomy_fts JOIN taxonomy t ON t.IDX=taxonomy_fts.rowid WHERE taxonomy_fts MATCH ?"""
+
+	# if a name is used on several ranks, the highest rank is chosen
+	statements["taxgroup_members"]="""SELECT t.ScientificName, c.Rank FROM taxon_closure c JOIN taxonomy t ON t.IDX=c.IDX
+		WHERE c.Name=? COLLATE NOCASE AND c.Rank=(SELECT Rank FROM taxon_nodes WHERE Name=? COLLATE NOCASE ORDER BY Depth LIMIT 1)
+		ORDER BY c.IDX"""
+	statements["taxgroup_count"]="SELECT Descendants FROM taxon_nodes WHERE Name=? COLLATE NOCASE ORDER BY Depth LIMIT 1"
+
+	# accession numbers, each listed once in the order of the first entry using it
+	statements["taxgroup_accessions"]="""SELECT i.AccessionNumber FROM taxon_closure c JOIN ids i ON i.IDX=c.IDX
+		WHERE c.Name=? COLLATE NOCASE AND c.Rank=(SELECT Rank FROM taxon_nodes WHERE Name=? COLLATE NOCASE ORDER BY Depth LIMIT 1)
+			AND i.AccessionNumber IS NOT NULL AND i.AccessionNumber!=''
+		GROUP BY i.AccessionNumber ORDER BY MIN(c.IDX)"""
+	# all autocomplete words of an input mode with the number of rows using them
+	for mode, columns in SUGGESTION_COLUMNS.items():
+		words=" UNION ALL ".join(f"SELECT CAST({column} AS TEXT) AS Word FROM {table} WHERE {column} IS NOT NULL AND {column}!=''" for table, column in columns)
+		statements[f"words:{mode}"]=f"SELECT Word, COUNT(*) FROM ({words}) GROUP BY Word"
+	statements["suggestion_changes"]="SELECT Id, Mode, Word, Change FROM suggestion_log WHERE Id>? ORDER BY Id"
+	statements["suggestion_log_range"]="SELECT COALESCE(MIN(Id), 0), COALESCE(MAX(Id), 0) FROM suggestion_log"
+
+	# stored backbone match of a name and the usageKey of its first entry
+	statements["gbif_key"]="""SELECT (SELECT Backbone FROM gbif_matches WHERE ScientificName=?1),
+		(SELECT i.usageKey FROM taxonomy t JOIN ids i ON i.IDX=t.IDX WHERE t.ScientificName=?1 AND i.usageKey IS NOT NULL ORDER BY t.IDX LIMIT 1)"""
+	statements["unmatched_names"]="""SELECT DISTINCT t.ScientificName FROM taxonomy t
+		WHERE t.ScientificName IS NOT NULL AND t.ScientificName!=''
+			AND NOT EXISTS (SELECT 1 FROM gbif_matches m WHERE m.ScientificName=t.ScientificName)"""
+	statements["unmatched_name_exists"]="""SELECT 1 FROM taxonomy t
+		WHERE t.ScientificName IS NOT NULL AND t.ScientificName!=''
+			AND NOT EXISTS (SELECT 1 FROM gbif_matches m WHERE m.ScientificName=t.ScientificName) LIMIT 1"""
+	statements["all_names"]="SELECT DISTINCT ScientificName FROM taxonomy WHERE ScientificName IS NOT NULL AND ScientificName!=''"
+	statements["all_accessions"]="""SELECT AccessionNumber FROM ids WHERE AccessionNumber IS NOT NULL AND AccessionNumber!=''
+		GROUP BY AccessionNumber ORDER BY MIN(IDX)"""
+
+	return statements
+
+
+# all statements used for searching the core database
+STATEMENTS=buildStatements()
+
+
+# class for counting how often each statement ran and how long it took
+class StatementTimer:
+
+	def __init__(self):
+		self._lock=threading.Lock()
+		self._timings={}
+
+	def record(self,name: str,seconds: float):
+		with self._lock:
+			count, total, slowest = self._timings.get(name,(0,0.0,0.0))
+			self._timings[name]=(count+1, total+seconds, max(slowest,seconds))
+
+	def getTimings(self):
+		"""
+		Get the timings of all statements that ran. Returns a dictionary of name and (count, total seconds, slowest seconds).
+		"""
+		with self._lock:
+			return dict(self._timings)
+
+	def reset(self):
+		with self._lock:
+			self._timings={}
+
+
+# shared timer for all statements
+timer=StatementTimer()
+
+
+def fetchAll(name: str,params=(),cursor=None):
+	"""
+	Run a named statement and get all result rows. Returns a list of tuples.
+	"""
+	if cursor is None:
+		cursor=library.cursor()
+
+	start=time.perf_counter()
+	try:
+		return cursor.execute(STATEMENTS[name],params).fetchall()
+	finally:
+		timer.record(name,time.perf_counter()-start)
+
+
+def fetchOne(name: str,params=(),cursor=None):
+	"""
+	Run a named statement and get the first result row. Returns a tuple or None.
+	"""
+	rows=fetchAll(name,params,cursor)
+	return rows[0] if rows!=[] else None
+
+
+def chunkBucket(values: list):
+	"""
+	Split values into chunks fitting the largest IN (...) list, padding each chunk to the next bucket size.
+	Yields (bucket size, padded chunk) tuples.
+	"""
+	largest=CHUNK_BUCKETS[-1]
+	for start in range(0,len(values),largest):
+		chunk=list(values[start:start+largest])
+		size=next(bucket for bucket in CHUNK_BUCKETS if bucket>=len(chunk))
+		yield size, chunk+[None]*(size-len(chunk))
+
+
+if __name__=='__main__':
+	print(fetchOne("species:Scientific Name",("Alca torda",)))
+	for name, (count, total, slowest) in timer.getTimings().items():
+		print(f"{name}: {count} runs, {total*1000:.2f} ms total, {slowest*1000:.2f} ms slowest")
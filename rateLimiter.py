@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Wed Oct 21 09:26:53 2026
+
+@author: Ronja Rösner
+
+This module keeps the requests to every remote host below the rate the host allows.
+Every request takes a token from the bucket of its host, tokens are added at the allowed rate.
+Waiting requests are served by priority lane, so searches from the interface overtake batch jobs.
+"""
+
+import heapq, itertools, threading, time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from config import settings
+
+# priority lanes, lower lanes are served first
+INTERACTIVE = 0
+BATCH = 1
+LANE_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+# priority lane of the requests sent by each thread
+_lanes=threading.local()
+
+
+@contextmanager
+def requestPriority(lane: int):
+	"""
+	Send all requests of the current thread in the given priority lane while the context is active.
+	"""
+	previous=getattr(_lanes,"lane",INTERACTIVE)
+	_lanes.lane=lane
+	try:
+		yield
+	finally:
+		_lanes.lane=previous
+
+
+def currentLane():
+	return getattr(_lanes,"lane",INTERACTIVE)
+
+
+# class holding the token bucket and the queue of a single host
+class HostBucket:
+
+	def __init__(self,rate: float,burst: float=1):
+		self.rate=rate
+		# a burst of 1 spaces the requests evenly, so no window of a second ever sees more than the rate
+		self.burst=burst
+		self.tokens=burst
+		self.updated=time.monotonic()
+		self._condition=threading.Condition()
+		self._queue=[]
+		self._tickets=itertools.count()
+		self.sent={lane: 0 for lane in LANE_NAMES}
+		self.waited=0.0
+		self.max_queued=0
+
+	def _refill(self):
+		now=time.monotonic()
+		self.tokens=min(self.burst,self.tokens+(now-self.updated)*self.rate)
+		self.updated=now
+
+	def acquire(self,lane: int=INTERACTIVE):
+		"""
+		Wait until the request may be sent. Returns the seconds spent waiting.
+		"""
+		start=time.monotonic()
+		with self._condition:
+			ticket=(lane, next(self._tickets))
+			heapq.heappush(self._queue,ticket)
+			self.max_queued=max(self.max_queued,len(self._queue))
+
+			while True:
+				self._refill()
+				first=self._queue[0]==ticket
+				if first and self.tokens>=1:
+					heapq.heappop(self._queue)
+					self.tokens-=1
+					waited=time.monotonic()-start
+					self.sent[lane]=self.sent.get(lane,0)+1
+					self.waited+=waited
+					# the next request in the queue has to work out its own waiting time
+					self._condition.notify_all()
+					return waited
+				# only the first request waits for the next token, the others wait until it is sent
+				self._condition.wait((1-self.tokens)/self.rate if first else None)
+
+	def pause(self,seconds: float):
+		"""
+		Stop handing out tokens for some seconds, e.g. after the host answered with 429.
+		"""
+		with self._condition:
+			self._refill()
+			self.tokens=min(self.tokens,1-seconds*self.rate)
+			self._condition.notify_all()
+
+	def getMetrics(self):
+		with self._condition:
+			return {
+				"rate": self.rate,
+				"queued": len(self._queue),
+				"max_queued": self.max_queued,
+				"sent": {LANE_NAMES.get(lane,lane): count for lane, count in self.sent.items()},
+				"waited": self.waited
+			}
+
+
+# class for sharing the token buckets of all hosts
+class RateLimiter:
+
+	def __init__(self,host_rates: dict):
+		self.host_rates=host_rates
+		self._buckets={}
+		self._lock=threading.Lock()
+
+	def bucket(self,url: str):
+		"""
+		Get the token bucket of the host of a url. Returns None for hosts without limit.
+		"""
+		host=urlparse(url).netloc
+		with self._lock:
+			if host not in self._buckets:
+				rate=self.host_rates.get(host)
+				self._buckets[host]=HostBucket(rate) if rate else None
+			return self._buckets[host]
+
+	def acquire(self,url: str,lane: int=None):
+		"""
+		Wait until a request to the url may be sent, in the lane of the current thread if none is given. Returns the seconds spent waiting.
+		"""
+		bucket=self.bucket(url)
+		if bucket is None:
+			return 0.0
+		return bucket.acquire(currentLane() if lane is None else lane)
+
+	def pause(self,url: str,seconds: float):
+		"""
+		Stop sending requests to the host of a url for some seconds. Returns False if the host has no limit.
+		"""
+		bucket=self.bucket(url)
+		if bucket is None:
+			return False
+		bucket.pause(seconds)
+		return True
+
+	def getMetrics(self):
+		"""
+		Get the queue metrics of all limited hosts. Returns a dictionary of host and a dictionary containing
+		the rate, the number of queued requests now and at most, the requests sent per lane and the total seconds spent waiting.
+		"""
+		with self._lock:
+			buckets={host: bucket for host, bucket in self._buckets.items() if bucket is not None}
+		return {host: bucket.getMetrics() for host, bucket in buckets.items()}
+
+
+# function for finding the allowed request rate of every configured host
+def hostRates():
+	ncbi_rate=settings["NCBI_RATE_WITH_KEY"] if settings["NCBI_API_KEY"] else settings["NCBI_RATE"]
+	rates={}
+	for url_setting, rate in [("GBIF_API_URL", settings["GBIF_RATE"]), ("GBIF_MAP_URL", settings["GBIF_RATE"]),
+			("NCBI_API_URL", ncbi_rate), ("WIKIPEDIA_API_URL", settings["WIKIPEDIA_RATE"])]:
+		# the Wikipedia address contains the language, all languages have their own host
+		for language in ["en", "de"]:
+			rates[urlparse(settings[url_setting].format(language=language)).netloc]=rate
+	return rates
+
+
+# shared limiter for all remote requests
+limiter=RateLimiter(hostRates())
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:27:51 2026
+
+@author: Ronja Rösner
+
+This module stores the responses of the remote sources (GBIF, NCBI, Wikipedia) in a sidecar database
+next to the core library, so repeated lookups don't go to the network and also work offline.
+Entries expire after a time set per source, and the least recently used entries are dropped once the
+cache grows beyond its size budget.
+The offline mirror uses the same format, but keeps its entries until the next sync (see mirrorSync).
+"""
+
+import json, threading, time, zlib
+import requests
+from dataclasses import dataclass
+
+from setup import DB_FILE
+from config import settings
+from dbConnection import ConnectionManager
+from connectivity import monitor
+
+# sidecar database holding the cached responses
+CACHE_FILE = DB_FILE.parent/"response_cache.db"
+# database holding the offline mirror of the whole library
+MIRROR_FILE = DB_FILE.parent/"mirror.db"
+
+# seconds a cached response of each source stays valid
+SOURCE_TTLS = {
+	"GBIF": 30*24*3600,
+	"NCBI": 7*24*3600,
+	"Wikipedia": 7*24*3600
+}
+
+# maximum size of all compressed payloads in bytes
+MAX_CACHE_BYTES = 64*1024*1024
+
+# seconds between updates of the last access time of an entry, so reading the cache rarely writes to it
+ACCESS_RESOLUTION = 60
+
+# returned by a loader if the server confirmed that the cached response is still valid
+NOT_MODIFIED = object()
+
+
+# raised if a source can't be reached and there is no cached response for the query
+class OfflineError(Exception):
+	pass
+
+
+# record holding a cached response
+@dataclass(slots=True, frozen=True)
+class CacheEntry:
+	payload: object
+	etag: str
+	last_modified: str
+	fetched_at: float
+	fresh: bool
+
+
+def normalizeQuery(query: str):
+	"""
+	Turn a query into the key of its cache entry, ignoring case and surplus whitespace.
+	"""
+	return " ".join(str(query).split()).casefold()
+
+
+# class for reading and writing cached responses
+class ResponseCache:
+
+	def __init__(self,cache_file=CACHE_FILE,ttls: dict=SOURCE_TTLS,max_bytes: int=MAX_CACHE_BYTES,fallback=None):
+		self.connections=ConnectionManager(cache_file)
+		self.ttls=ttls
+		# without max_bytes the cache is never cleaned up
+		self.max_bytes=max_bytes
+		# cache asked if a source can't be reached and there is no entry in this one
+		self.fallback=fallback
+		self._created=False
+		self._lock=threading.Lock()
+
+	def _cursor(self):
+		cursor=self.connections.cursor(readonly=False)
+		if not self._created:
+			with self._lock:
+				cursor.execute("""CREATE TABLE IF NOT EXISTS responses (
+					Source TEXT NOT NULL, Query TEXT NOT NULL, Payload BLOB NOT NULL, ETag TEXT, LastModified TEXT,
+					FetchedAt REAL NOT NULL, AccessedAt REAL NOT NULL, Size INTEGER NOT NULL,
+					PRIMARY KEY (Source, Query)
+					) WITHOUT ROWID""")
+				cursor.execute("CREATE INDEX IF NOT EXISTS idx_responses_AccessedAt ON responses (AccessedAt)")
+
+				# running total of the payload sizes, kept up to date by triggers in the transaction of every change
+				cursor.execute("BEGIN IMMEDIATE")
+				cursor.execute("CREATE TABLE IF NOT EXISTS cache_size (Id INTEGER PRIMARY KEY CHECK (Id=1), Total INTEGER NOT NULL)")
+				cursor.execute("""CREATE TRIGGER IF NOT EXISTS responses_size_insert AFTER INSERT ON responses BEGIN
+					UPDATE cache_size SET Total=Total+new.Size WHERE Id=1;
+					END""")
+				cursor.execute("""CREATE TRIGGER IF NOT EXISTS responses_size_update AFTER UPDATE OF Size ON responses BEGIN
+					UPDATE cache_size SET Total=Total-old.Size+new.Size WHERE Id=1;
+					END""")
+				cursor.execute("""CREATE TRIGGER IF NOT EXISTS responses_size_delete AFTER DELETE ON responses BEGIN
+					UPDATE cache_size SET Total=Total-old.Size WHERE Id=1;
+					END""")
+				# the payloads are only summed up if there is no total yet, like for caches written before it was kept
+				if cursor.execute("SELECT 1 FROM cache_size WHERE Id=1").fetchone() is None:
+					cursor.execute("INSERT INTO cache_size (Id, Total) SELECT 1, COALESCE(SUM(Size), 0) FROM responses")
+				cursor.connection.commit()
+				self._created=True
+		return cursor
+
+	def get(self,source: str,query: str,allow_stale: bool=False):
+		"""
+		Get the cached response for a query. Returns a CacheEntry, or None if there is none (or only an expired one).
+		"""
+		key=normalizeQuery(query)
+		cursor=self._cursor()
+		row=cursor.execute(
+			"SELECT Payload, ETag, LastModified, FetchedAt, AccessedAt FROM responses WHERE Source=? AND Query=?",
+			(source,key)
+			).fetchone()
+		if row is None:
+			return None
+
+		payload, etag, last_modified, fetched_at, accessed_at = row
+		now=time.time()
+		fresh=now-fetched_at<self.ttls.get(source,0)
+		if not fresh and not allow_stale:
+			return None
+
+		if now-accessed_at>ACCESS_RESOLUTION:
+			cursor.execute("UPDATE responses SET AccessedAt=? WHERE Source=? AND Query=?",(now,source,key))
+			cursor.connection.commit()
+
+		return CacheEntry(json.loads(zlib.decompress(payload)),etag,last_modified,fetched_at,fresh)
+
+	def put(self,source: str,query: str,payload,etag: str=None,last_modified: str=None):
+		"""
+		Store the response for a query, dropping the least recently used entries if the cache gets too big.
+		"""
+		data=zlib.compress(json.dumps(payload,ensure_ascii=False).encode("utf-8"))
+		now=time.time()
+		cursor=self._cursor()
+		with cursor.connection:
+			# an upsert instead of a replace, so the size triggers see the replaced entry as an update
+			cursor.execute(
+				"""INSERT INTO responses (Source, Query, Payload, ETag, LastModified, FetchedAt, AccessedAt, Size) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+				ON CONFLICT (Source, Query) DO UPDATE SET Payload=excluded.Payload, ETag=excluded.ETag, LastModified=excluded.LastModified,
+					FetchedAt=excluded.FetchedAt, AccessedAt=excluded.AccessedAt, Size=excluded.Size""",
+				(source,normalizeQuery(query),data,etag,last_modified,now,now,len(data))
+				)
+		self.evict()
+
+	def touch(self,source: str,query: str):
+		"""
+		Mark a cached response as fresh again, after the server confirmed that it did not change.
+		"""
+		now=time.time()
+		cursor=self._cursor()
+		with cursor.connection:
+			cursor.execute("UPDATE responses SET FetchedAt=?, AccessedAt=? WHERE Source=? AND Query=?",(now,now,source,normalizeQuery(query)))
+
+	def evict(self):
+		"""
+		Drop the least recently used entries until the cache fits into its size budget.
+		"""
+		if self.max_bytes is None:
+			return
+		cursor=self._cursor()
+		total=self.size()
+		if total<=self.max_bytes:
+			return
+
+		with cursor.connection:
+			for source, key, size in cursor.execute("SELECT Source, Query, Size FROM responses ORDER BY AccessedAt").fetchall():
+				cursor.execute("DELETE FROM responses WHERE Source=? AND Query=?",(source,key))
+				total-=size
+				if total<=self.max_bytes:
+					break
+
+	def size(self):
+		"""
+		Get the size of all compressed payloads in bytes.
+		"""
+		return self._cursor().execute("SELECT Total FROM cache_size WHERE Id=1").fetchone()[0]
+
+	def fetch(self,source: str,query: str,loader):
+		"""
+		Get the response for a query from the cache or, if it is missing or expired, from the loader.
+
+		The loader gets the expired entry (or None) and returns either NOT_MODIFIED or a tuple of
+		(payload, etag, last_modified). If the source can't be reached or offline mode is on, an expired entry
+		or the entry of the fallback cache is used instead, and OfflineError is raised if there is none.
+		"""
+		entry=self.get(source,query,allow_stale=True)
+		if entry is not None and entry.fresh:
+			return entry.payload
+
+		if settings["OFFLINE_MODE"] or not monitor.isAvailable(source):
+			entry=entry or self.fallbackEntry(source,query)
+			if entry is None:
+				raise OfflineError(source)
+			return entry.payload
+
+		try:
+			result=loader(entry)
+		except requests.RequestException as error:
+			response=getattr(error,"response",None)
+			if response is not None and 400<=response.status_code<500 and response.status_code!=429:
+				# the source answered, it has nothing for the query, which is neither stored nor replaced by an old entry
+				monitor.recordSuccess(source)
+				raise
+			monitor.recordFailure(source)
+			# an expired response is better than none
+			entry=entry or self.fallbackEntry(source,query)
+			if entry is None:
+				raise
+			return entry.payload
+		monitor.recordSuccess(source)
+		if result is NOT_MODIFIED and entry is not None:
+			self.touch(source,query)
+			return entry.payload
+
+		payload, etag, last_modified = result
+		self.put(source,query,payload,etag,last_modified)
+		return payload
+
+	def fetchStream(self,source: str,query: str,loader,field: str):
+		"""
+		Get the response for a query like fetch, but yield the items of one of its lists while they are read.
+
+		The loader gets a dictionary, stores the other fields of the response in it and yields the items of the list.
+		The response is only stored once all items were read. Expired entries and the fallback cache stand in for
+		failed requests as long as no item was yielded yet. Returns the other fields of the response as dictionary.
+		"""
+		entry=self.get(source,query,allow_stale=True)
+		if entry is None or not entry.fresh:
+			if settings["OFFLINE_MODE"] or not monitor.isAvailable(source):
+				entry=entry or self.fallbackEntry(source,query)
+				if entry is None:
+					raise OfflineError(source)
+			else:
+				payload={}
+				items=[]
+				stream=loader(payload)
+				try:
+					for item in stream:
+						items.append(item)
+						yield item
+				except requests.RequestException as error:
+					response=getattr(error,"response",None)
+					if response is not None and 400<=response.status_code<500 and response.status_code!=429:
+						monitor.recordSuccess(source)
+						raise
+					monitor.recordFailure(source)
+					# an expired response is better than none, unless part of the new one was used already
+					entry=entry or self.fallbackEntry(source,query)
+					if entry is None or items!=[]:
+						raise
+				else:
+					monitor.recordSuccess(source)
+					self.put(source,query,{field: items, **payload})
+					return payload
+				finally:
+					stream.close()
+
+		yield from entry.payload.get(field,[])
+		return {key: value for key, value in entry.payload.items() if key!=field}
+
+	def fetchMany(self,source: str,queries: list,loader):
+		"""
+		Get the responses for many queries like fetch, loading all missing or expired ones with a single call of the loader.
+
+		The loader gets the list of queries to load and returns a dictionary of query and payload.
+		Returns a dictionary of query and payload, queries that could neither be loaded nor found in the cache are left out.
+		"""
+		results={}
+		stale={}
+		for query in dict.fromkeys(queries):
+			entry=self.get(source,query,allow_stale=True)
+			if entry is not None and entry.fresh:
+				results[query]=entry.payload
+			else:
+				stale[query]=entry
+
+		if stale=={}:
+			return results
+
+		loaded={}
+		if not settings["OFFLINE_MODE"] and monitor.isAvailable(source):
+			try:
+				loaded=loader(list(stale))
+			except requests.RequestException:
+				monitor.recordFailure(source)
+			else:
+				monitor.recordSuccess(source)
+				for query, payload in loaded.items():
+					self.put(source,query,payload)
+
+		for query, entry in stale.items():
+			if query in loaded:
+				results[query]=loaded[query]
+				continue
+			# an expired response is better than none
+			entry=entry or self.fallbackEntry(source,query)
+			if entry is not None:
+				results[query]=entry.payload
+		return results
+
+	def fallbackEntry(self,source: str,query: str):
+		"""
+		Get the entry for a query from the fallback cache, expired or not. Returns a CacheEntry or None.
+		"""
+		if self.fallback is None:
+			return None
+		return self.fallback.get(source,query,allow_stale=True)
+
+	def hasEntries(self,source: str):
+		"""
+		Check if there are any responses of a source. Returns a boolean.
+		"""
+		return self._cursor().execute("SELECT 1 FROM responses WHERE Source=? LIMIT 1",(source,)).fetchone() is not None
+
+	def clear(self,source: str=None):
+		"""
+		Remove all cached responses, or only those of one source.
+		"""
+		cursor=self._cursor()
+		with cursor.connection:
+			if source is None:
+				cursor.execute("DELETE FROM responses")
+			else:
+				cursor.execute("DELETE FROM responses WHERE Source=?",(source,))
+
+
+# offline mirror of the whole library, filled by mirrorSync
+mirror=ResponseCache(MIRROR_FILE,ttls={},max_bytes=None)
+
+# shared cache for all remote sources
+cache=ResponseCache(fallback=mirror)
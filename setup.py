@@ -21,7 +21,7 @@ DATA_FILES = [
 OPTIONS = {
 	"iconfile": "images/icon.icns",
 	'argv_emulation': True,
-	"packages": ['pandas','pygbif']
+	"packages": ['pandas','requests']
 	
 	}
 
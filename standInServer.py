@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Tue Oct 20 13:48:09 2026
+
+@author: Ronja Rösner
+
+Local stand-in for the GBIF, NCBI and Wikipedia APIs, for testing the sync and the remote searches without internet.
+The answers are made up from the core library and only contain the fields CRYtabia reads.
+
+Start it with
+	python standInServer.py --port 8089
+and point CRYtabia at it with the environment variables it prints.
+"""
+
+import argparse, json, struct, zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+
+from dbConnection import library
+
+# settings pointing CRYtabia at the stand-in, {base} is replaced with its address
+STAND_IN_SETTINGS = {
+	"GBIF_API_URL": "{base}/gbif/v1/",
+	"GBIF_MAP_URL": "{base}/gbif/v2/map/occurrence/",
+	"NCBI_API_URL": "{base}/ncbi/datasets/v2/",
+	"WIKIPEDIA_API_URL": "{base}/wikipedia/{{language}}/w/api.php"
+}
+
+
+# function for making a transparent png with a single occurrence dot, as answer to map requests
+def makePng(size: int=512):
+	rows=bytearray()
+	for y in range(size):
+		rows.append(0)
+		for x in range(size):
+			dot=abs(x-size//2)<4 and abs(y-size//2)<4
+			rows.extend((255, 200, 0, 255) if dot else (0, 0, 0, 0))
+
+	def chunk(kind,data):
+		return struct.pack(">I",len(data))+kind+data+struct.pack(">I",zlib.crc32(kind+data))
+
+	return (b"\x89PNG\r\n\x1a\n"+chunk(b"IHDR",struct.pack(">IIBBBBB",size,size,8,6,0,0,0))
+		+chunk(b"IDAT",zlib.compress(bytes(rows)))+chunk(b"IEND",b""))
+
+
+# function for getting the library entry of a scientific name, accession number or taxon
+def libraryEntry(column: str,value: str):
+	row=library.cursor().execute(
+		f"""SELECT t.ScientificName, t.Authority, t.Vernacular_Eng, t.Vernacular_Ger, t.Kingdom, t.Phylum, t.Class,
+			t.taxOrder, t.Family, t.Genus, i.usageKey, i.AccessionNumber, t.IDX
+		FROM taxonomy t LEFT JOIN ids i ON i.IDX=t.IDX WHERE {column}=? COLLATE NOCASE ORDER BY t.IDX LIMIT 1""",
+		(value,)
+		).fetchone()
+	if row is None:
+		return None
+	keys=["name", "authority", "vernacular_eng", "vernacular_ger", "kingdom", "phylum", "class", "order", "family", "genus", "usageKey", "accession", "idx"]
+	return dict(zip(keys,row))
+
+
+# function for making up the GBIF backbone match of a name
+def gbifMatch(name: str):
+	entry=libraryEntry("t.ScientificName",name)
+	if entry is None:
+		return {"confidence": 100, "matchType": "NONE", "synonym": False}
+
+	match={
+		"usageKey": entry["usageKey"] or 1000000+entry["idx"], "scientificName": f"{entry['name']} {entry['authority'] or ''}".strip(),
+		"canonicalName": entry["name"], "rank": "SPECIES", "status": "ACCEPTED", "confidence": 99, "matchType": "EXACT", "synonym": False
+		}
+	for rank in ["kingdom", "phylum", "class", "order", "family", "genus"]:
+		if entry[rank]:
+			match[rank]=entry[rank]
+	match["species"]=entry["name"]
+	return match
+
+
+# function for making up the NCBI dataset report of an accession number
+def ncbiReport(accession: str):
+	entry=libraryEntry("i.AccessionNumber",accession)
+	if entry is None:
+		return None
+	return {
+		"accession": accession,
+		"organism": {"tax_id": 1000000+entry["idx"], "organism_name": entry["name"], "common_name": entry["vernacular_eng"]},
+		"assembly_info": {"assembly_level": "Chromosome", "biosample": {"attributes": [{"name": "source", "value": "CRYtabia stand-in server"}]}}
+		}
+
+
+# function for making up the dataset reports of all assemblies of a taxon in the library
+def taxonReports(taxon: str):
+	accessions=library.cursor().execute(
+		"""SELECT DISTINCT i.AccessionNumber FROM taxon_closure c JOIN ids i ON i.IDX=c.IDX
+		WHERE c.Name=? COLLATE NOCASE AND i.AccessionNumber!='' ORDER BY i.AccessionNumber""",
+		(taxon,)
+		).fetchall()
+	if accessions==[]:
+		accessions=library.cursor().execute(
+			"SELECT i.AccessionNumber FROM taxonomy t JOIN ids i ON i.IDX=t.IDX WHERE t.ScientificName=? COLLATE NOCASE AND i.AccessionNumber!=''",
+			(taxon,)
+			).fetchall()
+	return [ncbiReport(accession) for (accession,) in accessions]
+
+
+# function for making up the introduction of a Wikipedia page
+def wikiPage(title: str,language: str):
+	entry=libraryEntry("t.ScientificName",title) or libraryEntry("t.Vernacular_Eng" if language=="en" else "t.Vernacular_Ger",title)
+	if entry is None:
+		return {"title": title, "missing": True}
+	vernacular=entry["vernacular_eng"] if language=="en" else entry["vernacular_ger"]
+	return {"title": entry["name"], "extract": f"{entry['name']} ({vernacular or '-'}) is a species of the family {entry['family'] or '-'}."}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+	protocol_version="HTTP/1.1"
+	map_png=makePng()
+
+	def log_message(self,format,*args):
+		pass
+
+	def send(self,status: int,body,content_type: str="application/json"):
+		data=body if isinstance(body,bytes) else json.dumps(body).encode("utf-8")
+		self.send_response(status)
+		self.send_header("Content-Type",content_type)
+		self.send_header("Content-Length",str(len(data)))
+		self.end_headers()
+		self.wfile.write(data)
+
+	# function for splitting reports into pages like the real API, the token is the position of the next report
+	@staticmethod
+	def page(reports: list,params: dict):
+		page_size=int(params.get("page_size",20))
+		start=int(params.get("page_token") or 0)
+		answer={"reports": reports[start:start+page_size], "total_count": len(reports)}
+		if start+page_size<len(reports):
+			answer["next_page_token"]=str(start+page_size)
+		return answer
+
+	def do_HEAD(self):
+		self.send(200,b"")
+
+	def do_GET(self):
+		url=urlparse(self.path)
+		params={key: values[0] for key, values in parse_qs(url.query).items()}
+		path=url.path
+
+		if path=="/gbif/v1/species/match":
+			self.send(200,gbifMatch(params.get("name","")))
+		elif path.startswith("/gbif/v2/map/occurrence/"):
+			self.send(200,self.map_png,"image/png")
+		elif path.startswith("/ncbi/datasets/v2/genome/accession/") and path.endswith("/dataset_report"):
+			accessions=unquote(path.split("/")[-2]).split(",")
+			reports=[report for report in map(ncbiReport,accessions) if report is not None]
+			self.send(200,{"reports": reports, "total_count": len(reports)})
+		elif path.startswith("/ncbi/datasets/v2/genome/taxon/") and path.endswith("/dataset_report"):
+			self.send(200,self.page(taxonReports(unquote(path.split("/")[-2])),params))
+		elif path.startswith("/wikipedia/") and path.endswith("/w/api.php"):
+			language=path.split("/")[2]
+			pages, redirects = {}, []
+			for title in params.get("titles","").split("|"):
+				page=wikiPage(title,language)
+				# vernaculars redirect to the page of the scientific name, like on Wikipedia
+				if page["title"]!=title:
+					redirects.append({"from": title, "to": page["title"]})
+				pages[page["title"]]=page
+			self.send(200,{"batchcomplete": True, "query": {"redirects": redirects, "pages": list(pages.values())}})
+		else:
+			self.send(404,{"error": f"unknown path {path}"})
+
+	def do_POST(self):
+		body=json.loads(self.rfile.read(int(self.headers.get("Content-Length",0))) or b"{}")
+
+		if self.path=="/ncbi/datasets/v2/genome/dataset_report":
+			reports=[report for report in map(ncbiReport,body.get("accessions",[])) if report is not None]
+			self.send(200,self.page(reports,body))
+		else:
+			self.send(404,{"error": f"unknown path {self.path}"})
+
+
+def makeServer(host: str="127.0.0.1",port: int=8089):
+	"""
+	Create the stand-in server. Returns the server and a dictionary of settings pointing CRYtabia at it.
+	"""
+	server=ThreadingHTTPServer((host,port),StandInHandler)
+	base=f"http://{host}:{server.server_address[1]}"
+	return server, {name: value.format(base=base) for name, value in STAND_IN_SETTINGS.items()}
+
+
+if __name__=='__main__':
+	parser=argparse.ArgumentParser(description="Local stand-in for the GBIF, NCBI and Wikipedia APIs.")
+	parser.add_argument("--host",default="127.0.0.1")
+	parser.add_argument("--port",type=int,default=8089)
+	args=parser.parse_args()
+
+	server,stand_in_settings=makeServer(args.host,args.port)
+	print("Stand-in server running, point CRYtabia at it with:")
+	for name, value in stand_in_settings.items():
+		print(f"export CRYTABIA_{name}='{value}'")
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		server.server_close()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Makes the modules of the program importable from the tests and provides a small core library to search.
+"""
+
+import pathlib, sqlite3, sys, threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0,str(pathlib.Path(__file__).resolve().parent.parent))
+
+from config import settings
+from connectivity import monitor
+from dbConnection import library, ConnectionManager
+from dbMigration import migrateDatabase
+from responseCache import cache, mirror
+from standInServer import StandInHandler, STAND_IN_SETTINGS
+
+# entries of the test library as (IDX, Kingdom, Phylum, Class, taxOrder, Family, Genus, ScientificName, Authority,
+# Vernacular_Eng, Vernacular_Ger, AccessionNumber, isMarine, isBrackish, isFresh, isTerrestrial)
+LIBRARY_ROWS = [
+	(0, "Animalia", "Chordata", "Aves", "Charadriiformes", "Scolopacidae", "Calidris", "Calidris alpina", "(Linnaeus, 1758)",
+		"Dunlin", "Alpenstrandläufer", "GCA_000000001.1", 1, 1, 0, 1),
+	(1, "Animalia", "Chordata", "Aves", "Charadriiformes", "Scolopacidae", "Calidris", "Calidris alpina", "(Linnaeus, 1758)",
+		"Dunlin", "Alpenstrandläufer", "GCA_000000002.1", 1, 1, 0, 1),
+	(2, "Animalia", "Chordata", "Aves", "Charadriiformes", "Alcidae", "Alca", "Alca torda", "Linnaeus, 1758",
+		"Razorbill", "Tordalk", "GCA_000000003.1", 1, 0, 0, 0),
+	(3, "Animalia", "Chordata", "Mammalia", "Carnivora", "Canidae", "Canis", "Canis lupus", "Linnaeus, 1758",
+		"Wolf", "Wolf", "GCF_000000004.2", 0, 0, 0, 1),
+	(4, "Plantae", "Tracheophyta", "Magnoliopsida", "Fagales", "Fagaceae", "Fagus", "Fagus sylvatica", "L.",
+		"European beech", "Rotbuche", "", 0, 0, 0, 1)
+]
+
+
+# function for writing the test library the way GeDaMa creates it, without declared types
+def createLibrary(db_file):
+	db_conn=sqlite3.connect(db_file)
+	db_conn.execute("""CREATE TABLE taxonomy (IDX, Kingdom, Phylum, Class, taxOrder, Family, Genus, Species, Subspecies,
+		ScientificName, Authority, Vernacular_Eng, Vernacular_Ger)""")
+	db_conn.execute("CREATE TABLE traits (IDX, isMarine, isBrackish, isFresh, isTerrestrial, isAllWater, isMarineFresh, isExtinct)")
+	db_conn.execute("CREATE TABLE ids (IDX, AccessionNumber, usageKey)")
+	for idx, kingdom, phylum, cls, order, family, genus, sci_name, authority, eng, ger, accession, *habitats in LIBRARY_ROWS:
+		db_conn.execute("INSERT INTO taxonomy VALUES (?, ?, ?, ?, ?, ?, ?, ?, '', ?, ?, ?, ?)",
+			(str(idx), kingdom, phylum, cls, order, family, genus, sci_name.split()[1], sci_name, authority, eng, ger))
+		db_conn.execute("INSERT INTO traits VALUES (?, ?, ?, ?, ?, 0, 0, 0)",(str(idx), *habitats))
+		db_conn.execute("INSERT INTO ids VALUES (?, ?, NULL)",(str(idx), accession))
+	db_conn.commit()
+	db_conn.close()
+
+
+@pytest.fixture
+def library_db(tmp_path,monkeypatch):
+	"""
+	Migrated test library, which the shared connection manager serves while the test runs.
+	"""
+	db_file=tmp_path/"library.db"
+	createLibrary(db_file)
+	migrateDatabase(db_file)
+
+	library.closeAll()
+	monkeypatch.setattr(library,"db_file",db_file)
+	yield db_file
+	library.closeAll()
+
+
+# stand-in server noting the path of every request
+class CountingHandler(StandInHandler):
+	def do_GET(self):
+		self.server.requests.append(("GET", self.path))
+		super().do_GET()
+
+	def do_POST(self):
+		self.server.requests.append(("POST", self.path))
+		super().do_POST()
+
+
+@pytest.fixture
+def stand_in(library_db,tmp_path,monkeypatch):
+	"""
+	Local stand-in for the remote sources, answering from the test library, with empty response caches.
+	The requests it received are listed in its requests attribute.
+	"""
+	for response_cache, name in [(cache, "response_cache.db"), (mirror, "mirror.db")]:
+		monkeypatch.setattr(response_cache,"connections",ConnectionManager(tmp_path/name))
+		monkeypatch.setattr(response_cache,"_created",False)
+	# every source counts as reachable, without probing the real endpoints
+	monkeypatch.setattr(monitor,"isAvailable",lambda source: True)
+	monkeypatch.setitem(settings,"OFFLINE_MODE",False)
+
+	server=ThreadingHTTPServer(("127.0.0.1",0),CountingHandler)
+	server.requests=[]
+	base=f"http://127.0.0.1:{server.server_address[1]}"
+	for name, value in STAND_IN_SETTINGS.items():
+		monkeypatch.setitem(settings,name,value.format(base=base))
+	thread=threading.Thread(target=server.serve_forever,daemon=True)
+	thread.start()
+	yield server
+
+	server.shutdown()
+	server.server_close()
+	cache.connections.closeAll()
+	mirror.connections.closeAll()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the autocomplete indexes and the shared suggestion service.
+"""
+
+import random, sqlite3, time
+
+import pytest
+
+from autoComplete import (Trie, SortedIndex, FuzzyIndex, SuggestionService, SuggestionWorker, SuggestionList, foldedIndex,
+	prefixDistance, foldWord, listChange)
+
+SYLLABLES = ["ca", "li", "dris", "al", "pi", "na", "ac", "ci", "ter", "gen", "ti", "lis", "pa", "rus", "mä", "jor", "lo", "Xi"]
+
+
+# function for making up names from syllables
+def makeWords(size: int,seed: int=0):
+	generator=random.Random(seed)
+	words=set()
+	while len(words)<size:
+		words.add("".join(generator.choice(SYLLABLES) for _ in range(generator.randint(2,4)))+" "+
+			"".join(generator.choice(SYLLABLES) for _ in range(2)))
+	return sorted(words)
+
+
+# function for adding one typo to the beginning of a word, the first character is kept
+def makeTypo(word: str,length: int,generator: random.Random):
+	query=list(word[:length])
+	position=generator.randrange(1,len(query)-1)
+	typo=generator.randrange(4)
+	if typo==0:
+		query[position]=generator.choice("abcdrlx")
+	elif typo==1:
+		query[position], query[position+1] = query[position+1], query[position]
+	elif typo==2:
+		del query[position]
+	else:
+		query.insert(position,"e")
+	return "".join(query)
+
+
+# function for finding the matches of a query by comparing it with every word
+def bruteForce(words: list,query: str,max_distance: int):
+	key=foldWord(query)
+	return {word for word in words if prefixDistance(key,foldWord(word),max_distance)<=max_distance
+		# short queries are only compared with the words starting with the same character
+		and (len(key)>4 or foldWord(word)[0]==key[0])}
+
+
+@pytest.fixture(scope="module")
+def words():
+	return makeWords(1000)
+
+
+@pytest.fixture(scope="module")
+def index(words):
+	return FuzzyIndex(words)
+
+
+@pytest.mark.parametrize("length", [4, 5, 7, 9, 10, 14])
+def test_search_matches_brute_force(words,index,length):
+	generator=random.Random(length)
+	for word in generator.sample(words,60):
+		query=makeTypo(word,min(length,len(word)),generator)
+		key=foldWord(query)
+		if len(key)<4:
+			# names shorter than four characters are only suggested without typos
+			assert index.search(query)==[], query
+			continue
+		max_distance=1 if len(key)<10 else 2
+		assert set(index.search(query))==bruteForce(words,query,max_distance), query
+
+
+def test_short_query_with_typo():
+	index=FuzzyIndex(["Calidris alpina", "Calidris canutus", "Accipiter gentilis"])
+	assert index.search("Cail")==["Calidris alpina", "Calidris canutus"]
+	assert index.search("Acic")==["Accipiter gentilis"]
+	assert index.search("Cal")==[]
+
+
+def test_search_ignores_case_and_diacritics():
+	index=FuzzyIndex(["Parus major", "Mäusebussard"])
+	assert index.search("PARSU")==["Parus major"]
+	assert index.search("mausbe")==["Mäusebussard"]
+
+
+def test_delete():
+	index=FuzzyIndex(["Calidris alpina", "Calidris canutus"])
+	index.delete("Calidris alpina")
+	assert index.search("Caildris")==["Calidris canutus"]
+
+
+@pytest.mark.parametrize("fold", [None, foldWord])
+def test_sorted_index_pages(words,fold):
+	index=SortedIndex(words,fold=fold)
+	everything=index.search("ca")
+	assert everything==[word for word in index.words if (fold or str)(word).startswith("ca")]
+	pages=[index.search("ca",7,offset) for offset in range(0,len(everything),7)]
+	assert [word for page in pages for word in page]==everything
+	assert index.search("ca",7,len(everything))==[]
+
+
+def test_sorted_index_pages_without_excluded_words(words):
+	index=SortedIndex(words)
+	everything=index.search("pa")
+	exclude=set(everything[::3])
+	rest=[word for word in everything if word not in exclude]
+	# the offset counts the shown words only, excluded words of other prefixes don't move the page
+	exclude.add(index.search("li",1)[0])
+	for offset in range(0,len(rest),5):
+		assert index.search("pa",5,offset,exclude=exclude)==rest[offset:offset+5]
+	assert index.search("pa",exclude=exclude)==rest
+
+
+def test_sorted_index_matches_trie(words):
+	index, trie = SortedIndex(words), Trie(words)
+	for prefix in ["", "c", "ca", "cali", "Xi", "zz"]:
+		assert index.search(prefix,10,3)==trie.search(prefix,10,3)
+
+
+def test_sorted_index_edits():
+	index=foldedIndex(["Mäusebussard", "Calidris alpina"])
+	index.insert("calidris canutus")
+	index.insert("Calidris alpina")
+	assert len(index)==3
+	assert index.search("MAUSE")==["Mäusebussard"]
+	assert index.search("cal")==["Calidris alpina", "calidris canutus"]
+	index.delete("Calidris alpina")
+	assert index.search("cal")==["calidris canutus"]
+
+
+@pytest.fixture
+def service(library_db,tmp_path):
+	return SuggestionService(usage_file=tmp_path/"usage.json")
+
+
+def test_service_applies_edits_after_mark_stale(library_db,service):
+	assert service.search("Scientific Name","ca")==["Calidris alpina", "Canis lupus"]
+	db_conn=sqlite3.connect(library_db)
+	with db_conn:
+		db_conn.execute("UPDATE taxonomy SET ScientificName='Canis aureus' WHERE IDX=3")
+	# the log is only read again once the database was reported as changed
+	assert service.search("Scientific Name","ca")==["Calidris alpina", "Canis lupus"]
+	service.markStale()
+	assert service.search("Scientific Name","ca")==["Calidris alpina", "Canis aureus"]
+	db_conn.close()
+
+
+def test_service_ranks_searched_words_first(service):
+	service.recordSelection("Free Text","wolf")
+	service.recordSelection("Free Text","Dunlin")
+	service.recordSelection("Free Text","Dunlin")
+	# words missing from the library are not remembered
+	service.recordSelection("Free Text","Werewolf")
+	assert service.search("Free Text","")[:2]==["Dunlin", "Wolf"]
+	assert service.search("Free Text","w")==["Wolf"]
+	service.saveUsage()
+	assert set(SuggestionService(usage_file=service.usage_file)._usage["Free Text"])=={"Dunlin", "Wolf"}
+
+
+def test_service_pages_ranked_and_other_words(service):
+	service.recordSelection("Scientific Name","canis lupus")
+	assert service.search("Scientific Name","",limit=2)==["Canis lupus", "Alca torda"]
+	# the searched word is not shown a second time among the others
+	assert service.search("Scientific Name","",limit=2,offset=2)==["Calidris alpina", "Fagus sylvatica"]
+	assert service.search("Scientific Name","",limit=2,offset=4)==[]
+
+
+# function for waiting until the worker searched a request, like the interface polls for it
+def waitForResult(worker,number: int,timeout: float=5):
+	deadline=time.monotonic()+timeout
+	while time.monotonic()<deadline:
+		change=worker.result(number)
+		if change is not None:
+			return change
+		time.sleep(0.01)
+	raise TimeoutError(number)
+
+
+@pytest.fixture
+def searches(service,monkeypatch):
+	"""
+	Prefixes the service was asked for, in order.
+	"""
+	searches=[]
+	search=service.search
+	monkeypatch.setattr(service,"search",lambda mode, prefix, **kwargs: searches.append(prefix) or search(mode,prefix,**kwargs))
+	return searches
+
+
+def test_list_change():
+	assert listChange(["a", "b", "c"],["a", "b", "d", "e"])==(2, ["d", "e"])
+	assert listChange(["a", "b"],["a"])==(1, [])
+	assert listChange([],["a"])==(0, ["a"])
+	assert listChange(["a"],["b"])==(0, ["b"])
+
+
+def test_worker_waits_for_typing_pause(service,searches):
+	worker=SuggestionWorker(service,delay=0.1)
+	numbers=[worker.request("Scientific Name",prefix) for prefix in ["c", "ca", "can"]]
+	assert waitForResult(worker,numbers[-1])==(0, ["Canis lupus"])
+	# only the prefix typed last is searched, the replaced requests are dropped
+	assert searches==["can"]
+	assert [worker.result(number) for number in numbers[:-1]]==[False, False]
+	worker.close()
+
+
+def test_worker_narrows_longer_prefixes(library_db,service,searches):
+	worker=SuggestionWorker(service,delay=0)
+	assert waitForResult(worker,worker.request("Scientific Name","ca"))==(0, ["Calidris alpina", "Canis lupus"])
+	# the listbox keeps the first word and drops the other
+	assert waitForResult(worker,worker.request("Scientific Name","cal"))==(1, [])
+	assert searches==["ca"]
+
+	# a changed database is searched again
+	db_conn=sqlite3.connect(library_db)
+	with db_conn:
+		db_conn.execute("UPDATE taxonomy SET ScientificName='Calidris canutus' WHERE IDX=3")
+	db_conn.close()
+	service.markStale()
+	assert waitForResult(worker,worker.request("Scientific Name","cali"))==(1, ["Calidris canutus"])
+	assert searches==["ca", "cali"]
+	worker.close()
+
+
+# stand-in for the entry field and the listbox, with the methods of the tkinter widgets the suggestion list uses
+class Widget:
+	def __init__(self,words=()):
+		self.words=list(words)
+		self.bindings={}
+		self.selection=()
+
+	def bind(self,event,callback):
+		self.bindings[event]=callback
+
+	def config(self,yscrollcommand):
+		self.bindings["scroll"]=yscrollcommand
+
+	def get(self,index=None):
+		return "".join(self.words) if index is None else self.words[index]
+
+	def delete(self,first,last):
+		del self.words[first:]
+
+	def insert(self,index,*words):
+		self.words[len(self.words) if index=="end" else index:]=words
+
+	def curselection(self):
+		return self.selection
+
+	def after(self,milliseconds,callback):
+		time.sleep(milliseconds/1000)
+		callback()
+
+
+def test_suggestion_list_fills_listbox(service):
+	entry, listbox = Widget(["ca"]), Widget()
+	suggestion_list=SuggestionList(entry,listbox,"Scientific Name",service)
+	suggestion_list.worker.delay=0
+	entry.bindings["<KeyRelease>"](None)
+	assert listbox.words==["Calidris alpina", "Canis lupus"]
+	# a listbox whose last page isn't full has nothing more to load
+	listbox.bindings["scroll"]("0.0","1.0")
+	assert listbox.words==["Calidris alpina", "Canis lupus"]
+
+	listbox.selection=(1,)
+	listbox.bindings["<Double-1>"](None)
+	assert entry.words==["Canis lupus"]
+	listbox.bindings["<Destroy>"](None)
+	assert suggestion_list.worker.result(1) is False
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the headless batch searches.
+"""
+
+import io, json, threading, time
+
+import batchSearch
+from batchSearch import readQueries, readChunks, runBatch
+
+
+# output stream noting when each line was written
+class Output(io.StringIO):
+	def __init__(self):
+		super().__init__()
+		self.written=threading.Event()
+
+	def write(self,text):
+		self.written.set()
+		return super().write(text)
+
+	def rows(self):
+		return [json.loads(line) for line in self.getvalue().splitlines()]
+
+
+def test_read_queries_skips_comments():
+	assert list(readQueries(io.StringIO("Alca torda\n\n# birds\n  Canis lupus \n")))==["Alca torda", "Canis lupus"]
+
+
+def test_read_chunks_keeps_order_and_size():
+	chunks=list(readChunks(iter(str(number) for number in range(100)),chunk_size=8))
+	assert [query for chunk in chunks for query in chunk]==[str(number) for number in range(100)]
+	assert max(len(chunk) for chunk in chunks)<=8
+
+
+def test_results_in_input_order(library_db):
+	output=io.StringIO()
+	queries=["Canis lupus", "Homo sapiens", "calidris alpina", "Alca torda"]
+	assert runBatch(iter(queries),"Scientific Name",["table"],output,chunk_size=2)==4
+	lines=[line.split("\t") for line in output.getvalue().splitlines()]
+	assert lines[0][:4]==["query", "selection", "found", "scientific_name"]
+	assert [(line[0], line[2], line[3]) for line in lines[1:]]==[
+		("Canis lupus", "True", "Canis lupus"), ("Homo sapiens", "False", ""),
+		("calidris alpina", "True", "Calidris alpina"), ("Alca torda", "True", "Alca torda")
+		]
+
+
+def test_results_are_written_before_the_input_ends(library_db):
+	output=Output()
+	seen=[]
+
+	# input that only continues once the result of its first query was written, like a person typing into stdin
+	def queries():
+		yield "Canis lupus"
+		seen.append(output.written.wait(5))
+		yield "Alca torda"
+
+	runBatch(queries(),"Scientific Name",["table"],output,"jsonl")
+	assert seen==[True]
+	assert [row["scientific_name"] for row in output.rows()]==["Canis lupus", "Alca torda"]
+
+
+def test_slow_remote_lookup_does_not_hold_back_order(library_db,monkeypatch):
+	started=time.monotonic()
+	written={}
+
+	# function standing in for the remote search, the first query is much slower than the others
+	def remoteText(source,query,selection):
+		time.sleep(0.3 if query=="Canis lupus" else 0.01)
+		return f"{source} text for {query}"
+
+	class TimedOutput(Output):
+		def write(self,text):
+			written[json.loads(text)["query"]]=time.monotonic()-started
+			return super().write(text)
+
+	monkeypatch.setattr(batchSearch,"safeRemoteText",remoteText)
+	output=TimedOutput()
+	runBatch(iter(["Canis lupus", "Alca torda", "Fagus sylvatica"]),"Scientific Name",["table", "GBIF"],output,"jsonl",workers=3)
+	rows=output.rows()
+	assert [row["query"] for row in rows]==["Canis lupus", "Alca torda", "Fagus sylvatica"]
+	assert rows[1]["GBIF"]=="GBIF text for Alca torda"
+	# the results after the slow one were searched meanwhile and follow it right away
+	assert written["Fagus sylvatica"]-written["Canis lupus"]<0.1
+
+
+def test_tsv_escapes_tabs_and_line_breaks(library_db,monkeypatch):
+	monkeypatch.setattr(batchSearch,"safeRemoteText",lambda source,query,selection: "line\tone\nline two")
+	output=io.StringIO()
+	runBatch(iter(["Alca torda"]),"Scientific Name",["GBIF"],output)
+	assert output.getvalue().splitlines()[1].split("\t")[-1]=="line\\tone\\nline two"
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the connectivity monitor and its circuit breakers.
+"""
+
+import pytest
+import requests
+
+import connectivity
+from connectivity import ConnectivityMonitor, FAILURE_THRESHOLD, COOLDOWN
+
+
+# clock standing in for the time module, only moved on by the tests
+class Clock:
+	def __init__(self):
+		self.now=1000.0
+
+	def monotonic(self):
+		return self.now
+
+
+# client standing in for the HTTP client, counting the probes of every endpoint
+class Client:
+	def __init__(self):
+		self.online=True
+		self.probes=[]
+
+	def head(self,url,**kwargs):
+		self.probes.append(url)
+		if not self.online:
+			raise requests.ConnectionError("unreachable")
+
+
+@pytest.fixture
+def clock(monkeypatch):
+	clock=Clock()
+	monkeypatch.setattr(connectivity,"time",clock)
+	return clock
+
+
+@pytest.fixture
+def client(monkeypatch):
+	client=Client()
+	monkeypatch.setattr(connectivity,"client",client)
+	return client
+
+
+@pytest.fixture
+def monitor(clock,client,monkeypatch):
+	monitor=ConnectivityMonitor({"GBIF": "https://gbif.test", "NCBI": "https://ncbi.test"},ttl=60)
+	# background probes run right away, so the tests don't depend on threads
+	monkeypatch.setattr(monitor,"_probeInBackground",monitor.probe)
+	return monitor
+
+
+def test_probe_results_are_cached(monitor,client,clock):
+	assert monitor.isAvailable("GBIF")
+	assert monitor.isAvailable("GBIF")
+	assert client.probes==["https://gbif.test"]
+
+	# an outdated result is probed again
+	client.online=False
+	clock.now+=61
+	assert not monitor.isAvailable("GBIF")
+	assert len(client.probes)==2
+
+
+def test_failures_open_the_circuit_breaker(monitor,client,clock):
+	assert monitor.isAvailable("NCBI")
+	for _ in range(FAILURE_THRESHOLD-1):
+		monitor.recordFailure("NCBI")
+	assert monitor.isAvailable("NCBI")
+	monitor.recordFailure("NCBI")
+	assert not monitor.isAvailable("NCBI")
+	assert monitor.retryIn("NCBI")==COOLDOWN
+	# the other sources are not affected
+	assert monitor.isAvailable("GBIF")
+
+	# after the cooldown one request is let through, a single failure opens the breaker again
+	clock.now+=COOLDOWN+1
+	assert monitor.isAvailable("NCBI")
+	monitor.recordFailure("NCBI")
+	assert not monitor.isAvailable("NCBI")
+
+
+def test_success_closes_the_circuit_breaker(monitor,clock):
+	for _ in range(FAILURE_THRESHOLD):
+		monitor.recordFailure("GBIF")
+	assert not monitor.isAvailable("GBIF")
+	monitor.recordSuccess("GBIF")
+	assert monitor.isAvailable("GBIF")
+	assert monitor.retryIn("GBIF")==0
+
+
+def test_online_if_any_source_is_available(monitor,client):
+	client.online=False
+	assert not monitor.isOnline()
+	monitor.recordSuccess("NCBI")
+	assert monitor.isOnline()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the connection manager and its in-memory snapshot of the database.
+"""
+
+import sqlite3, threading, time
+
+import pytest
+
+import dbConnection
+from dbConnection import ConnectionManager
+
+
+@pytest.fixture
+def db_file(tmp_path):
+	db_file=tmp_path/"library.db"
+	db_conn=sqlite3.connect(db_file)
+	db_conn.execute("CREATE TABLE taxonomy (IDX INTEGER PRIMARY KEY, ScientificName TEXT)")
+	db_conn.execute("INSERT INTO taxonomy VALUES (1, 'Alca torda')")
+	db_conn.commit()
+	db_conn.close()
+	return db_file
+
+
+@pytest.fixture
+def manager(db_file):
+	manager=ConnectionManager(db_file)
+	yield manager
+	manager.closeAll()
+
+
+# function for counting the entries through the read-only connection of the current thread
+def count(manager):
+	return manager.cursor().execute("SELECT COUNT(*) FROM taxonomy").fetchone()[0]
+
+
+# function for adding an entry through a connection of its own, like GeDaMa does
+def addEntry(db_file,idx: int):
+	db_conn=sqlite3.connect(db_file)
+	with db_conn:
+		db_conn.execute("INSERT INTO taxonomy VALUES (?, 'Canis lupus')",(idx,))
+	db_conn.close()
+
+
+def test_connections_are_pooled_per_thread(manager):
+	db_conn=manager.getConnection()
+	assert manager.getConnection() is db_conn
+	assert manager.getConnection(readonly=False) is not db_conn
+
+	others=[]
+	thread=threading.Thread(target=lambda: others.append(manager.getConnection()))
+	thread.start()
+	thread.join()
+	assert others[0] is not db_conn
+
+
+def test_read_only_connections_cannot_write(manager):
+	with pytest.raises(sqlite3.OperationalError):
+		manager.getConnection().execute("DELETE FROM taxonomy")
+
+
+def test_database_is_switched_to_wal(manager,db_file):
+	manager.getConnection()
+	db_conn=sqlite3.connect(db_file)
+	assert db_conn.execute("PRAGMA journal_mode").fetchone()[0]=="wal"
+	db_conn.close()
+
+
+def test_close_all_reopens_connections(manager):
+	db_conn=manager.getConnection()
+	manager.closeAll()
+	with pytest.raises(sqlite3.ProgrammingError):
+		db_conn.execute("SELECT 1")
+	assert count(manager)==1
+
+
+def test_snapshot_serves_lookups_from_memory(manager):
+	manager.enableSnapshot()
+	db_conn=manager.getConnection()
+	# the main database of an in-memory connection has no file
+	assert db_conn.execute("PRAGMA database_list").fetchone()[2]==""
+	assert count(manager)==1
+	with pytest.raises(sqlite3.OperationalError):
+		db_conn.execute("DELETE FROM taxonomy")
+
+
+def test_snapshot_follows_own_writes_at_once(manager):
+	manager.enableSnapshot()
+	assert count(manager)==1
+	db_conn=manager.getConnection(readonly=False)
+	with db_conn:
+		db_conn.execute("INSERT INTO taxonomy VALUES (2, 'Canis lupus')")
+	assert count(manager)==2
+
+
+def test_snapshot_checks_for_outside_changes_once_per_interval(manager,db_file,monkeypatch):
+	monkeypatch.setattr(dbConnection,"SNAPSHOT_CHECK_INTERVAL",0.2)
+	manager.enableSnapshot()
+	checks=[]
+	file_state=manager._fileState
+	monkeypatch.setattr(manager,"_fileState",lambda: checks.append(1) or file_state())
+
+	addEntry(db_file,2)
+	for _ in range(100):
+		assert count(manager)==1
+	assert len(checks)<=1
+
+	time.sleep(0.25)
+	assert count(manager)==2
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the migrations of the core database and the triggers keeping the derived tables up to date.
+"""
+
+import sqlite3
+
+import pytest
+
+from conftest import createLibrary
+import dbMigration
+from dbMigration import MIGRATIONS, migrateDatabase, tableColumns
+import libraryStats
+
+
+@pytest.fixture
+def db_conn(library_db):
+	db_conn=sqlite3.connect(library_db)
+	yield db_conn
+	db_conn.close()
+
+
+# function for adding an entry to the taxonomy, traits and ids tables
+def addEntry(db_conn,idx: int,cls: str,order: str,family: str,genus: str,sci_name: str,vernacular: str,accession: str):
+	with db_conn:
+		db_conn.execute("""INSERT INTO taxonomy (IDX, Kingdom, Phylum, Class, taxOrder, Family, Genus, ScientificName, Vernacular_Eng)
+			VALUES (?, 'Animalia', 'Chordata', ?, ?, ?, ?, ?, ?)""",(idx, cls, order, family, genus, sci_name, vernacular))
+		db_conn.execute("INSERT INTO traits (IDX, isMarine, isBrackish, isFresh, isTerrestrial) VALUES (?, 0, 0, 1, 0)",(idx,))
+		db_conn.execute("INSERT INTO ids (IDX, AccessionNumber) VALUES (?, ?)",(idx, accession))
+
+
+# function for getting the number of descendants of every taxon of a rank
+def descendants(db_conn,rank: str):
+	return dict(db_conn.execute("SELECT Name, Descendants FROM taxon_nodes WHERE Rank=?",(rank,)))
+
+
+def freeText(db_conn,query: str):
+	return [row[0] for row in db_conn.execute("SELECT rowid FROM taxonomy_fts WHERE taxonomy_fts MATCH ? ORDER BY rowid",(query,))]
+
+
+def test_all_migrations_run_once(library_db,db_conn):
+	assert db_conn.execute("PRAGMA user_version").fetchone()[0]==len(MIGRATIONS)
+	# a migrated database is left as it is
+	assert migrateDatabase(library_db)==len(MIGRATIONS)
+
+
+def test_typed_schema(db_conn):
+	assert dict(tableColumns(db_conn,"taxonomy"))["ScientificName"]=="TEXT"
+	# IDX is the integer primary key, the rowid of the table
+	assert [row[1] for row in db_conn.execute("PRAGMA table_info(taxonomy)") if row[5]==1]==["IDX"]
+	assert dict(tableColumns(db_conn,"ids"))["usageKey"]=="INTEGER"
+	# the indices written as text are stored as integers
+	assert db_conn.execute("SELECT typeof(IDX) FROM taxonomy LIMIT 1").fetchone()[0]=="integer"
+	indexes={row[1] for row in db_conn.execute("PRAGMA index_list(taxonomy)")}
+	assert {"idx_taxonomy_ScientificName", "idx_taxonomy_Genus"}<=indexes
+	# names are looked up without regard to case through indexes of their own
+	assert "idx_taxonomy_ScientificName_nocase" in indexes
+
+
+def test_failed_step_leaves_database_untouched(tmp_path,monkeypatch):
+	db_file=tmp_path/"broken.db"
+	createLibrary(db_file)
+	db_conn=sqlite3.connect(db_file)
+
+	# function standing in for a migration step that fails halfway
+	def broken(cursor):
+		cursor.execute("CREATE TABLE half_done (Id)")
+		cursor.execute("SELECT * FROM missing_table")
+
+	monkeypatch.setattr(dbMigration,"MIGRATIONS",[dbMigration.typedSchema, broken])
+	assert migrateDatabase(db_file)==1
+	assert db_conn.execute("PRAGMA user_version").fetchone()[0]==1
+	assert db_conn.execute("SELECT name FROM sqlite_master WHERE name='half_done'").fetchone() is None
+	db_conn.close()
+
+
+def test_full_text_index_follows_edits(db_conn):
+	assert freeText(db_conn,"dunlin")==[0, 1]
+	# diacritics are ignored
+	assert freeText(db_conn,"alpenstrandlaufer")==[0, 1]
+
+	addEntry(db_conn,10,"Aves","Passeriformes","Paridae","Parus","Parus major","Great tit","GCA_000000010.1")
+	assert freeText(db_conn,"tit")==[10]
+	with db_conn:
+		db_conn.execute("UPDATE taxonomy SET Vernacular_Eng='Great titmouse' WHERE IDX=10")
+	assert freeText(db_conn,"tit")==[]
+	assert freeText(db_conn,"titmouse")==[10]
+	with db_conn:
+		db_conn.execute("DELETE FROM taxonomy WHERE IDX=10")
+	assert freeText(db_conn,"titmouse")==[]
+
+
+def test_closure_follows_edits(db_conn):
+	assert descendants(db_conn,"Class")=={"Aves": 3, "Mammalia": 1, "Magnoliopsida": 1}
+	assert db_conn.execute("SELECT Parent FROM taxon_nodes WHERE Name='Scolopacidae'").fetchone()[0]=="Charadriiformes"
+
+	addEntry(db_conn,10,"Aves","Passeriformes","Paridae","Parus","Parus major","Great tit","GCA_000000010.1")
+	assert descendants(db_conn,"Class")["Aves"]==4
+	assert descendants(db_conn,"taxOrder")["Passeriformes"]==1
+	members=[row[0] for row in db_conn.execute("SELECT IDX FROM taxon_closure WHERE Name='Aves' ORDER BY IDX")]
+	assert members==[0, 1, 2, 10]
+
+	# moving an entry to another class moves it in the closure as well
+	with db_conn:
+		db_conn.execute("UPDATE taxonomy SET Class='Mammalia' WHERE IDX=10")
+	assert descendants(db_conn,"Class")=={"Aves": 3, "Mammalia": 2, "Magnoliopsida": 1}
+
+	# taxa without descendants are removed
+	with db_conn:
+		db_conn.execute("DELETE FROM taxonomy WHERE IDX=10")
+	assert "Passeriformes" not in descendants(db_conn,"taxOrder")
+	assert db_conn.execute("SELECT COUNT(*) FROM taxon_closure WHERE IDX=10").fetchone()[0]==0
+
+
+def test_statistics_are_marked_stale(library_db,db_conn):
+	assert libraryStats.refreshStatistics()
+	assert db_conn.execute("SELECT Stale FROM stats_state").fetchone()[0]==0
+	# up to date statistics are not calculated again
+	assert not libraryStats.refreshStatistics()
+
+	# usageKeys are written in the background and don't change the statistics
+	with db_conn:
+		db_conn.execute("UPDATE ids SET usageKey=2481115 WHERE IDX=2")
+	assert db_conn.execute("SELECT Stale FROM stats_state").fetchone()[0]==0
+
+	with db_conn:
+		db_conn.execute("UPDATE traits SET isFresh=1 WHERE IDX=3")
+	assert db_conn.execute("SELECT Stale FROM stats_state").fetchone()[0]==1
+	assert libraryStats.refreshStatistics()
+
+	ranks=libraryStats.getStatistics()["ranks"]
+	assert ("Aves", 2, 3, 2) in ranks["Class"]
+
+
+def test_statistics_totals_are_stored(library_db,db_conn):
+	assert libraryStats.getStatistics()["totals"]=={"entries": 5, "species": 4, "accessions": 4}
+	assert db_conn.execute("SELECT Entries, Species, Accessions FROM stats_totals").fetchone()==(5, 4, 4)
+
+	with db_conn:
+		db_conn.execute("UPDATE ids SET AccessionNumber='' WHERE IDX=3")
+	assert libraryStats.getStatistics()["totals"]["accessions"]==3
+
+
+def test_suggestion_log_follows_edits(db_conn):
+	assert db_conn.execute("SELECT COUNT(*) FROM suggestion_log").fetchone()[0]==0
+
+	addEntry(db_conn,10,"Aves","Passeriformes","Paridae","Parus","Parus major","Great tit","GCA_000000010.1")
+	logged=db_conn.execute("SELECT Mode, Word, Change FROM suggestion_log").fetchall()
+	assert ("Scientific Name", "Parus major", 1) in logged
+	assert ("Free Text", "Great tit", 1) in logged
+	assert ("Taxon Group", "Paridae", 1) in logged
+	assert ("Accession Number", "GCA_000000010.1", 1) in logged
+	assert ("Genome Index", "10", 1) in logged
+
+	with db_conn:
+		db_conn.execute("DELETE FROM suggestion_log")
+		db_conn.execute("UPDATE taxonomy SET ScientificName='Parus minor' WHERE IDX=10")
+	logged=db_conn.execute("SELECT Mode, Word, Change FROM suggestion_log WHERE Mode='Scientific Name'").fetchall()
+	assert logged==[("Scientific Name", "Parus major", -1), ("Scientific Name", "Parus minor", 1)]
+
+	with db_conn:
+		db_conn.execute("DELETE FROM suggestion_log")
+		db_conn.execute("DELETE FROM ids WHERE IDX=10")
+	logged=db_conn.execute("SELECT Mode, Word, Change FROM suggestion_log").fetchall()
+	assert sorted(logged)==[("Accession Number", "GCA_000000010.1", -1), ("Genome Index", "10", -1)]
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the GBIF backbone matching of the library names, against the stand-in server.
+"""
+
+import sqlite3
+
+import pytest
+
+import gbifKeys
+from dbConnection import library
+from gbifKeys import resolveUsageKeys, startResolution, storeMatches
+
+
+@pytest.fixture
+def db_conn(library_db):
+	db_conn=sqlite3.connect(library_db)
+	yield db_conn
+	db_conn.close()
+
+
+# function for getting the usageKeys of the entries of a name
+def usageKeys(db_conn,sci_name: str):
+	return [row[0] for row in db_conn.execute(
+		"SELECT i.usageKey FROM ids i JOIN taxonomy t ON t.IDX=i.IDX WHERE t.ScientificName=? ORDER BY i.IDX",(sci_name,)
+		)]
+
+
+def test_exact_matches_replace_curated_keys(db_conn):
+	with db_conn:
+		db_conn.execute("UPDATE ids SET usageKey=1 WHERE IDX IN (2, 3)")
+	storeMatches([
+		("Alca torda", {"usageKey": 2481115, "matchType": "EXACT", "rank": "SPECIES", "canonicalName": "Alca torda"}),
+		("Canis lupus", {"usageKey": 5219173, "matchType": "FUZZY", "rank": "SPECIES", "canonicalName": "Canis lupus"}),
+		("Fagus sylvatica", {"usageKey": 2882316, "matchType": "FUZZY", "rank": "SPECIES", "canonicalName": "Fagus sylvatica"})
+		])
+	assert usageKeys(db_conn,"Alca torda")==[2481115]
+	# fuzzy matches only fill in missing keys
+	assert usageKeys(db_conn,"Canis lupus")==[1]
+	assert usageKeys(db_conn,"Fagus sylvatica")==[2882316]
+	assert db_conn.execute("SELECT usageKey, MatchType FROM gbif_matches WHERE ScientificName='Canis lupus'").fetchone()==(5219173, "FUZZY")
+
+
+def test_names_are_resolved_once(stand_in,db_conn):
+	done=[]
+	assert resolveUsageKeys(workers=2,progress=lambda number, total: done.append((number, total)))==4
+	assert done[-1]==(4, 4)
+	assert usageKeys(db_conn,"Calidris alpina")==[1000000, 1000000]
+	assert len(stand_in.requests)==4
+
+	# only names without a match are resolved again
+	with db_conn:
+		db_conn.execute("DELETE FROM gbif_matches WHERE ScientificName='Alca torda'")
+	assert resolveUsageKeys()==1
+
+
+def test_matches_are_written_in_one_transaction(stand_in,monkeypatch):
+	writes=[]
+	monkeypatch.setattr(gbifKeys,"storeMatches",writes.append)
+	resolveUsageKeys()
+	assert [len(matches) for matches in writes]==[4]
+
+
+def test_resolution_only_starts_for_unmatched_names(stand_in):
+	startResolution().join(5)
+	assert library.cursor().execute("SELECT COUNT(*) FROM gbif_matches").fetchone()[0]==4
+	assert startResolution() is None
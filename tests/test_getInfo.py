@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the texts prepared from the core library and the remote sources.
+"""
+
+import threading, time
+
+import requests
+
+import getInfo
+from getInfo import SearchDatabase, tableText, safeRemoteText, startRemoteTexts
+
+
+def test_free_text_results_are_paged(library_db):
+	search=SearchDatabase("animalia","Free Text")
+	results,total,has_more=search.getFreeTextResults(0,page_size=2)
+	assert (len(results), total, has_more)==(2, 3, True)
+	results,total,has_more=search.getFreeTextResults(1,page_size=2)
+	assert (len(results), total, has_more)==(1, 3, False)
+	assert search.getFreeTextResults(2,page_size=2)==([], 3, False)
+
+
+def test_free_text_table_text(library_db):
+	text,has_more=tableText("dunlin","Free Text")
+	assert "1 species in table matching dunlin, showing 1-1" in text
+	assert "Calidris alpina (Dunlin, Alpenstrandläufer)" in text
+	assert not has_more
+	# a page after the last one says so and starts over
+	text,has_more=tableText("dunlin","Free Text",page=1)
+	assert text.startswith("\nAll 1 species") and not has_more
+	assert tableText("homo","Free Text")==("\nNo information on free text homo available from reference table.\n", False)
+
+
+def test_taxon_group_text(library_db):
+	assert SearchDatabase("aves","Taxon Group").getTaxgroupCount()==3
+	text,has_more=tableText("aves","Taxon Group")
+	assert text=="\n3 species found in table belonging to class Aves:\nCalidris alpina, Calidris alpina, Alca torda\n"
+	assert SearchDatabase("Homo","Taxon Group").getTaxgroupCount()==0
+	assert tableText("Homo","Taxon Group")[0]=="\nNo information on taxon group Homo available from reference table.\n"
+
+
+# function standing in for a remote source, waiting until all sources were started
+def waitingSource(started: threading.Barrier,text: str):
+	def source(query,selection):
+		started.wait(5)
+		return f"{text} for {query}"
+	return source
+
+
+def test_remote_sources_are_searched_at_the_same_time(monkeypatch):
+	started=threading.Barrier(3)
+	for source in ["GBIF", "NCBI", "Wikipedia"]:
+		monkeypatch.setitem(getInfo.REMOTE_SOURCES,source,waitingSource(started,source))
+	# each source only returns once all three run
+	collect=startRemoteTexts(["GBIF", "NCBI", "Wikipedia"],"Alca torda","Scientific Name")
+	assert collect()=={"GBIF": "GBIF for Alca torda", "NCBI": "NCBI for Alca torda", "Wikipedia": "Wikipedia for Alca torda"}
+
+
+def test_slow_source_does_not_hold_up_the_others(monkeypatch):
+	release=threading.Event()
+
+	def stuck(query,selection):
+		release.wait(5)
+		return "too late"
+
+	monkeypatch.setattr(getInfo,"COLLECT_GRACE",0.1)
+	monkeypatch.setitem(getInfo.REMOTE_SOURCES,"GBIF",stuck)
+	monkeypatch.setitem(getInfo.REMOTE_SOURCES,"Wikipedia",lambda query,selection: "summary")
+	start=time.monotonic()
+	results=startRemoteTexts(["GBIF", "Wikipedia"],"Alca torda","Scientific Name",{"GBIF": 0.2, "Wikipedia": 0.2})()
+	release.set()
+	assert time.monotonic()-start<1
+	assert results["Wikipedia"]=="summary"
+	assert results["GBIF"]=="\n!! GBIF did not answer within 0.2 seconds, search cancelled. !!\n"
+
+
+def test_errors_become_messages(monkeypatch):
+	def timedOut(query,selection):
+		raise requests.Timeout()
+
+	def broken(query,selection):
+		raise ValueError("unexpected answer")
+
+	monkeypatch.setitem(getInfo.REMOTE_SOURCES,"NCBI",timedOut)
+	monkeypatch.setitem(getInfo.REMOTE_SOURCES,"GBIF",broken)
+	assert safeRemoteText("NCBI","Alca torda","Scientific Name",3)=="\n!! NCBI did not answer within 3 seconds, search cancelled. !!\n"
+	assert safeRemoteText("GBIF","Alca torda","Scientific Name")=="\n!! GBIF search failed: unexpected answer !!\n"
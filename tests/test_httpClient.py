@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the shared HTTP client: keep-alive connections, retries with backoff and request deadlines.
+"""
+
+import threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from httpClient import HttpClient, requestDeadline
+
+
+# server answering with the queued statuses first and 200 afterwards, noting the client port of every request
+class Handler(BaseHTTPRequestHandler):
+	protocol_version="HTTP/1.1"
+
+	def log_message(self,format,*args):
+		pass
+
+	def do_GET(self):
+		server=self.server
+		server.ports.append(self.client_address[1])
+		status, headers, delay = server.answers.pop(0) if server.answers else (200, {}, 0)
+		time.sleep(delay)
+		data=b"{}"
+		try:
+			self.send_response(status)
+			for name, value in headers.items():
+				self.send_header(name,value)
+			self.send_header("Content-Length",str(len(data)))
+			self.end_headers()
+			self.wfile.write(data)
+		except (BrokenPipeError, ConnectionResetError):
+			# the client gave up waiting
+			pass
+
+
+@pytest.fixture
+def server():
+	server=ThreadingHTTPServer(("127.0.0.1",0),Handler)
+	server.answers=[]
+	server.ports=[]
+	server.url=f"http://127.0.0.1:{server.server_address[1]}/"
+	thread=threading.Thread(target=server.serve_forever,daemon=True)
+	thread.start()
+	yield server
+	server.shutdown()
+	server.server_close()
+
+
+@pytest.fixture
+def client():
+	client=HttpClient(retries=3,backoff=0.01,max_backoff=0.5)
+	yield client
+	client.close()
+
+
+def test_connections_are_kept_open(server,client):
+	for _ in range(3):
+		assert client.get(server.url).status_code==200
+	assert len(set(server.ports))==1
+
+
+def test_failed_requests_are_retried(server,client):
+	server.answers=[(503, {}, 0), (502, {}, 0)]
+	assert client.get(server.url).status_code==200
+	assert len(server.ports)==3
+
+
+def test_last_answer_is_returned_after_all_retries(server,client):
+	server.answers=[(500, {}, 0)]*4
+	assert client.get(server.url).status_code==500
+	assert len(server.ports)==4
+	# client errors are not retried
+	server.answers=[(404, {}, 0)]
+	assert client.get(server.url).status_code==404
+	assert len(server.ports)==5
+
+
+def test_retry_after_is_honored(server,client):
+	server.answers=[(429, {"Retry-After": "1"}, 0)]
+	start=time.monotonic()
+	assert client.get(server.url).status_code==200
+	assert 0.5<=time.monotonic()-start<1.5
+
+
+def test_backoff_grows_up_to_its_limit(client):
+	assert all(0<=client.delay(0)<=0.01 for _ in range(100))
+	assert all(0<=client.delay(10)<=0.5 for _ in range(100))
+
+
+def test_deadline_cuts_requests_short(server,client):
+	server.answers=[(200, {}, 1)]
+	start=time.monotonic()
+	with pytest.raises(requests.Timeout):
+		with requestDeadline(0.2):
+			client.get(server.url)
+	assert time.monotonic()-start<0.8
+
+
+def test_no_retry_after_the_deadline(server,client):
+	# the wait is capped at max_backoff, which still ends after the deadline
+	server.answers=[(503, {"Retry-After": "5"}, 0)]
+	with requestDeadline(0.3):
+		assert client.get(server.url).status_code==503
+	assert len(server.ports)==1
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the bulk lookups of SearchDatabase.lookup_many.
+"""
+
+import pytest
+
+from queryLayer import CHUNK_BUCKETS, timer
+from getInfo import SearchDatabase
+
+
+# function for resolving identifiers and collecting the results and misses
+def lookup(identifiers,selection: str,**kwargs):
+	misses=[]
+	results=[(identifier, record.sci_name) for identifier, record in SearchDatabase.lookup_many(identifiers,selection,misses=misses,**kwargs)]
+	return results, misses
+
+
+# function for counting the runs of the bulk statements of a selection, by bucket size
+def bulkRuns(selection: str):
+	timings=timer.getTimings()
+	return {size: timings[f"bulk_species:{selection}:{size}"][0] for size in CHUNK_BUCKETS if f"bulk_species:{selection}:{size}" in timings}
+
+
+def test_lookup_many_keeps_input_order(library_db):
+	results, misses = lookup(["Canis lupus", "alca torda", "Calidris alpina", "Canis lupus"],"Scientific Name")
+	assert results==[("Canis lupus", "Canis lupus"), ("alca torda", "Alca torda"), ("Calidris alpina", "Calidris alpina"), ("Canis lupus", "Canis lupus")]
+	assert misses==[]
+
+
+def test_lookup_many_collects_misses(library_db):
+	results, misses = lookup(["GCA_000000003.1", "GCA_404.1", " GCF_000000004.2 ", ""],"Accession Number")
+	assert results==[("GCA_000000003.1", "Alca torda"), (" GCF_000000004.2 ", "Canis lupus")]
+	assert misses==["GCA_404.1", ""]
+
+	results, misses = lookup(["4", 0, "x", "99"],"Genome Index")
+	assert results==[("4", "Fagus sylvatica"), (0, "Calidris alpina")]
+	assert misses==["x", "99"]
+
+
+def test_lookup_many_record(library_db):
+	(_, record), = SearchDatabase.lookup_many(["Calidris alpina"],"Scientific Name")
+	assert record.indices==[0, 1]
+	assert record.accessions==["GCA_000000001.1", "GCA_000000002.1"]
+	assert record.habitats=="marine, brackish, terrestrial"
+	assert record.taxpath=="Animalia > Chordata > Aves > Charadriiformes > Scolopacidae > Calidris"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 500])
+def test_lookup_many_chunks(library_db,chunk_size):
+	names=["Fagus sylvatica", "Calidris alpina", "Homo sapiens", "Alca torda", "Canis lupus", "Parus major"]
+	timer.reset()
+	results, misses = lookup(names,"Scientific Name",chunk_size=chunk_size)
+	assert [name for name, _ in results]==[name for name in names if name not in misses]
+	assert misses==["Homo sapiens", "Parus major"]
+
+	# every chunk is resolved with one statement, padded to the smallest bucket it fits
+	chunks=[names[start:start+chunk_size] for start in range(0,len(names),chunk_size)]
+	expected={}
+	for chunk in chunks:
+		size=next(bucket for bucket in CHUNK_BUCKETS if bucket>=len(chunk))
+		expected[size]=expected.get(size,0)+1
+	assert bulkRuns("Scientific Name")==expected
+
+
+def test_lookup_many_is_lazy(library_db):
+	timer.reset()
+	lookups=SearchDatabase.lookup_many(iter(["Canis lupus", "Alca torda", "Fagus sylvatica"]),"Scientific Name",chunk_size=1)
+	assert next(lookups)[1].sci_name=="Canis lupus"
+	assert bulkRuns("Scientific Name")=={1: 1}
+
+
+def test_lookup_many_rejects_taxon_groups(library_db):
+	with pytest.raises(ValueError):
+		list(SearchDatabase.lookup_many(["Aves"],"Taxon Group"))
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the offline mirror sync, against the stand-in server.
+"""
+
+from config import settings
+from getInfo import remoteText, internetConnection
+from mirrorSync import syncMirror
+from responseCache import cache, mirror
+
+
+def test_sync_fills_the_mirror(stand_in):
+	assert syncMirror(workers=2)=={"GBIF": 4, "Maps": 4, "NCBI": 4, "Wikipedia": 8}
+	assert mirror.get("GBIF","Alca torda",allow_stale=True).payload["usageKey"]==1000002
+	assert mirror.get("NCBI","genome/accession/GCF_000000004.2/dataset_report",allow_stale=True).payload["total_count"]==1
+	assert mirror.get("NCBI","genome/accession/GCA_404.1/dataset_report",allow_stale=True) is None
+
+
+def test_sync_continues_where_it_stopped(stand_in):
+	assert syncMirror(["NCBI", "Wikipedia"])=={"NCBI": 4, "Wikipedia": 8}
+	requests=len(stand_in.requests)
+	# mirrored entries are skipped, only the missing parts are loaded
+	assert syncMirror()=={"GBIF": 4, "Maps": 4, "NCBI": 0, "Wikipedia": 0}
+	assert not any("ncbi" in path or "wikipedia" in path for _, path in stand_in.requests[requests:])
+
+	requests=len(stand_in.requests)
+	assert syncMirror()=={"GBIF": 0, "Maps": 0, "NCBI": 0, "Wikipedia": 0}
+	assert len(stand_in.requests)==requests
+	# a resync loads everything again
+	assert syncMirror(["NCBI"],resync=True)=={"NCBI": 4}
+
+
+def test_offline_mode_searches_the_mirror(stand_in,monkeypatch):
+	syncMirror(["GBIF", "NCBI"])
+	cache.clear()
+	requests=len(stand_in.requests)
+	monkeypatch.setitem(settings,"OFFLINE_MODE",True)
+
+	assert internetConnection("GBIF") and not internetConnection("Wikipedia")
+	assert "Alca torda" in remoteText("GBIF","Alca torda","Scientific Name")
+	assert "Organism_name: Alca torda" in remoteText("NCBI","GCA_000000003.1","Accession Number")
+	assert "not in the offline mirror of Wikipedia" in remoteText("Wikipedia","Alca torda","Scientific Name")
+	assert len(stand_in.requests)==requests
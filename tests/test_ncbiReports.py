@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the bulk NCBI dataset reports, against the stand-in server.
+"""
+
+from getInfo import SearchNCBI
+from responseCache import cache
+
+ACCESSIONS = ["GCA_000000003.1", "GCA_000000001.1", "GCA_404.1", "GCF_000000004.2", "GCA_000000002.1"]
+
+
+def test_reports_of_all_accessions(stand_in):
+	misses=[]
+	reports=dict(SearchNCBI.getDatasetReports(ACCESSIONS,misses=misses))
+	assert set(reports)=={"GCA_000000001.1", "GCA_000000002.1", "GCA_000000003.1", "GCF_000000004.2"}
+	assert reports["GCA_000000003.1"]["organism"]["organism_name"]=="Alca torda"
+	assert misses==["GCA_404.1"]
+	# one request for all of them
+	assert len(stand_in.requests)==1
+
+
+def test_reports_are_fetched_per_chunk_and_page(stand_in):
+	misses=[]
+	reports=list(SearchNCBI.getDatasetReports(ACCESSIONS+ACCESSIONS[:2],chunk_size=2,page_size=1,misses=misses))
+	# duplicates are only asked for once
+	assert len(reports)==4 and misses==["GCA_404.1"]
+	# three chunks with one page per report, the chunk with the missing accession has a single page
+	assert len(stand_in.requests)==4
+
+
+def test_reports_are_stored_for_single_lookups(stand_in):
+	list(SearchNCBI.getDatasetReports(["GCA_000000001.1"]))
+	entry=cache.get("NCBI","genome/accession/GCA_000000001.1/dataset_report")
+	assert entry.payload["total_count"]==1
+	assert entry.payload["reports"][0]["accession"]=="GCA_000000001.1"
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the streamed NCBI taxon reports, against the stand-in server.
+"""
+
+import json
+
+import pytest
+
+from config import settings
+from getInfo import SearchNCBI, iterJsonItems
+from responseCache import OfflineError
+
+
+def test_json_items_are_read_while_they_arrive():
+	answer={"reports": [{"accession": "GCA_1", "name": "a, [b] {c}", "size": 12345}, {"accession": "GCA_2", "size": 7}, []],
+		"total_count": 1234, "next_page_token": "abc"}
+	text=json.dumps(answer,indent=1)
+	payload={}
+	# one character at a time, so every value is split up somewhere
+	assert list(iterJsonItems(iter(text),"reports",payload))==answer["reports"]
+	assert payload=={"total_count": 1234, "next_page_token": "abc"}
+
+	seen=[]
+	chunks=(seen.append(char) or char for char in text)
+	first=next(iterJsonItems(chunks,"reports",{}))
+	# the first report is there before the rest of the page was read
+	assert first["accession"]=="GCA_1" and len(seen)<len(text)/2
+
+
+def test_incomplete_json_fails():
+	with pytest.raises(ValueError):
+		list(iterJsonItems(iter('{"reports": [{"accession": "GCA_1"}'),"reports",{}))
+
+
+def test_summary_follows_the_pages(stand_in):
+	summaries=[]
+	summary=SearchNCBI.getTaxonSummary("Aves",lambda summary: summaries.append(summary["assemblies"]),page_size=1)
+	assert (summary["total"], summary["assemblies"], summary["organisms"])==(3, 3, 3)
+	assert summary["levels"]=={"Chromosome": 3}
+	assert summaries==[1, 2, 3]
+	assert len(stand_in.requests)==3
+
+
+def test_no_more_pages_after_the_limit(stand_in):
+	reports=list(SearchNCBI.iterTaxonReports("Aves",limit=2,page_size=1))
+	assert [report["accession"] for report in reports]==["GCA_000000001.1", "GCA_000000002.1"]
+	assert len(stand_in.requests)==2
+
+
+def test_pages_are_cached_for_offline_use(stand_in,monkeypatch):
+	SearchNCBI.getTaxonSummary("Aves",page_size=2)
+	requests=len(stand_in.requests)
+	monkeypatch.setitem(settings,"OFFLINE_MODE",True)
+	assert SearchNCBI.getTaxonSummary("Aves",page_size=2)["assemblies"]==3
+	assert len(stand_in.requests)==requests
+	with pytest.raises(OfflineError):
+		SearchNCBI.getTaxonSummary("Mammalia",page_size=2)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the named statements of the query layer.
+"""
+
+import re, sqlite3
+
+import pytest
+
+import queryLayer
+from queryLayer import STATEMENTS, chunkBucket, timer
+
+
+def test_chunk_bucket_pads_to_bucket_sizes():
+	assert list(chunkBucket([1]))==[(1, [1])]
+	assert list(chunkBucket([1, 2]))==[(8, [1, 2]+[None]*6)]
+	chunks=list(chunkBucket(list(range(600))))
+	assert [size for size, _ in chunks]==[512, 512]
+	assert chunks[0][1]==list(range(512))
+	assert chunks[1][1]==list(range(512,600))+[None]*424
+
+
+def test_all_statements_prepare(library_db):
+	db_conn=sqlite3.connect(library_db)
+	for name, statement in STATEMENTS.items():
+		# numbered parameters like ?1 are bound once however often they are used
+		numbered=[int(number) for number in re.findall(r"\?(\d+)",statement)]
+		params=[None]*(max(numbered) if numbered else statement.count("?"))
+		# EXPLAIN compiles the statement without running it
+		db_conn.execute(f"EXPLAIN {statement}",params).fetchall()
+	db_conn.close()
+
+
+def test_single_lookups(library_db):
+	assert queryLayer.fetchOne("exists:Scientific Name", ("Calidris alpina",)) is not None
+	assert queryLayer.fetchOne("exists:Accession Number", ("GCA_404.1",)) is None
+	assert [row[0] for row in queryLayer.fetchAll("indices:Scientific Name", ("Calidris alpina",))]==[0, 1]
+	assert [row[0] for row in queryLayer.fetchAll("indices:Genome Index", (3,))]==[3]
+
+
+def test_single_lookups_ignore_case(library_db):
+	assert queryLayer.fetchOne("exists:Scientific Name",("calidris ALPINA",)) is not None
+	assert [row[0] for row in queryLayer.fetchAll("indices:Scientific Name",("Calidris alpina",))]==[0, 1]
+	assert queryLayer.fetchOne("spelling:Taxon Group",("aves",))==("Aves",)
+	assert queryLayer.fetchOne("exists:Accession Number",("GCA_404.1",)) is None
+
+
+def test_timer_counts_runs(library_db):
+	timer.reset()
+	for _ in range(3):
+		queryLayer.fetchAll("all_names")
+	count, total, slowest = timer.getTimings()["all_names"]
+	assert count==3 and 0<=slowest<=total
+	timer.reset()
+	assert timer.getTimings()=={}
+
+
+def test_unknown_statement_names_fail(library_db):
+	with pytest.raises(KeyError):
+		queryLayer.fetchAll("drop_everything")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the rate limiter: the spacing of requests, pauses and the priority lanes.
+"""
+
+import threading, time
+
+from rateLimiter import HostBucket, RateLimiter, requestPriority, currentLane, INTERACTIVE, BATCH
+
+# requests per second of the test host
+RATE = 20.0
+
+
+def test_requests_are_spaced_by_the_rate():
+	bucket=HostBucket(RATE)
+	start=time.monotonic()
+	for _ in range(5):
+		bucket.acquire()
+	# the first token is there from the start, the others follow at the rate
+	assert time.monotonic()-start>=4/RATE*0.9
+
+
+def test_pause_holds_back_requests():
+	bucket=HostBucket(RATE)
+	bucket.acquire()
+	bucket.pause(0.3)
+	assert bucket.acquire()>=0.25
+
+
+def test_interactive_lane_overtakes_batch_lane():
+	bucket=HostBucket(5.0)
+	bucket.acquire()
+	order=[]
+
+	# function for sending a request in a lane and noting when it was sent
+	def send(lane: int):
+		bucket.acquire(lane)
+		order.append(lane)
+
+	batch=[threading.Thread(target=send,args=(BATCH,)) for _ in range(2)]
+	for thread in batch:
+		thread.start()
+		time.sleep(0.02)
+	interactive=threading.Thread(target=send,args=(INTERACTIVE,))
+	interactive.start()
+	for thread in batch+[interactive]:
+		thread.join()
+
+	assert order==[INTERACTIVE, BATCH, BATCH]
+	metrics=bucket.getMetrics()
+	assert metrics["sent"]=={"interactive": 2, "batch": 2}
+	assert metrics["max_queued"]==3
+
+
+def test_request_priority_sets_the_lane_of_the_thread():
+	assert currentLane()==INTERACTIVE
+	with requestPriority(BATCH):
+		assert currentLane()==BATCH
+		lanes=[]
+		# other threads keep their own lane
+		thread=threading.Thread(target=lambda: lanes.append(currentLane()))
+		thread.start()
+		thread.join()
+		assert lanes==[INTERACTIVE]
+	assert currentLane()==INTERACTIVE
+
+
+def test_limiter_uses_the_lane_of_the_thread():
+	limiter=RateLimiter({"api.gbif.org": 1000.0})
+	with requestPriority(BATCH):
+		limiter.acquire("https://api.gbif.org/v1/species/match")
+	limiter.acquire("https://api.gbif.org/v1/species/match")
+	assert limiter.getMetrics()["api.gbif.org"]["sent"]=={"interactive": 1, "batch": 1}
+
+
+def test_hosts_without_rate_are_not_limited():
+	limiter=RateLimiter({"api.gbif.org": 1.0})
+	assert limiter.bucket("https://en.wikipedia.org/w/api.php") is None
+	assert limiter.acquire("https://en.wikipedia.org/w/api.php")==0.0
+	assert not limiter.pause("https://en.wikipedia.org/w/api.php",10)
+	assert limiter.getMetrics()=={}
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the response cache: expiry, dropping the least recently used entries and revalidation with ETags.
+"""
+
+import random
+
+import pytest
+import requests
+
+import responseCache
+from responseCache import ResponseCache, NOT_MODIFIED, OfflineError
+
+# seconds a response of the test source stays valid
+TTL = 3600
+
+
+# clock standing in for the time module of the cache, so entries expire without waiting
+class Clock:
+	def __init__(self):
+		self.now=1_000_000.0
+
+	def time(self):
+		return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+	clock=Clock()
+	monkeypatch.setattr(responseCache,"time",clock)
+	return clock
+
+
+@pytest.fixture
+def cache(tmp_path,clock,monkeypatch):
+	# every source counts as reachable, without probing it
+	monkeypatch.setattr(responseCache.monitor,"isAvailable",lambda source: True)
+	monkeypatch.setattr(responseCache.monitor,"recordSuccess",lambda source: None)
+	monkeypatch.setattr(responseCache.monitor,"recordFailure",lambda source: None)
+	monkeypatch.setitem(responseCache.settings,"OFFLINE_MODE",False)
+	cache=ResponseCache(tmp_path/"cache.db",ttls={"GBIF": TTL})
+	yield cache
+	cache.connections.closeAll()
+
+
+# function for making an error like the ones raised by HttpClient for an answer with the given status
+def httpError(status: int):
+	response=requests.Response()
+	response.status_code=status
+	return requests.HTTPError(f"{status} error",response=response)
+
+
+def test_entries_expire(cache,clock):
+	cache.put("GBIF","Calidris alpina",{"usageKey": 1})
+	entry=cache.get("GBIF","Calidris alpina")
+	assert entry.payload=={"usageKey": 1} and entry.fresh
+
+	clock.now+=TTL+1
+	assert cache.get("GBIF","Calidris alpina") is None
+	entry=cache.get("GBIF","Calidris alpina",allow_stale=True)
+	assert entry.payload=={"usageKey": 1} and not entry.fresh
+
+
+def test_sources_without_ttl_never_serve_fresh_entries(cache):
+	cache.put("NCBI","GCA_000000001.1",{"reports": []})
+	assert cache.get("NCBI","GCA_000000001.1") is None
+	assert cache.get("NCBI","GCA_000000001.1",allow_stale=True).payload=={"reports": []}
+
+
+def test_queries_ignore_case_and_whitespace(cache):
+	cache.put("GBIF","Calidris  alpina ",{"usageKey": 1})
+	assert cache.get("GBIF","calidris alpina").payload=={"usageKey": 1}
+
+
+def test_least_recently_used_entries_are_dropped(cache,clock):
+	generator=random.Random(0)
+	payloads={name: "".join(generator.choice("acgt") for _ in range(4000)) for name in "abc"}
+	cache.max_bytes=None
+	cache.put("GBIF","a",payloads["a"])
+	clock.now+=100
+	cache.put("GBIF","b",payloads["b"])
+	sizes=dict(cache._cursor().execute("SELECT Query, Size FROM responses"))
+	cache.max_bytes=sizes["a"]+sizes["b"]+sizes["b"]//2
+
+	# reading a marks it as used after b
+	clock.now+=100
+	assert cache.get("GBIF","a").payload==payloads["a"]
+	clock.now+=100
+	cache.put("GBIF","c",payloads["c"])
+
+	assert cache.get("GBIF","b") is None
+	assert cache.get("GBIF","a").payload==payloads["a"]
+	assert cache.get("GBIF","c").payload==payloads["c"]
+
+
+def test_fetch_revalidates_with_etag(cache,clock):
+	entries=[]
+
+	# function standing in for a loader asking the server, which answers 304 if the ETag still matches
+	def loader(entry):
+		entries.append(entry)
+		if entry is not None and entry.etag=='"v1"':
+			return NOT_MODIFIED
+		return {"usageKey": 1}, '"v1"', "Mon, 19 Oct 2026 10:00:00 GMT"
+
+	assert cache.fetch("GBIF","Alca torda",loader)=={"usageKey": 1}
+	assert entries==[None]
+	# fresh entries are served without asking the server
+	assert cache.fetch("GBIF","alca torda",loader)=={"usageKey": 1}
+	assert len(entries)==1
+
+	clock.now+=TTL+1
+	assert cache.fetch("GBIF","Alca torda",loader)=={"usageKey": 1}
+	assert entries[1].etag=='"v1"' and entries[1].last_modified=="Mon, 19 Oct 2026 10:00:00 GMT" and not entries[1].fresh
+	# the confirmed entry is fresh again
+	assert cache.get("GBIF","Alca torda").fresh
+
+
+def test_fetch_replaces_changed_entries(cache,clock):
+	cache.put("GBIF","Alca torda",{"usageKey": 1},etag='"v1"')
+	clock.now+=TTL+1
+	assert cache.fetch("GBIF","Alca torda",lambda entry: ({"usageKey": 2}, '"v2"', None))=={"usageKey": 2}
+	entry=cache.get("GBIF","Alca torda")
+	assert entry.payload=={"usageKey": 2} and entry.etag=='"v2"'
+
+
+def test_client_errors_are_not_cached(cache,clock):
+	def missing(entry):
+		raise httpError(404)
+
+	with pytest.raises(requests.HTTPError):
+		cache.fetch("GBIF","Homo sapiens",missing)
+	assert cache.get("GBIF","Homo sapiens",allow_stale=True) is None
+
+	# an expired entry doesn't stand in for an answer of the source
+	cache.put("GBIF","Homo sapiens",{"usageKey": 1})
+	clock.now+=TTL+1
+	with pytest.raises(requests.HTTPError):
+		cache.fetch("GBIF","Homo sapiens",missing)
+
+
+def test_expired_entries_stand_in_for_failed_requests(cache,clock):
+	def unavailable(entry):
+		raise httpError(503)
+
+	cache.put("GBIF","Canis lupus",{"usageKey": 1})
+	clock.now+=TTL+1
+	assert cache.fetch("GBIF","Canis lupus",unavailable)=={"usageKey": 1}
+	with pytest.raises(requests.HTTPError):
+		cache.fetch("GBIF","Fagus sylvatica",unavailable)
+
+
+def test_offline_mode_uses_fallback(tmp_path,cache,monkeypatch):
+	mirror=ResponseCache(tmp_path/"mirror.db",ttls={},max_bytes=None)
+	mirror.put("GBIF","Canis lupus",{"usageKey": 1})
+	cache.fallback=mirror
+	monkeypatch.setitem(responseCache.settings,"OFFLINE_MODE",True)
+
+	def unreachable(entry):
+		raise AssertionError("offline mode must not ask the source")
+
+	assert cache.fetch("GBIF","Canis lupus",unreachable)=={"usageKey": 1}
+	with pytest.raises(OfflineError):
+		cache.fetch("GBIF","Fagus sylvatica",unreachable)
+	mirror.connections.closeAll()
+
+
+# function for summing up the payload sizes the slow way
+def payloadSize(cache):
+	return cache._cursor().execute("SELECT COALESCE(SUM(Size), 0) FROM responses").fetchone()[0]
+
+
+def test_size_total_follows_changes(cache):
+	assert cache.size()==0
+	cache.put("GBIF","Alca torda",{"usageKey": 1})
+	cache.put("GBIF","Canis lupus",{"usageKey": 2})
+	assert cache.size()==payloadSize(cache)>0
+	# a replaced entry only counts once
+	cache.put("GBIF","alca torda",{"usageKey": 1, "canonicalName": "Alca torda"*20})
+	assert cache.size()==payloadSize(cache)
+	cache.clear("GBIF")
+	assert cache.size()==0
+
+
+def test_size_total_is_added_to_older_caches(tmp_path,cache):
+	cache.put("GBIF","Alca torda",{"usageKey": 1})
+	size=cache.size()
+	cache._cursor().execute("DROP TABLE cache_size")
+	cache.connections.closeAll()
+
+	reopened=ResponseCache(tmp_path/"cache.db",ttls={"GBIF": TTL})
+	assert reopened.size()==size
+	reopened.connections.closeAll()
+
+
+def test_fetch_stream_stores_complete_responses(cache,clock):
+	# function standing in for a loader reading a page while it arrives
+	def loader(payload):
+		yield 1
+		yield 2
+		payload["total_count"]=2
+
+	stream=cache.fetchStream("GBIF","page",loader,"items")
+	assert next(stream)==1
+	# a response that was not read to the end is not stored
+	stream.close()
+	assert cache.get("GBIF","page") is None
+
+	assert list(cache.fetchStream("GBIF","page",loader,"items"))==[1, 2]
+	assert cache.get("GBIF","page").payload=={"items": [1, 2], "total_count": 2}
+
+
+def test_fetch_stream_falls_back_before_the_first_item(cache,clock):
+	def unavailable(payload):
+		raise httpError(503)
+		yield
+
+	cache.put("GBIF","page",{"items": [1], "total_count": 1})
+	clock.now+=TTL+1
+	stream=cache.fetchStream("GBIF","page",unavailable,"items")
+	assert list(stream)==[1]
+	with pytest.raises(requests.HTTPError):
+		list(cache.fetchStream("GBIF","other page",unavailable,"items"))
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+@author: Ronja Rösner
+
+Tests of the batched Wikipedia summaries, against the stand-in server.
+"""
+
+import io, json
+
+from batchSearch import runBatch
+from getInfo import SearchWikipedia
+
+TITLES = ["Alca torda", "Razorbill", "Canis lupus", "Homo sapiens", "Fagus sylvatica"]
+
+
+# function for listing the requests to the Wikipedia API of one language
+def wikiRequests(stand_in,language: str="en"):
+	return [path for _, path in stand_in.requests if path.startswith(f"/wikipedia/{language}/")]
+
+
+def test_summaries_are_loaded_in_batches(stand_in):
+	summaries=SearchWikipedia.loadSummaries(TITLES,batch_size=2)
+	assert len(wikiRequests(stand_in))==3
+	assert summaries["Alca torda"].startswith("Alca torda (Razorbill)")
+	# redirects lead to the page of the scientific name
+	assert summaries["Razorbill"]==summaries["Alca torda"]
+	assert summaries["Homo sapiens"] is None
+
+
+def test_cached_summaries_are_not_asked_for_again(stand_in):
+	SearchWikipedia.loadSummaries(TITLES[:2])
+	SearchWikipedia.loadSummaries(TITLES)
+	# the second request only asks for the missing pages
+	assert len(wikiRequests(stand_in))==2
+	assert "Alca" not in wikiRequests(stand_in)[1]
+	assert SearchWikipedia.loadSummary("Canis lupus").startswith("Canis lupus (Wolf)")
+	assert len(wikiRequests(stand_in))==2
+
+
+def test_languages_are_loaded_together(stand_in):
+	summaries=SearchWikipedia.loadMultilingualSummaries(TITLES[:3])
+	assert summaries["de"]["Canis lupus"].startswith("Canis lupus (Wolf)")
+	assert summaries["de"]["Alca torda"].startswith("Alca torda (Tordalk)")
+	assert len(wikiRequests(stand_in,"en"))==1 and len(wikiRequests(stand_in,"de"))==1
+
+
+def test_batch_search_asks_once_per_chunk(stand_in):
+	output=io.StringIO()
+	runBatch(iter(["Alca torda", "Canis lupus", "Fagus sylvatica"]),"Scientific Name",["Wikipedia"],output,"jsonl",chunk_size=8)
+	rows=[json.loads(line) for line in output.getvalue().splitlines()]
+	assert all("is a species of the family" in row["Wikipedia"] for row in rows)
+	assert len(wikiRequests(stand_in))==1